@@ -0,0 +1,3 @@
+"""
+Benchmarks of py_epc_qr, run as modules from the root of the repository, e.g. `python -m benchmarks.suite`.
+"""
@@ -0,0 +1,46 @@
+"""
+Benchmark the vectorized encoder against the generic qrcode library.
+
+Run with `python -m benchmarks.encoder` from the root of the repository.
+"""
+
+import timeit
+
+import qrcode
+
+from py_epc_qr.encoder import encode
+from py_epc_qr.transaction import consumer_epc_qr
+
+
+def qrcode_modules(data: str) -> list:
+    """
+    Return the module matrix built by the qrcode library, like `to_qr` used to.
+    """
+    qr = qrcode.QRCode(version=6, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(data)
+    qr.make()
+    return qr.modules
+
+
+def main(number: int = 200):
+    """
+    Print the time per code of both encoders for payloads of growing length.
+    """
+    print(f"{'bytes':>6} {'qrcode [ms]':>12} {'encoder [ms]':>13} {'speedup':>8}")
+    for length in (0, 35, 70, 140):
+        data = consumer_epc_qr(
+            beneficiary="Wikimedia Foerdergesellschaft",
+            iban="DE33100205000001194700",
+            amount=123.45,
+            remittance="Spende fuer Wikipedia " * (length // 22) or "Danke",
+        ).to_str()
+        reference = timeit.timeit(lambda: qrcode_modules(data), number=number)
+        vectorized = timeit.timeit(lambda: encode(data), number=number)
+        print(
+            f"{len(data.encode()):>6} {reference / number * 1e3:>12.3f}"
+            f" {vectorized / number * 1e3:>13.3f} {reference / vectorized:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark the startup time of the `epcqr` command line interface.
+
+Run with `python -m benchmarks.startup` from the root of the repository. Every command runs in a fresh interpreter,
+and the bare interpreter is timed as well, since it is the part of the startup that the package cannot save.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    "interpreter": [sys.executable, "-c", "pass"],
+    "import cli": [sys.executable, "-c", "import py_epc_qr.cli"],
+    "epcqr version": [sys.executable, "-m", "py_epc_qr", "version"],
+    "epcqr --help": [sys.executable, "-m", "py_epc_qr", "--help"],
+}
+
+
+def measure(command: list, repeat: int) -> list:
+    """
+    Return the wall times of `repeat` runs of `command` in seconds.
+    """
+    res = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        res.append(time.perf_counter() - start)
+    return res
+
+
+def slowest_imports(module: str, count: int) -> list:
+    """
+    Return `(seconds, name)` of the `count` modules that take longest to import, including their own imports,
+    when importing `module`.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    res = []
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        res.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(res, reverse=True)[:count]
+
+
+def main():
+    """
+    Time the commands and print the modules that dominate the import of the cli.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=0.0,
+        help="exit with an error if `epcqr version` takes longer in seconds (0 for no budget)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'command':<16} {'min [ms]':>9} {'median [ms]':>12}")
+    results = {}
+    for name, command in COMMANDS.items():
+        times = measure(command, args.repeat)
+        results[name] = min(times)
+        print(
+            f"{name:<16} {min(times) * 1e3:>9.1f} {statistics.median(times) * 1e3:>12.1f}"
+        )
+
+    print(f"\n{'slowest imports of py_epc_qr.cli':<40} {'[ms]':>6}")
+    for seconds, name in slowest_imports("py_epc_qr.cli", 10):
+        print(f"{name:<40} {seconds * 1e3:>6.1f}")
+
+    if args.budget and results["epcqr version"] > args.budget:
+        print(
+            f"OVER BUDGET epcqr version: {results['epcqr version'] * 1e3:.1f} ms"
+            f" > {args.budget * 1e3:.1f} ms"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
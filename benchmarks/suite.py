@@ -0,0 +1,199 @@
+"""
+Benchmark the hot paths of creating epc qr codes on reproducible synthetic data.
+
+Run with `python -m benchmarks.suite --out results.json` from the root of the repository,
+and pass `--baseline` with the results of an earlier run to flag regressions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+import timeit
+from importlib.metadata import PackageNotFoundError, version
+
+from py_epc_qr.columnar import consumer_payloads
+from py_epc_qr.constants import ALLOWED_KEYS
+from py_epc_qr.iban import mod97
+from py_epc_qr.render import render
+from py_epc_qr.transaction import consumer_epc_qr
+from py_epc_qr.validation import validate_records
+
+# ranges of the lengths of the free-text entries, from short consumer transfers to the limits of the EPC guidelines
+LENGTHS = {"short": (3, 20), "medium": (20, 60), "long": (60, 140)}
+
+
+def make_iban(rng: random.Random) -> str:
+    """
+    Return a random german iban with valid check digits.
+    """
+    bban = "".join(rng.choices(string.digits, k=18))
+    return f"DE{98 - mod97(f'DE00{bban}'):02d}{bban}"
+
+
+def make_record(rng: random.Random, lengths: tuple) -> dict:
+    """
+    Return a random consumer record whose beneficiary and remittance have lengths within `lengths`.
+    """
+    letters = string.ascii_letters + string.digits + " "
+
+    def text(limit: int) -> str:
+        length = rng.randint(lengths[0], min(lengths[1], limit))
+        return rng.choice(string.ascii_letters) + "".join(
+            rng.choices(letters, k=length - 1)
+        )
+
+    return {
+        "beneficiary": text(70),
+        "iban": make_iban(rng),
+        "amount": rng.randint(1, 10**8) / 100,
+        "remittance": text(140),
+    }
+
+
+def make_dataset(size: int, lengths: tuple, seed: int = 0) -> list:
+    """
+    Return `size` random consumer records, the same ones for the same `seed`.
+    """
+    rng = random.Random(seed)
+    return [make_record(rng, lengths) for _ in range(size)]
+
+
+def write_file(epc: consumer_epc_qr, file_name: str) -> None:
+    """
+    Write the png image of `epc` to `file_name`.
+    """
+    with open(file_name, "wb") as file:
+        epc.to_buffer(file)
+
+
+def stages(records: list, directory: str) -> dict:
+    """
+    Return the benchmarked stages as callables that process all of `records`.
+    """
+    epcs = [consumer_epc_qr(**record) for record in records]
+    matrices = [epc.to_matrix() for epc in epcs]
+    columns = [[record[key] for record in records] for key in ALLOWED_KEYS]
+    return {
+        "to_str": lambda: [epc.to_str() for epc in epcs],
+        "validate": lambda: list(validate_records(records)),
+        "construct": lambda: [consumer_epc_qr(**record) for record in records],
+        "columns": lambda: consumer_payloads(*columns),
+        "matrix": lambda: [epc.to_matrix() for epc in epcs],
+        "png": lambda: [render(modules, "png") for modules in matrices],
+        "svg": lambda: [render(modules, "svg") for modules in matrices],
+        "pillow": lambda: [epc.to_image() for epc in epcs],
+        "file": lambda: [
+            write_file(epc, os.path.join(directory, f"{i}.png"))
+            for i, epc in enumerate(epcs)
+        ],
+    }
+
+
+def measure(func, repeat: int) -> float:
+    """
+    Return the best time of `repeat` calls of `func` in seconds.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def run(batch_size: int, repeat: int, seed: int) -> dict:
+    """
+    Return the time per item in seconds of each stage, for single items and for batches of `batch_size`,
+    keyed by `stage/lengths/single` or `stage/lengths/batch`.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, lengths in LENGTHS.items():
+            records = make_dataset(batch_size, lengths, seed)
+            single = stages(records[:1], directory)
+            batch = stages(records, directory)
+            for stage in single:
+                results[f"{stage}/{name}/single"] = measure(single[stage], 20 * repeat)
+                results[f"{stage}/{name}/batch"] = (
+                    measure(batch[stage], repeat) / batch_size
+                )
+    return results
+
+
+def environment() -> dict:
+    """
+    Return the versions of python, the dependencies and the platform a run took place on.
+    """
+    res = {"python": platform.python_version(), "platform": platform.platform()}
+    for package in ("numpy", "qrcode", "pillow", "py-epc-qr"):
+        try:
+            res[package] = version(package)
+        except PackageNotFoundError:
+            res[package] = None
+    return res
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Return `(name, baseline, result)` of each benchmark that is slower than in `baseline` by more than `threshold`,
+    a fraction of the baseline time.
+    """
+    return [
+        (name, baseline[name], value)
+        for name, value in results.items()
+        if name in baseline and value > baseline[name] * (1 + threshold)
+    ]
+
+
+def main():
+    """
+    Run the suite, print and save the results, and flag regressions against a baseline.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default="", help="json file to save the results to")
+    parser.add_argument("--baseline", default="", help="json file of an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown flagged as regression, as fraction of the baseline time",
+    )
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = run(args.batch_size, args.repeat, args.seed)
+    print(f"{'benchmark':<28} {'time per item [us]':>19}")
+    for name, value in results.items():
+        print(f"{name:<28} {value * 1e6:>19.2f}")
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(
+                {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "environment": environment(),
+                    "settings": vars(args),
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after in regressions:
+            print(
+                f"REGRESSION {name}: {before * 1e6:.2f} us -> {after * 1e6:.2f} us"
+                f" ({after / before - 1:+.0%})"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark the smallest fitting qr code version against the fixed version 6.
+
+Run with `python -m benchmarks.versions` from the root of the repository.
+"""
+
+import timeit
+
+from py_epc_qr.transaction import consumer_epc_qr
+
+
+def main(number: int = 200):
+    """
+    Print version, time per code and png size of both sizing modes for payloads of growing length.
+    """
+    print(
+        f"{'bytes':>6} {'version':>8} {'fixed [ms]':>11} {'auto [ms]':>10}"
+        f" {'fixed [B]':>10} {'auto [B]':>9}"
+    )
+    cases = [("Wiki", "Danke")] + [
+        ("Wikimedia Foerdergesellschaft", "Spende fuer Wikipedia " * n or "Danke")
+        for n in (0, 1, 3, 6)
+    ]
+    for beneficiary, remittance in cases:
+        fixed, auto = (
+            consumer_epc_qr(
+                beneficiary=beneficiary,
+                iban="DE33100205000001194700",
+                amount=123.45,
+                remittance=remittance[:140],
+                qr_version=qr_version,
+            )
+            for qr_version in (6, None)
+        )
+        times = [
+            timeit.timeit(lambda: epc.to_bytes("png"), number=number) / number * 1e3
+            for epc in (fixed, auto)
+        ]
+        print(
+            f"{len(fixed.to_str().encode()):>6} {auto.fit_qr_version():>8}"
+            f" {times[0]:>11.3f} {times[1]:>10.3f}"
+            f" {len(fixed.to_bytes()):>10} {len(auto.to_bytes()):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Asyncio facade that renders epc qr codes off the event loop."""
+
+import asyncio
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, Iterable
+
+from py_epc_qr.parallel import result
+
+
+def _render(epc, fmt: str) -> bytes:
+    """
+    Return the qr code of `epc` in format `fmt`, run inside the executor.
+    """
+    return epc.to_bytes(fmt)
+
+
+class AsyncRenderer:
+    """
+    Render epc qr codes in an executor, so that the blocking and CPU-bound work never stalls the event loop.
+
+    The `executor` may be any `concurrent.futures.Executor`; pass a `ProcessPoolExecutor` to use several cores.
+    By default, a thread pool with one thread per core is created and shut down by `close`.
+    At most `max_concurrency` codes are rendered or queued in the executor at once (default: number of cores),
+    further calls wait for a free slot.
+    With a `cache.RenderCache`, hits are answered without involving the executor: on the event loop if it only
+    keeps entries in memory, and in a thread if its disk layer has to read or write files.
+    Its entries are keyed like those of `transaction.epc_qr.to_bytes`, so the cache may be shared with synchronous callers.
+    """
+
+    def __init__(
+        self, executor: Executor = None, max_concurrency: int = None, cache=None
+    ):
+        """Initialize"""
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(self.max_concurrency)
+        self.cache = cache
+        self._loop = self._semaphore = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        Return the semaphore of the running event loop, creating it on first use.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._semaphore = loop, asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _cached(self, method, *args):
+        """
+        Call `method` of the cache with `args`, in a thread if the cache has a disk layer, so that no file is
+        read or written on the event loop.
+        """
+        if getattr(self.cache, "directory", ""):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def render(self, epc, fmt: str = "png") -> bytes:
+        """
+        Return the qr code of `epc` in format `fmt`.
+
+        Cancelling the call cancels the work if it has not started yet;
+        work that already runs keeps its slot until it is done, so the bound on concurrency always holds.
+        """
+        if self.cache is not None:
+            key = epc.render_key(fmt)
+            if (data := await self._cached(self.cache.get, key)) is not None:
+                return data
+
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        try:
+            future = self.executor.submit(_render, epc, fmt)
+        except BaseException:
+            semaphore.release()
+            raise
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(semaphore.release))
+        data = await asyncio.wrap_future(future)
+
+        if self.cache is not None:
+            await self._cached(self.cache.put, key, data)
+        return data
+
+    async def as_completed(
+        self, epcs: Iterable, fmt: str = "png"
+    ) -> AsyncIterator[result]:
+        """
+        Render the qr codes of `epcs` and yield a namedtuple of kind `parallel.result` for each as soon as it is done.
+
+        Its `value` holds the data on success, and its `error` the exception raised otherwise.
+        At most twice `max_concurrency` codes are pending at once, so `epcs` may be an arbitrarily long iterator.
+        Closing the generator early cancels the pending codes.
+        """
+        items = iter(enumerate(epcs))
+        pending = {}
+
+        def submit() -> bool:
+            for index, epc in items:
+                pending[asyncio.ensure_future(self.render(epc, fmt))] = index
+                return True
+            return False
+
+        while len(pending) < 2 * self.max_concurrency and submit():
+            pass
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    index = pending.pop(task)
+                    if task.exception() is None:
+                        yield result(index, task.result(), None)
+                    else:
+                        yield result(index, None, task.exception())
+                    submit()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def close(self) -> None:
+        """
+        Shut down the executor if it was created by the renderer.
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+
+_default_renderer = None
+
+
+async def render_async(epc, fmt: str = "png") -> bytes:
+    """
+    Return the qr code of `epc` in format `fmt`, rendered by a shared `AsyncRenderer` with default settings.
+    """
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = AsyncRenderer()
+    return await _default_renderer.render(epc, fmt)
@@ -0,0 +1,176 @@
+"""
+Exact validation and formatting of amounts in integer cents.
+
+Amounts may be given as `int` (euros), `cents` (integer cents), `Decimal`, strings or floats.
+Integers and strings of plain decimal numbers are converted with integer arithmetic only,
+other strings and `Decimal` exactly by way of `Decimal`, so no amount is ever rounded.
+A float is valid if it is the float closest to a two-digit decimal number, i.e. if its shortest representation
+has at most two decimals, and is then converted to exactly that number of cents.
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Iterable
+
+# bounds of the amount entry in cents according to the EPC guidelines
+MIN_CENTS, MAX_CENTS = 1, 99999999999
+
+CENT, MAX_AMOUNT = Decimal("0.01"), Decimal("999999999.99")
+
+
+class cents(int):
+    """
+    Amount in integer cents, e.g. `cents(1230)` for 12.30 EUR; converting it to float yields euros.
+    """
+
+    __slots__ = ()
+
+    def __float__(self) -> float:
+        return int(self) / 100
+
+    def __repr__(self) -> str:
+        return f"cents({int(self)})"
+
+
+def _decimal(value) -> Decimal:
+    """
+    Return `value` as exact decimal number; raises if it is no number.
+    """
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, str):
+        return Decimal(value.strip())
+    return Decimal(float.__repr__(float(value)))
+
+
+def parse_amount(value) -> tuple:
+    """
+    Return `(cents, code)` of the amount `value`, where `code` is the error code of an invalid amount
+    and `cents` is `None` then, see `validation.MESSAGES`.
+    """
+    if isinstance(value, float):
+        if not 0.01 <= value <= 999999999.99:
+            return None, "amount.out_of_bounds"
+        if value != round(value, 2):
+            return None, "amount.precision"
+        return round(value * 100), None
+    if isinstance(value, cents):
+        number = int(value)
+    elif isinstance(value, int):
+        number = 100 * value
+    elif (
+        isinstance(value, str)
+        and (parts := value.partition("."))[0].isdecimal()
+        and len(parts[0]) <= 9
+        and (parts[2].isdecimal() and len(parts[2]) <= 2 or not parts[2])
+    ):
+        number = 100 * int(parts[0]) + int(parts[2].ljust(2, "0"))
+    else:
+        try:
+            value = _decimal(value)
+        except (TypeError, ValueError, InvalidOperation):
+            return None, "amount.not_a_number"
+        if not value.is_finite() or not CENT <= value <= MAX_AMOUNT:
+            return None, "amount.out_of_bounds"
+        if value != value.quantize(CENT):
+            return None, "amount.precision"
+        return int(value * 100), None
+    if not MIN_CENTS <= number <= MAX_CENTS:
+        return None, "amount.out_of_bounds"
+    return number, None
+
+
+def amount_error(value) -> str:
+    """
+    Return the error code of the amount `value`, or `None` if it is valid.
+    """
+    return parse_amount(value)[1]
+
+
+def format_cents(number: int) -> str:
+    """
+    Return the amount entry of `number` cents, e.g. `EUR12.30`.
+    """
+    return f"EUR{number // 100}.{number % 100:02d}"
+
+
+def format_amount(value) -> str:
+    """
+    Return the amount entry of the amount `value`; raises the error of `validation.MESSAGES` if it is invalid.
+    """
+    number, code = parse_amount(value)
+    if code is not None:
+        from py_epc_qr.validation import to_error
+
+        raise to_error(code, value)
+    return format_cents(number)
+
+
+def float_cents(amounts) -> tuple:
+    """
+    Return `(cents, out_of_bounds, imprecise)` of the numpy float array `amounts`, checked like single floats
+    by `parse_amount`, where the cents of invalid amounts are 0.
+    """
+    import numpy as np
+
+    with np.errstate(invalid="ignore"):
+        out_of_bounds = ~((amounts >= 0.01) & (amounts <= 999999999.99))
+        imprecise = ~out_of_bounds & (amounts != np.round(amounts, 2))
+        valid = ~(out_of_bounds | imprecise)
+    cents = np.rint(np.where(valid, amounts, 0) * 100).astype(np.int64)
+    return cents, out_of_bounds, imprecise
+
+
+def _parse_numbers(values: list) -> tuple:
+    """
+    Return `parse_amounts` of a list of floats and integers, checked at once by `float_cents`.
+    Integers are exact as floats within the bounds, and those beyond are out of bounds either way.
+    """
+    import numpy as np
+
+    cents, out_of_bounds, imprecise = float_cents(np.array(values, dtype=float))
+    numbers = cents.tolist()
+    indices = np.nonzero(out_of_bounds | imprecise)[0].tolist()
+    for index in indices:
+        numbers[index] = None
+    errors = [
+        (index, "amount.out_of_bounds" if bounded else "amount.precision")
+        for index, bounded in zip(indices, out_of_bounds[indices].tolist())
+    ]
+    return numbers, errors
+
+
+def parse_amounts(values: Iterable) -> tuple:
+    """
+    Return the cents of all amount `values`, with `None` for invalid ones, and their `(index, code)` pairs.
+    Columns of plain floats and integers are checked at once, see `_parse_numbers`.
+    """
+    values = list(values)
+    if values and all(type(value) in (float, int) for value in values):
+        try:
+            return _parse_numbers(values)
+        except OverflowError:
+            pass
+    numbers, errors = [], []
+    for index, value in enumerate(values):
+        number, code = parse_amount(value)
+        numbers.append(number)
+        if code is not None:
+            errors.append((index, code))
+    return numbers, errors
+
+
+def validate_amounts(values: Iterable) -> list:
+    """
+    Return `(index, code)` for each of the amount `values` that is invalid.
+    """
+    return parse_amounts(values)[1]
+
+
+def format_amounts(values: Iterable) -> list:
+    """
+    Return the amount entries of all amount `values`, with `None` for invalid ones.
+    """
+    return [
+        None if number is None else format_cents(number)
+        for number in parse_amounts(values)[0]
+    ]
@@ -0,0 +1,313 @@
+"""Streaming batch generation of EPC qr codes from csv or jsonl files."""
+
+import csv
+import json
+import mmap
+import os
+import re
+from collections import namedtuple
+from itertools import dropwhile
+from typing import Iterator
+
+from py_epc_qr import metrics
+from py_epc_qr.checks import check_qr_version, validate
+from py_epc_qr.constants import QR_VERSION
+from py_epc_qr.output import DirectoryWriter
+from py_epc_qr.parallel import imap, render
+from py_epc_qr.render import EXTENSIONS
+from py_epc_qr.transaction import consumer_epc_qr, epc_qr
+from py_epc_qr.validation import raise_violations, validate_record
+
+row_result = namedtuple(
+    "RowResult", ["line", "name", "error", "skipped"], defaults=[False]
+)
+
+payload_result = namedtuple("PayloadResult", ["line", "epc", "error"])
+
+stream_result = namedtuple("StreamResult", ["line", "name", "data", "error"])
+
+# every EPC-compliant string starts with the service tag followed by the version
+SERVICE_TAG = re.compile(rb"^BCD\r?\n00[12]\r?$", re.MULTILINE)
+
+# locations of the qr codes written by a previous run keyed by `(digest, name)`, see `generate`
+_written = {}
+
+
+def read_csv(file) -> Iterator[tuple]:
+    """
+    Yield `(line, record)` tuples from a csv file with a header row.
+    """
+    reader = csv.DictReader(file)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def read_jsonl(file) -> Iterator[tuple]:
+    """
+    Yield `(line, record)` tuples from a file with one json object per line.
+    The records are yielded as unparsed json text, see `to_epc`, and blank lines are skipped.
+    """
+    for line, text in enumerate(file, start=1):
+        if text.strip():
+            yield line, text
+
+
+def read_payloads(file) -> Iterator[tuple]:
+    """
+    Yield `(line, payload)` tuples from a binary file of concatenated EPC-compliant strings.
+
+    The file is memory-mapped and split before each service tag `BCD` followed by a version line,
+    so that it is never loaded as a whole. Each payload is yielded as bytes, since its character set is given by its own encoding entry,
+    see `transaction.epc_qr.from_encoded`. Line breaks between payloads are dropped.
+    """
+    if not os.fstat(file.fileno()).st_size:
+        return
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        line, previous, start = 1, 0, None
+        for match in SERVICE_TAG.finditer(data):
+            if start is not None:
+                yield line, data[start : match.start()].rstrip(b"\r\n")
+            line += data[previous : match.start()].count(b"\n")
+            previous = start = match.start()
+        if start is not None:
+            yield line, data[start:].rstrip(b"\r\n")
+
+
+def read_epc_qrs(file_name: str) -> Iterator[payload_result]:
+    """
+    Yield a namedtuple of kind `payload_result` per EPC-compliant string in the file `file_name`, see `read_payloads`.
+
+    The payloads are parsed and validated lazily; the `epc` of an invalid one is `None`
+    and its `error` holds the exception raised.
+    """
+    return read_records(file_name, "epc")
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "epc": read_payloads}
+
+# formats whose files are read in binary mode
+BINARY = {"epc"}
+
+ALIASES = {"json": "jsonl", "txt": "epc"}
+
+
+def read_records(
+    file_name: str, fmt: str = "", name_field: str = ""
+) -> Iterator[payload_result]:
+    """
+    Yield a namedtuple of kind `payload_result` per record of `file_name` in input format `fmt`,
+    inferred from the extension if empty, see `to_epc`. The entry `name_field` of the records,
+    such as the file names of `generate`, is left out.
+
+    The records are parsed and validated lazily; the `epc` of an invalid one is `None`
+    and its `error` holds the exception raised.
+    """
+    fmt = resolve_format(file_name, fmt)
+    with _open(file_name, fmt) as file:
+        for line, record in READERS[fmt](file):
+            try:
+                if name_field and not isinstance(record, bytes):
+                    if isinstance(record, str):
+                        record = json.loads(record)
+                    record.pop(name_field, None)
+                yield payload_result(line, to_epc(record), None)
+            except Exception as e:
+                yield payload_result(line, None, e)
+
+
+def _open(file_name: str, fmt: str):
+    """
+    Open `file_name` for the reader of input format `fmt`.
+    """
+    if fmt in BINARY:
+        return open(file_name, "rb")
+    return open(file_name, "r", encoding="utf-8", newline="")
+
+
+def resolve_format(file_name: str, fmt: str = "") -> str:
+    """
+    Return the input format, inferred from the extension of `file_name` if `fmt` is empty.
+    """
+    fmt = fmt or os.path.splitext(file_name)[1].lstrip(".").lower()
+    fmt = ALIASES.get(fmt, fmt)
+    if fmt not in READERS:
+        raise ValueError(f"unknown input format `{fmt}` (choose from {list(READERS)})")
+    return fmt
+
+
+def to_epc(record) -> epc_qr:
+    """
+    Return the epc qr code of a record as yielded by the readers of `READERS`.
+
+    The `record` is either a dictionary of consumer entries, see `transaction.consumer_epc_qr.from_dict`, or its json text,
+    and all of its violations are reported at once, see `validation.validate_record`.
+    Alternatively, the `record` is an encoded EPC-compliant string, see `read_payloads`.
+    """
+    if isinstance(record, bytes):
+        return epc_qr.from_encoded(record)
+    if isinstance(record, str):
+        record = json.loads(record)
+    raise_violations(validate_record(record))
+    return consumer_epc_qr.from_dict(record)
+
+
+def named_epc(line: int, record, name_field: str = "") -> tuple:
+    """
+    Return `(name, epc)` of a record read at `line`, see `to_epc`.
+
+    The name is taken from the entry `name_field` of the record, which is left out of the epc qr code,
+    or from `line` if `name_field` is empty; encoded EPC-compliant strings are always named by `line`.
+    """
+    name = f"{line:06d}"
+    if name_field:
+        if isinstance(record, str):
+            record = json.loads(record)
+        if not (name := os.path.basename(str(record.get(name_field, "")))):
+            raise ValueError(f"missing value for name field `{name_field}`")
+        record = {key: value for key, value in record.items() if key != name_field}
+    return name, to_epc(record)
+
+
+def _set_written(written: dict) -> None:
+    """
+    Hand the qr codes written by a previous run, see `output.Manifest.written`, to `render_row`.
+    """
+    global _written
+    _written = written
+
+
+def render_row(row: tuple) -> tuple:
+    """
+    Return `(name, data, digest)` of the consumer epc qr code given by a
+    `(line, record, name_field, fmt, qr_version, max_qr_version)` tuple, see `named_epc`,
+    where `digest` covers its EPC-compliant string and the render settings, see `transaction.epc_qr.render_key`.
+
+    The qr code is rendered in format `fmt` with the given versions, see `transaction.epc_qr`.
+    If a previous run already wrote it under the same name, it is not rendered again,
+    but `name` is the location it was written to and `data` is `None`.
+    """
+    line, record, name_field, fmt, qr_version, max_qr_version = row
+    name, epc = named_epc(line, record, name_field)
+    epc.qr_version, epc.max_qr_version = qr_version, max_qr_version
+    name, digest = f"{name}.{EXTENSIONS[fmt]}", epc.render_key(fmt)
+    location = _written.get((digest, name))
+    if location is not None:
+        return location, None, digest
+    return name, render(epc, fmt), digest
+
+
+def _check_options(out_format: str, qr_version: int, max_qr_version: int) -> None:
+    """
+    Raise if the output format or the qr code versions are invalid.
+    """
+    if out_format not in EXTENSIONS:
+        raise ValueError(
+            f"unknown output format `{out_format}` (choose from {list(EXTENSIONS)})"
+        )
+    validate(check_qr_version(qr_version))
+    validate(check_qr_version(max_qr_version))
+
+
+def generate(
+    file_name: str,
+    writer: DirectoryWriter,
+    fmt: str = "",
+    name_field: str = "",
+    workers: int = 1,
+    chunksize: int = 16,
+    out_format: str = "png",
+    qr_version: int = QR_VERSION,
+    max_qr_version: int = None,
+    start: int = 0,
+) -> Iterator[row_result]:
+    """
+    Create one qr code in format `out_format` per record of `file_name` after line `start` and hand it to `writer`.
+    The qr code versions are chosen according to `qr_version` and `max_qr_version`, see `transaction.epc_qr`.
+
+    Records are read lazily, so memory stays flat regardless of the input size.
+    With more than one of `workers`, the records are validated and rendered by a process pool
+    in chunks of `chunksize`, while `writer` is only ever called from the current process.
+    Yields a namedtuple of kind `row_result` per record in input order, whose `error` is `None` on success.
+    An invalid record does not stop the batch.
+
+    If `writer` took over the manifest of a previous run, see `output.open_writer`, records whose EPC-compliant
+    string is listed there under the same name and render settings are not rendered again but yielded as `skipped`,
+    with the location in the manifest as `name`. The lookup happens in the workers along with the validation.
+    """
+    fmt = resolve_format(file_name, fmt)
+    if name_field and fmt in BINARY:
+        raise ValueError(f"name field is not supported for input format `{fmt}`")
+    _check_options(out_format, qr_version, max_qr_version)
+    lines = {}
+    manifest = getattr(writer, "manifest", None)
+    written = manifest.written() if manifest is not None else {}
+
+    def rows(file):
+        records = dropwhile(lambda item: item[0] <= start, READERS[fmt](file))
+        for index, (line, record) in enumerate(records):
+            lines[index] = line
+            yield line, record, name_field, out_format, qr_version, max_qr_version
+
+    try:
+        with _open(file_name, fmt) as file:
+            results = imap(
+                render_row,
+                rows(file),
+                workers,
+                chunksize,
+                initializer=_set_written,
+                initargs=(written,),
+            )
+            for res in results:
+                line = lines.pop(res.index)
+                if res.error is not None:
+                    yield row_result(line, "", res.error)
+                    continue
+                name, data, digest = res.value
+                if data is None:
+                    metrics.count("codes_skipped")
+                    yield row_result(line, name, None, True)
+                    continue
+                try:
+                    with metrics.timer("write"):
+                        writer.write(name, data, digest)
+                except Exception as e:
+                    yield row_result(line, name, e)
+                else:
+                    metrics.count("bytes_written", len(data))
+                    yield row_result(line, name, None)
+    finally:
+        _set_written({})
+
+
+def stream(
+    file,
+    writer: DirectoryWriter = None,
+    name_field: str = "",
+    out_format: str = "png",
+    qr_version: int = QR_VERSION,
+    max_qr_version: int = None,
+) -> Iterator[stream_result]:
+    """
+    Create the qr code of each json record read from the text stream `file`, e.g. stdin, as soon as its line arrives.
+
+    Unlike `generate`, the records are rendered one by one in the current process and nothing is read ahead,
+    so a long-running process fed through a pipe answers each record right away and pays its setup only once.
+    Yields a namedtuple of kind `stream_result` per record in input order, whose `data` holds the qr code,
+    unless it was handed to `writer`, and whose `error` is `None` on success. See `generate` for the options.
+    """
+    _check_options(out_format, qr_version, max_qr_version)
+    for line, record in read_jsonl(file):
+        try:
+            name, data, digest = render_row(
+                (line, record, name_field, out_format, qr_version, max_qr_version)
+            )
+            if writer is not None:
+                with metrics.timer("write"):
+                    writer.write(name, data, digest)
+                metrics.count("bytes_written", len(data))
+                data = b""
+        except Exception as e:
+            yield stream_result(line, "", b"", e)
+        else:
+            yield stream_result(line, name, data, None)
@@ -0,0 +1,133 @@
+"""Content-addressed cache of rendered epc qr codes."""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Callable
+
+cache_stats = namedtuple(
+    "CacheStats", ["hits", "disk_hits", "misses", "evictions", "items", "size"]
+)
+
+
+def cache_key(payload: str, **options) -> str:
+    """
+    Return the sha256 hex digest of the EPC-compliant string `payload` together with the render `options`.
+    """
+    digest = hashlib.sha256(payload.encode("utf-8"))
+    for name, value in sorted(options.items()):
+        digest.update(f"\0{name}={value}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Two-layered cache of rendered qr codes, keyed by `cache_key`.
+
+    The first layer keeps the least recently used entries in memory, bounded by `max_items` and `max_bytes`.
+    If `directory` is given, every entry is also stored as a file below it, so that the cache survives restarts.
+    The cache may be shared between threads.
+    """
+
+    def __init__(
+        self, max_items: int = 1024, max_bytes: int = 64 << 20, directory: str = ""
+    ):
+        """Initialize"""
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._size = 0
+        self._counts = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        """
+        Return the file of `key` in the disk layer, spread over subdirectories by its first two characters.
+        """
+        return os.path.join(self.directory, key[:2], key)
+
+    def _store(self, key: str, data: bytes) -> None:
+        """
+        Add an entry to the memory layer and evict the least recently used ones beyond the limits.
+        Must be called with the lock held.
+        """
+        if len(data) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        self._entries[key] = data
+        self._size += len(data)
+        while len(self._entries) > self.max_items or self._size > self.max_bytes:
+            self._size -= len(self._entries.popitem(last=False)[1])
+            self._counts["evictions"] += 1
+
+    def get(self, key: str) -> bytes:
+        """
+        Return the data stored for `key`, or `None` if there is none.
+        """
+        with self._lock:
+            if (data := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+                self._counts["hits"] += 1
+                return data
+        if self.directory:
+            try:
+                with open(self._path(key), "rb") as file:
+                    data = file.read()
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self._counts["disk_hits"] += 1
+                    self._store(key, data)
+                return data
+        with self._lock:
+            self._counts["misses"] += 1
+        return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Store `data` for `key` in both layers.
+        The file of the disk layer is replaced atomically, so concurrent readers never see partial data.
+        """
+        with self._lock:
+            self._store(key, data)
+        if self.directory:
+            os.makedirs(os.path.dirname(path := self._path(key)), exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(path), delete=False
+            ) as file:
+                file.write(data)
+            os.replace(file.name, path)
+
+    def fetch(self, key: str, factory: Callable[[], bytes]) -> bytes:
+        """
+        Return the data stored for `key`, calling `factory` to create and store it on a miss.
+        """
+        if (data := self.get(key)) is None:
+            data = factory()
+            self.put(key, data)
+        return data
+
+    def clear(self) -> None:
+        """
+        Empty the memory layer; the disk layer is kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def stats(self) -> cache_stats:
+        """
+        Return a namedtuple of kind `cache_stats` with the counters since creation and the current memory usage.
+        """
+        with self._lock:
+            return cache_stats(
+                **self._counts, items=len(self._entries), size=self._size
+            )
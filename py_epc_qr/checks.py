@@ -2,22 +2,60 @@
 
 from collections import namedtuple
 
+from py_epc_qr import metrics
+from py_epc_qr.validation import check_field, payload_error, to_error
+
 check = namedtuple("Check", ["valid", "error"])
 
 
+def _check(code: str, value) -> tuple:
+    """
+    Return the namedtuple of kind `check` of error `code`, see `validation.check_field`.
+    """
+    if code is None:
+        return check(True, None)
+    metrics.count("validation_failures", code=code)
+    return check(False, to_error(code, value))
+
+
 def check_version(value: str, bic: str) -> tuple:
     """
     Checks whether the version entry is valid.
     Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, AssertionError)`.
     """
-    if value not in (valid_versions := ["001", "002"]):
-        return check(
-            False,
-            ValueError(f"invalid version `{value}` (choose from {valid_versions}"),
-        )
-    if value == "001" and not bic:
-        return check(False, AssertionError("version 001 requires a BIC"))
-    return check(True, None)
+    return _check(check_field("version", value, {"bic": bic}), value)
+
+
+def check_bic(value: str) -> tuple:
+    """
+    Checks whether the bic entry is valid.
+    Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, ValueError)`.
+    """
+    return _check(check_field("bic", value), value)
+
+
+def check_purpose(value: str) -> tuple:
+    """
+    Checks whether the purpose entry is empty or an ISO 20022 purpose code.
+    Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, ValueError)`.
+    """
+    return _check(check_field("purpose", value), value)
+
+
+def check_originator_information(value: str) -> tuple:
+    """
+    Checks whether the beneficiary to originator information entry is valid.
+    Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, ValueError)`.
+    """
+    return _check(check_field("originator_information", value), value)
+
+
+def check_payload(value: bytes) -> tuple:
+    """
+    Checks whether the encoded EPC-compliant string fits into `MAX_PAYLOAD_BYTES`.
+    Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, ValueError)`.
+    """
+    return _check(payload_error(value), value)
 
 
 def check_amount(value: float) -> tuple:
@@ -25,19 +63,7 @@ def check_amount(value: float) -> tuple:
     Checks whether the amount entry is valid.
     Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, AssertionError)`.
     """
-    try:
-        value = float(value)
-    except Exception as e:
-        return check(
-            False,
-            ValueError(f"amount must be convertible to float; exception raised: {e}"),
-        )
-    if not 0.01 <= value <= 999999999.99:
-        return check(False, ValueError(f"the amount {value} is out of bounds"))
-
-    if value != round(value, 2):
-        return check(False, ValueError("the amount is not a two-digit decimal number"))
-    return check(True, None)
+    return _check(check_field("amount", value), value)
 
 
 def check_encoding(value: str) -> tuple:
@@ -45,9 +71,7 @@ def check_encoding(value: str) -> tuple:
     Checks whether the encoding entry is valid.
     Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, AssertionError)`.
     """
-    if not 1 <= int(value) <= 8:
-        return check(False, ValueError("encoding must be between 1 and 8"))
-    return check(True, None)
+    return _check(check_field("encoding", value), value)
 
 
 def check_beneficiary(value: str) -> tuple:
@@ -55,16 +79,7 @@ def check_beneficiary(value: str) -> tuple:
     Checks whether the beneficiary entry is valid.
     Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, AssertionError)`.
     """
-    if not value.replace(" ", "").isalnum():
-        return check(False, ValueError("beneficiary is not alphanumeric"))
-    if not 1 <= len(value) <= (max_length := 70):
-        return check(
-            False,
-            ValueError(
-                f"beneficiary is mandatory, and must not exceed {max_length} characters"
-            ),
-        )
-    return check(True, None)
+    return _check(check_field("beneficiary", value), value)
 
 
 def check_iban(value: str) -> tuple:
@@ -72,30 +87,37 @@ def check_iban(value: str) -> tuple:
     Checks whether the iban entry is valid.
     Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, AssertionError)`.
     """
-    if not value.isalnum():
-        return check(False, ValueError("iban is not alphanumeric"))
-    country_code = value[0:1]
-    check_digits = value[2:3]
-    bban = value[4:]
-    if not country_code.isalpha():
-        return check(False, ValueError("invalid iban country code"))
-    if not check_digits.isnumeric():
-        return check(False, ValueError("invalid check digits"))
-    if len(bban) > 30:
-        return check(False, ValueError("bban is too long"))
-    return check(True, None)
+    return _check(check_field("iban", value), value)
 
 
-def check_remittance_unstructured(value: str) -> tuple:
+def check_remittance_structured(value: str) -> tuple:
     """
-    Checks whether the unstructured remittance entry is valid.
+    Checks whether the structured remittance entry, e.g. an RF creditor reference, is valid.
     Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, AssertionError)`.
     """
-    if not value.replace(" ", "").isalnum():
-        return check(False, ValueError("unstructered remittance is non alphanumeric"))
-    if len(value) > 140:
+    return _check(check_field("remittance_structured", value), value)
+
+
+def check_remittance_unstructured(value: str, structured: str = "") -> tuple:
+    """
+    Checks whether the unstructured remittance entry is valid, which must be empty if the structured one is given.
+    Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, AssertionError)`.
+    """
+    record = {"remittance_structured": structured}
+    return _check(check_field("remittance_unstructured", value, record), value)
+
+
+def check_qr_version(value) -> tuple:
+    """
+    Checks whether the qr code version is valid, where `None` selects the smallest version that fits.
+    Returns a namedtuple of kind `check`, which is either `(True, None)` or `(False, AssertionError)`.
+    """
+    if value is not None and not (
+        isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= 40
+    ):
         return check(
-            False, ValueError("unstructured remittance exceeds 140 characters")
+            False,
+            ValueError(f"invalid qr code version `{value}` (choose from 1 to 40)"),
         )
     return check(True, None)
 
@@ -1,20 +1,115 @@
-"""Implements the command line interface (CLI)."""
+"""
+Implements the command line interface (CLI).
+
+Modules that pull in heavy dependencies such as numpy are imported within the commands that need them,
+so that e.g. `epcqr version` starts quickly.
+"""
+
+import os
+from datetime import timedelta
 
 import typer
 
-from py_epc_qr import __version__
+from py_epc_qr import __version__, metrics
 from py_epc_qr.checks import (
     check_amount,
     check_beneficiary,
+    check_bic,
     check_iban,
+    check_originator_information,
+    check_purpose,
+    check_qr_version,
+    check_remittance_structured,
     check_remittance_unstructured,
+    validate,
     validate_prompt,
 )
-from py_epc_qr.transaction import consumer_epc_qr
+from py_epc_qr.constants import OUTPUT_FORMATS
 
 app = typer.Typer()
 
 
+def echo_metrics() -> None:
+    """
+    Print the timers and counters collected by the default metrics registry.
+    """
+    snapshot = metrics.registry.snapshot()
+    for (name, labels), stats in snapshot["timers"].items():
+        label = "".join(f" {key}={item}" for key, item in labels)
+        typer.echo(
+            f"{name}{label}: {stats.count} calls, {stats.total:.3f} s total, {stats.max * 1e3:.1f} ms max"
+        )
+    for (name, labels), value in snapshot["counters"].items():
+        label = "".join(f" {key}={item}" for key, item in labels)
+        typer.echo(f"{name}{label}: {value}")
+
+
+def echo_progress(progress) -> None:
+    """
+    Print the progress of a job to stderr, see `job.job_progress`.
+    """
+    eta = "unknown" if progress.eta is None else timedelta(seconds=round(progress.eta))
+    typer.echo(
+        f"line {progress.line} of {progress.lines}, {progress.done} rows done, "
+        f"{progress.failed} failed, {progress.rate:.0f} rows/s, eta {eta}",
+        err=True,
+    )
+
+
+def parse_qr_versions(qr_version: str, max_qr_version: int) -> tuple:
+    """
+    Return the qr code version options as `(qr_version, max_qr_version)` of `transaction.epc_qr`.
+    """
+    versions = (
+        (
+            None
+            if qr_version == "auto"
+            else int(qr_version) if qr_version.isdigit() else qr_version
+        ),
+        max_qr_version or None,
+    )
+    for value in versions:
+        validate(check_qr_version(value))
+    return versions
+
+
+def create_from_stdin(out_dir: str, name_field: str, fmt: str, versions: tuple) -> bool:
+    """
+    Create a qr code per json record on stdin and print a json line per record as soon as it is done,
+    with its `name` and either its `path` below `out_dir` or its base64-encoded `data`, or its `error`.
+    Returns whether all records succeeded.
+    """
+    import base64
+    import json
+
+    from py_epc_qr.batch import stream
+    from py_epc_qr.output import DirectoryWriter
+
+    writer = DirectoryWriter(out_dir) if out_dir else None
+    succeeded = True
+    for res in stream(
+        typer.get_text_stream("stdin"), writer, name_field, fmt, *versions
+    ):
+        if res.error is not None:
+            succeeded = False
+            output = {"line": res.line, "error": str(res.error)}
+        elif writer is not None:
+            output = {
+                "line": res.line,
+                "name": res.name,
+                "path": os.path.join(out_dir, res.name),
+            }
+        else:
+            output = {
+                "line": res.line,
+                "name": res.name,
+                "data": base64.b64encode(res.data).decode("ascii"),
+            }
+        # echo flushes, so that each line is passed on right away
+        typer.echo(json.dumps(output))
+    return succeeded
+
+
 @app.command()
 def create(
     out: str = typer.Option(
@@ -25,10 +120,91 @@ def create(
         default="",
         help="specify yaml file from which to create qr",
     ),
+    fmt: str = typer.Option(
+        "png",
+        "--format",
+        help=f"format of generated qr file, one of {', '.join(OUTPUT_FORMATS)}",
+    ),
+    qr_version: str = typer.Option(
+        default="6",
+        help="qr code version from 1 to 40, or auto for the smallest that fits",
+    ),
+    max_qr_version: int = typer.Option(
+        default=0,
+        help="largest qr code version, 13 according to the EPC guidelines (0 for no limit)",
+    ),
+    stdin: bool = typer.Option(
+        False,
+        "--stdin",
+        help="read one json record per line from stdin and print one json line per qr code",
+    ),
+    out_dir: str = typer.Option(
+        default="",
+        help="with --stdin, directory to write the qr codes to (default: print them base64-encoded)",
+    ),
+    name_field: str = typer.Option(
+        default="",
+        help="with --stdin, field used as file name (default: line number)",
+    ),
+    reference: str = typer.Option(
+        default="",
+        help="structured creditor reference, e.g. RF18539007547034, asked for instead of a reason for payment",
+    ),
+    bic: str = typer.Option(
+        default="",
+        help="BIC of the beneficiary's bank",
+    ),
+    purpose: str = typer.Option(
+        default="",
+        help="ISO 20022 purpose code of the transfer, e.g. CHAR for charity",
+    ),
+    originator_information: str = typer.Option(
+        default="",
+        help="information shown to the originator of the transfer, up to 70 characters",
+    ),
 ):
     """
     Create EPC-compliant QR code for IBAN-based wire transfer within European economic area.
     """
+    from py_epc_qr.transaction import consumer_epc_qr
+
+    if fmt not in OUTPUT_FORMATS:
+        typer.echo(f"The format {fmt} is not supported.")
+        raise typer.Exit(code=1)
+    try:
+        versions = parse_qr_versions(qr_version, max_qr_version)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    entries = {
+        "--reference": reference,
+        "--bic": bic,
+        "--purpose": purpose,
+        "--originator-information": originator_information,
+    }
+    if (stdin or from_yaml) and (
+        given := [name for name, value in entries.items() if value]
+    ):
+        source = "--stdin" if stdin else "--from-yaml"
+        raise typer.BadParameter(
+            f"{', '.join(given)} cannot be combined with {source}, give the entries in the records or the template instead"
+        )
+
+    if stdin:
+        if not create_from_stdin(out_dir, name_field, fmt, versions):
+            raise typer.Exit(code=1)
+        return
+
+    options = {
+        "BIC": check_bic(bic),
+        "purpose code": check_purpose(purpose),
+        "originator information": check_originator_information(originator_information),
+    }
+    for name, res in options.items():
+        if not validate_prompt(res):
+            typer.echo(f"The {name} appears incorrect.")
+            raise typer.Exit(code=1)
 
     if from_yaml:
         typer.echo("creating qr code from yaml...")
@@ -46,14 +222,396 @@ def create(
         if not validate_prompt(check_amount(amount)):
             typer.echo("The amount appears incorrect (must be float).")
             raise typer.Exit(code=1)
-        remittance = typer.prompt("Enter reason for payment", type=str)
-        if not validate_prompt(check_remittance_unstructured(remittance)):
-            typer.echo("The value for the remittance appears incorrect.")
-            raise typer.Exit(code=1)
-        epc = consumer_epc_qr(beneficiary, iban, amount, remittance)
+        if reference:
+            if not validate_prompt(check_remittance_structured(reference)):
+                typer.echo("The creditor reference appears incorrect.")
+                raise typer.Exit(code=1)
+            remittance = ""
+        else:
+            remittance = typer.prompt("Enter reason for payment", type=str)
+            if not validate_prompt(check_remittance_unstructured(remittance)):
+                typer.echo("The value for the remittance appears incorrect.")
+                raise typer.Exit(code=1)
+        epc = consumer_epc_qr(
+            beneficiary,
+            iban,
+            amount,
+            remittance,
+            reference=reference,
+            bic=bic,
+            purpose=purpose,
+            originator_information=originator_information,
+        )
+
+    epc.qr_version, epc.max_qr_version = versions
+    try:
+        typer.echo(f"creating qr code of version {epc.fit_qr_version()}...")
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+    with open(out, "wb") as file:
+        epc.to_buffer(file, fmt)
+    typer.echo(f"🎉🎉🎉 You may view your {fmt} {out} 🎉🎉🎉")
+
+
+@app.command()
+def batch(
+    source: str = typer.Argument(
+        ...,
+        help="csv or jsonl file with one transfer per row",
+    ),
+    out: str = typer.Option(
+        default="qr",
+        help="output directory, or zip archive if the name ends in .zip",
+    ),
+    input_format: str = typer.Option(
+        default="",
+        help="format of source, either csv or jsonl (default: inferred from extension)",
+    ),
+    name_field: str = typer.Option(
+        default="",
+        help="column used as file name (default: line number in source)",
+    ),
+    workers: int = typer.Option(
+        default=1,
+        help="number of processes rendering in parallel (0 uses all cores)",
+    ),
+    chunksize: int = typer.Option(
+        default=16,
+        help="number of rows sent to a process at once",
+    ),
+    fmt: str = typer.Option(
+        "png",
+        "--format",
+        help=f"format of generated qr files, one of {', '.join(OUTPUT_FORMATS)}",
+    ),
+    qr_version: str = typer.Option(
+        default="6",
+        help="qr code version from 1 to 40, or auto for the smallest that fits",
+    ),
+    max_qr_version: int = typer.Option(
+        default=0,
+        help="largest qr code version, 13 according to the EPC guidelines (0 for no limit)",
+    ),
+    show_metrics: bool = typer.Option(
+        False,
+        "--metrics",
+        help="print time per stage and counters (stages run by other workers are not included)",
+    ),
+    shard: bool = typer.Option(
+        False,
+        "--shard",
+        help="spread the files over nested directories named by the hash of their names",
+    ),
+    manifest: bool = typer.Option(
+        False,
+        "--manifest",
+        help="record the location of the QR code of each EPC-compliant string in a manifest",
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="skip the QR codes recorded in the manifest of a previous run with the same options",
+    ),
+):
+    """
+    Create one EPC-compliant QR code per row of a csv or jsonl file.
+    """
+    from py_epc_qr.batch import generate, resolve_format
+    from py_epc_qr.output import open_writer
 
-    epc.to_qr(out)
-    typer.echo(f"🎉🎉🎉 You may view your png {out} 🎉🎉🎉")
+    try:
+        resolve_format(source, input_format)
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"The format {fmt} is not supported.")
+        versions = parse_qr_versions(qr_version, max_qr_version)
+        writer = open_writer(out, shard, manifest, resume)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    if show_metrics:
+        metrics.enable()
+    created = skipped = failed = 0
+    with writer:
+        for res in generate(
+            source,
+            writer,
+            input_format,
+            name_field,
+            workers,
+            chunksize,
+            fmt,
+            *versions,
+        ):
+            if res.skipped:
+                skipped += 1
+            elif res.error is None:
+                created += 1
+            else:
+                failed += 1
+                typer.echo(f"line {res.line}: {res.error}")
+    if resume:
+        typer.echo(f"skipped {skipped} existing qr codes")
+    typer.echo(f"created {created} qr codes in {out}, {failed} rows failed")
+    if show_metrics:
+        echo_metrics()
+        metrics.disable()
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def job(
+    source: str = typer.Argument(
+        ...,
+        help="csv or jsonl file with one transfer per row, or file of EPC-compliant strings",
+    ),
+    out: str = typer.Option(
+        default="qr",
+        help="output directory, or tar archive if the name ends in .tar",
+    ),
+    state: str = typer.Option(
+        default="",
+        help="SQLite database of the checkpoints (default: OUT.job.sqlite)",
+    ),
+    input_format: str = typer.Option(
+        default="",
+        help="format of source, either csv, jsonl or epc (default: inferred from extension)",
+    ),
+    name_field: str = typer.Option(
+        default="",
+        help="column used as file name (default: line number in source)",
+    ),
+    workers: int = typer.Option(
+        default=1,
+        help="number of processes rendering in parallel (0 uses all cores)",
+    ),
+    chunksize: int = typer.Option(
+        default=16,
+        help="number of rows sent to a process at once",
+    ),
+    fmt: str = typer.Option(
+        "png",
+        "--format",
+        help=f"format of generated qr files, one of {', '.join(OUTPUT_FORMATS)}",
+    ),
+    qr_version: str = typer.Option(
+        default="6",
+        help="qr code version from 1 to 40, or auto for the smallest that fits",
+    ),
+    max_qr_version: int = typer.Option(
+        default=0,
+        help="largest qr code version, 13 according to the EPC guidelines (0 for no limit)",
+    ),
+    shard: bool = typer.Option(
+        False,
+        "--shard",
+        help="spread the files over nested directories named by the hash of their names",
+    ),
+    interval: float = typer.Option(
+        default=5,
+        help="seconds between checkpoints and progress reports",
+    ),
+):
+    """
+    Create the QR codes of a large file in a job that checkpoints its progress and resumes where it stopped.
+    """
+    from py_epc_qr.job import run
+
+    try:
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"The format {fmt} is not supported.")
+        versions = parse_qr_versions(qr_version, max_qr_version)
+        results = run(
+            source,
+            out,
+            state,
+            input_format,
+            name_field,
+            workers,
+            chunksize,
+            fmt,
+            *versions,
+            shard=shard,
+            progress=echo_progress,
+            interval=interval,
+        )
+        created = skipped = failed = 0
+        for res in results:
+            if res.error is not None:
+                failed += 1
+                typer.echo(f"line {res.line}: {res.error}")
+            elif res.skipped:
+                skipped += 1
+            else:
+                created += 1
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"created {created} qr codes in {out}, skipped {skipped}, {failed} rows failed"
+    )
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def sheet(
+    source: str = typer.Argument(
+        ...,
+        help="csv or jsonl file with one transfer per row, or file of EPC-compliant strings",
+    ),
+    out: str = typer.Option(
+        default="qr.pdf",
+        help="multi-page print sheet, pdf or tiff according to its extension",
+    ),
+    input_format: str = typer.Option(
+        default="",
+        help="format of source, either csv, jsonl or epc (default: inferred from extension)",
+    ),
+    name_field: str = typer.Option(
+        default="",
+        help="column left out of the transfers, such as the file names of batch",
+    ),
+    page_size: str = typer.Option(
+        default="a4",
+        help="size of the pages, one of a4, a5 or letter",
+    ),
+    columns: int = typer.Option(default=3, help="number of qr codes per row"),
+    rows: int = typer.Option(default=7, help="number of rows per page"),
+    margin: float = typer.Option(default=10, help="margin of the pages in mm"),
+    dpi: int = typer.Option(default=300, help="resolution of the pages"),
+    caption: bool = typer.Option(
+        True,
+        "--caption/--no-caption",
+        help="print beneficiary and amount below each qr code",
+    ),
+    workers: int = typer.Option(
+        default=1,
+        help="number of processes composing pages in parallel (0 uses all cores)",
+    ),
+    qr_version: str = typer.Option(
+        default="6",
+        help="qr code version from 1 to 40, or auto for the smallest that fits",
+    ),
+    max_qr_version: int = typer.Option(
+        default=0,
+        help="largest qr code version, 13 according to the EPC guidelines (0 for no limit)",
+    ),
+):
+    """
+    Print the EPC-compliant QR codes of all rows of a file onto the pages of a pdf or tiff sheet.
+    """
+    from py_epc_qr.batch import read_records, resolve_format
+    from py_epc_qr import sheet as sheets
+
+    try:
+        resolve_format(source, input_format)
+        sheets.resolve_format(out)
+        versions = parse_qr_versions(qr_version, max_qr_version)
+        layout = sheets.page_layout(page_size, columns, rows, margin, dpi)
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+
+    created = failed = 0
+
+    def epcs():
+        nonlocal created, failed
+        for res in read_records(source, input_format, name_field):
+            error = res.error
+            if error is None:
+                res.epc.qr_version, res.epc.max_qr_version = versions
+                try:
+                    res.epc.fit_qr_version()
+                except ValueError as e:
+                    error = e
+            if error is None:
+                created += 1
+                yield res.epc
+            else:
+                failed += 1
+                typer.echo(f"line {res.line}: {error}")
+
+    try:
+        pages = sheets.compose(
+            epcs(),
+            out,
+            layout=layout,
+            caption=sheets.caption_lines if caption else None,
+            workers=workers,
+        )
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
+    typer.echo(
+        f"created {pages} pages with {created} qr codes in {out}, {failed} rows failed"
+    )
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def verify(
+    directory: str = typer.Argument(
+        ...,
+        help="directory with png, pbm or bin qr code files",
+    ),
+    workers: int = typer.Option(
+        default=1,
+        help="number of processes verifying in parallel (0 uses all cores)",
+    ),
+    chunksize: int = typer.Option(
+        default=16,
+        help="number of files sent to a process at once",
+    ),
+):
+    """
+    Decode every QR code in a directory and check that it is a valid EPC-compliant QR code.
+    """
+    from py_epc_qr.verify import verify_directory
+
+    res = verify_directory(directory, workers=workers, chunksize=chunksize)
+    for failure in res.failures:
+        reason = failure.error or f"mismatching {', '.join(failure.mismatches)}"
+        typer.echo(f"{failure.name}: {reason}")
+    typer.echo(f"verified {res.total} qr codes, {res.failed} failed")
+    if res.failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def reference(
+    values: list[str] = typer.Argument(
+        ...,
+        help="invoice numbers of up to 21 digits or upper case letters, or references to check",
+    ),
+    check: bool = typer.Option(
+        False,
+        "--check",
+        help="check the given RF creditor references instead of creating them",
+    ),
+):
+    """
+    Create the ISO 11649 RF creditor references of invoice numbers, or check references.
+    """
+    from py_epc_qr.reference import creditor_references, validate_references
+    from py_epc_qr.validation import to_error
+
+    if check:
+        errors = validate_references(values)
+        for index, code in errors:
+            typer.echo(f"{values[index]}: {to_error(code, values[index])}")
+        if errors:
+            raise typer.Exit(code=1)
+        typer.echo(f"{len(values)} references are valid")
+        return
+    try:
+        typer.echo("\n".join(creditor_references(values)))
+    except ValueError as e:
+        typer.echo(str(e))
+        raise typer.Exit(code=1)
 
 
 @app.command()
@@ -0,0 +1,194 @@
+"""
+Vectorized validation and EPC-compliant strings of consumer transfers given as columns,
+e.g. of a pandas DataFrame or an Arrow table.
+
+The columns are checked with the rules of `validation`, but with numpy string and numeric operations
+on whole arrays instead of one `transaction.consumer_epc_qr` per row.
+Neither pandas nor pyarrow is imported; `from_frame` and `from_arrow` only call methods of the given table.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from py_epc_qr.amount import float_cents, parse_amounts
+from py_epc_qr.constants import ALLOWED_KEYS, IBAN_FORMATS
+from py_epc_qr.iban import mod97_many
+from py_epc_qr.validation import exceeds_payload
+
+columnar_result = namedtuple("ColumnarResult", ["payloads", "invalid"])
+
+# character classes of the ascii characters as bit flags: 1 for digits, 2 for upper and 4 for lower case letters
+CLASSES = np.zeros(128, dtype=np.uint8)
+CLASSES[48:58], CLASSES[65:91], CLASSES[97:123] = 1, 2, 4
+
+# flags of the characters allowed by the kinds of the bban formats, see `IBAN_FORMATS` and `iban.CHARACTERS`
+KINDS = {"n": 1, "a": 2, "c": 3}
+
+
+def to_cents(values) -> tuple:
+    """
+    Return `(cents, invalid)` of the amount `values`, where the cents of invalid amounts are 0.
+
+    Numeric arrays are checked at once like floats, see `amount.float_cents`,
+    and others, such as strings or `Decimal` objects, exactly value by value, see `amount.parse_amounts`.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        cents, out_of_bounds, imprecise = float_cents(values.astype(float))
+        return cents, out_of_bounds | imprecise
+    numbers = parse_amounts(values.tolist())[0]
+    invalid = np.array([number is None for number in numbers], dtype=bool)
+    return np.array([number or 0 for number in numbers], dtype=np.int64), invalid
+
+
+def invalid_texts(values: np.ndarray, min_length: int, max_length: int) -> np.ndarray:
+    """
+    Return the mask of `values` that are not alphanumeric apart from spaces,
+    or whose length is outside `min_length` and `max_length`.
+    """
+    if not values.size:
+        return np.zeros(0, dtype=bool)
+    lengths = np.char.str_len(values)
+    return (
+        ~np.char.isalnum(np.char.replace(values, " ", ""))
+        | (lengths < min_length)
+        | (lengths > max_length)
+    )
+
+
+@lru_cache(maxsize=None)
+def _layout(country: str) -> np.ndarray:
+    """
+    Return the flags of the characters allowed at each position of the ibans of `country`.
+    """
+    kinds = "aann" + "".join(
+        kind * int(count)
+        for count, kind in re.findall(r"(\d+)!([nac])", IBAN_FORMATS[country])
+    )
+    return np.array([KINDS[kind] for kind in kinds], dtype=np.uint8)
+
+
+def invalid_ibans(values: np.ndarray) -> np.ndarray:
+    """
+    Return the mask of invalid ibans, see `iban.iban_error`.
+
+    Each distinct iban is only checked once. The characters are compared with the format of their country
+    as array of code points, and the checksums of the well-formed ones are computed by `iban.mod97_many`.
+    """
+    distinct, inverse = np.unique(values, return_inverse=True)
+    codes = np.zeros((len(distinct), 34), dtype=np.uint32)
+    width = distinct.itemsize // 4
+    codes[:, : min(width, 34)] = distinct.view(np.uint32).reshape(-1, width)[:, :34]
+    classes = np.where(codes < 128, CLASSES[np.minimum(codes, 127)], 0)
+    lengths, countries = np.char.str_len(distinct), distinct.astype("U2")
+
+    invalid = np.ones(len(distinct), dtype=bool)
+    for country in np.unique(countries).tolist():
+        if country not in IBAN_FORMATS:
+            continue
+        layout = _layout(country)
+        rows = np.nonzero((countries == country) & (lengths == len(layout)))[0]
+        allowed = classes[rows, : len(layout)] & layout
+        invalid[rows] = ~allowed.all(axis=1)
+    if len(well_formed := np.nonzero(~invalid)[0]):
+        invalid[well_formed] = mod97_many(distinct[well_formed].tolist()) != 1
+    return invalid[inverse.ravel()]
+
+
+def validate_columns(beneficiary, iban, amount, remittance) -> dict:
+    """
+    Return the mask of invalid rows of each column, keyed by the entries of `ALLOWED_KEYS`.
+
+    The text columns are arrays of strings, and `amount` is converted by `to_cents`.
+    """
+    masks = {
+        "beneficiary": invalid_texts(np.asarray(beneficiary, dtype=str), 1, 70),
+        "iban": invalid_ibans(np.asarray(iban, dtype=str)),
+        "amount": to_cents(amount)[1],
+        "remittance": invalid_texts(np.asarray(remittance, dtype=str), 1, 140),
+    }
+    return {key: masks[key] for key in ALLOWED_KEYS}
+
+
+def format_amounts(cents: np.ndarray) -> np.ndarray:
+    """
+    Return the amounts in `cents` as amount entries like `EUR12.30`.
+    """
+    euros, cents = np.divmod(cents, 100)
+    return np.char.add(
+        np.char.add("EUR", euros.astype(str)),
+        np.char.add(np.where(cents < 10, ".0", "."), cents.astype(str)),
+    )
+
+
+def build_payloads(beneficiary, iban, cents, remittance) -> np.ndarray:
+    """
+    Return the EPC-compliant strings of consumer epc qr codes as built by `transaction.consumer_epc_qr`,
+    with the amounts given in `cents`, without validating the columns.
+    """
+    res = np.char.add("BCD\n002\n1\nSCT\n\n", np.asarray(beneficiary, dtype=str))
+    res = np.char.add(np.char.add(res, "\n"), np.asarray(iban, dtype=str))
+    res = np.char.add(np.char.add(res, "\n"), format_amounts(np.asarray(cents)))
+    res = np.char.add(np.char.add(res, "\n\n\n"), np.asarray(remittance, dtype=str))
+    return np.char.add(res, "\n")
+
+
+def oversized_payloads(payloads: np.ndarray) -> np.ndarray:
+    """
+    Return the mask of `payloads` whose utf-8 encoding exceeds the budget of `validation.exceeds_payload`.
+    Only those that could exceed it with up to 4 bytes per character are encoded.
+    """
+    oversized = np.zeros(payloads.shape, dtype=bool)
+    if len(rows := np.nonzero(exceeds_payload(np.char.str_len(payloads) * 4))[0]):
+        encoded = np.char.encode(payloads[rows], "utf-8")
+        oversized[rows] = exceeds_payload(np.char.str_len(encoded))
+    return oversized
+
+
+def consumer_payloads(beneficiary, iban, amount, remittance) -> columnar_result:
+    """
+    Validate the columns of consumer transfers and return a namedtuple of kind `columnar_result`
+    with the EPC-compliant strings, which are empty for invalid rows, and the mask of invalid rows.
+    """
+    cents, invalid = to_cents(amount)
+    beneficiary, iban, remittance = (
+        np.asarray(column, dtype=str) for column in (beneficiary, iban, remittance)
+    )
+    invalid |= invalid_texts(beneficiary, 1, 70) | invalid_texts(remittance, 1, 140)
+    invalid |= invalid_ibans(iban)
+    payloads = build_payloads(
+        beneficiary, iban, np.where(invalid, 0, cents), remittance
+    )
+    invalid |= oversized_payloads(payloads)
+    return columnar_result(np.where(invalid, "", payloads), invalid)
+
+
+def from_frame(frame) -> columnar_result:
+    """
+    Return `consumer_payloads` of the columns `ALLOWED_KEYS` of the pandas DataFrame `frame`.
+    Missing values are invalid.
+    """
+    columns = [
+        frame[key].to_numpy() if key == "amount" else frame[key].fillna("").to_numpy()
+        for key in ALLOWED_KEYS
+    ]
+    return consumer_payloads(*columns)
+
+
+def from_arrow(table) -> columnar_result:
+    """
+    Return `consumer_payloads` of the columns `ALLOWED_KEYS` of the pyarrow Table `table`.
+    Missing values are invalid.
+    """
+    columns = [
+        (
+            table.column(key).to_numpy()
+            if key == "amount"
+            else table.column(key).fill_null("").to_numpy()
+        )
+        for key in ALLOWED_KEYS
+    ]
+    return consumer_payloads(*columns)
@@ -2,6 +2,9 @@
 
 ALLOWED_KEYS = ["beneficiary", "iban", "amount", "remittance"]
 
+# keys that consumer records may have in addition to, or in the case of `reference` instead of, `remittance`
+OPTIONAL_KEYS = ["reference", "bic", "purpose", "originator_information", "version"]
+
 ROW_MAPPING = {
     1: "bcd",
     2: "version",
@@ -27,3 +30,121 @@ ENCODINGS = {
     7: "ISO-8859-10",
     8: "ISO-8859-15",
 }
+
+QR_VERSION = 6
+
+# largest EPC-compliant string in bytes, once encoded in the character set of its encoding entry
+MAX_PAYLOAD_BYTES = 331
+
+# business identifier code (BIC) of 8 or 11 characters: bank, country, location and optional branch code
+BIC_PATTERN = r"[A-Z]{4}[A-Z]{2}[A-Z0-9]{2}(?:[A-Z0-9]{3})?"
+
+# purpose codes of the ISO 20022 external code set `ExternalPurpose1Code`
+PURPOSE_CODES = frozenset("""
+    ACCT ADCS ADMG ADVA AEMP AGRT AIRB ALLW ALMY ANNI ANTS AREN BBSC BECH BENE BEXP BOCE BONU BUSB CASH CBFF
+    CBTV CCHD CCRD CDBL CFEE CGDD CHAR CLPR CMDT COLL COMC COMM COMT CORT COST CPYR CSDB CSLP CVCF DBTC DCRD
+    DEPT DERI DIVD DMEQ DNTS ELEC ENRG ESTX FERB FREX GASB GDDS GDSV GOVI GOVT GSCB GVEA GVEB GVEC GVED HEDG
+    HLRP HLTC HLTI HREC HSPC HSTX ICCP ICRF IDCP IHRP INPC INSM INSU INTC INTE INTX LBRI LICF LIFI LIMA LOAN
+    LOAR LTCF MDCS MSVC NETT NITX NOWS NWCH NWCM OFEE OTHR OTLC PADD PAYR PENO PENS PHON POPE PPTI PRCP PRME
+    PTSP RCKE RCPT REBT REFU RENT RINP RLWY ROYA SALA SAVG SCVE SECU SSBE STDY SUBS SUPP TAXR TAXS TBIL TCSC
+    TELI TRAD TREA TRFD VATX VIEW WEBI WHLD WTER
+    """.split())
+
+MAX_QR_VERSION = 13
+
+# output formats of `render.FORMATS`, listed here so that the cli does not import the renderers to show its help
+OUTPUT_FORMATS = ("png", "svg", "pbm", "matrix")
+
+# structure of the basic bank account number (bban) per country according to the SWIFT IBAN registry,
+# where `n` stands for digits, `a` for upper case letters and `c` for alphanumeric characters
+IBAN_FORMATS = {
+    "AD": "4!n4!n12!c",
+    "AE": "3!n16!n",
+    "AL": "8!n16!c",
+    "AT": "5!n11!n",
+    "AZ": "4!a20!c",
+    "BA": "3!n3!n8!n2!n",
+    "BE": "3!n7!n2!n",
+    "BG": "4!a4!n2!n8!c",
+    "BH": "4!a14!c",
+    "BI": "5!n5!n11!n2!n",
+    "BR": "8!n5!n10!n1!a1!c",
+    "BY": "4!c4!n16!c",
+    "CH": "5!n12!c",
+    "CR": "4!n14!n",
+    "CY": "3!n5!n16!c",
+    "CZ": "4!n16!n",
+    "DE": "8!n10!n",
+    "DJ": "5!n5!n11!n2!n",
+    "DK": "4!n9!n1!n",
+    "DO": "4!c20!n",
+    "EE": "2!n14!n",
+    "EG": "4!n4!n17!n",
+    "ES": "4!n4!n1!n1!n10!n",
+    "FI": "3!n11!n",
+    "FK": "2!a12!n",
+    "FO": "4!n9!n1!n",
+    "FR": "5!n5!n11!c2!n",
+    "GB": "4!a6!n8!n",
+    "GE": "2!a16!n",
+    "GI": "4!a15!c",
+    "GL": "4!n9!n1!n",
+    "GR": "3!n4!n16!c",
+    "GT": "4!c20!c",
+    "HN": "4!a20!n",
+    "HR": "7!n10!n",
+    "HU": "3!n4!n1!n15!n1!n",
+    "IE": "4!a6!n8!n",
+    "IL": "3!n3!n13!n",
+    "IQ": "4!a3!n12!n",
+    "IS": "4!n2!n6!n10!n",
+    "IT": "1!a5!n5!n12!c",
+    "JO": "4!a4!n18!c",
+    "KW": "4!a22!c",
+    "KZ": "3!n13!c",
+    "LB": "4!n20!c",
+    "LC": "4!a24!c",
+    "LI": "5!n12!c",
+    "LT": "5!n11!n",
+    "LU": "3!n13!c",
+    "LV": "4!a13!c",
+    "LY": "3!n3!n15!n",
+    "MC": "5!n5!n11!c2!n",
+    "MD": "2!c18!c",
+    "ME": "3!n13!n2!n",
+    "MK": "3!n10!c2!n",
+    "MN": "4!n12!n",
+    "MR": "5!n5!n11!n2!n",
+    "MT": "4!a5!n18!c",
+    "MU": "4!a2!n2!n12!n3!n3!a",
+    "NI": "4!a20!n",
+    "NL": "4!a10!n",
+    "NO": "4!n6!n1!n",
+    "OM": "3!n16!c",
+    "PK": "4!a16!c",
+    "PL": "8!n16!n",
+    "PS": "4!a21!c",
+    "PT": "4!n4!n11!n2!n",
+    "QA": "4!a21!c",
+    "RO": "4!a16!c",
+    "RS": "3!n13!n2!n",
+    "RU": "9!n5!n15!c",
+    "SA": "2!n18!c",
+    "SC": "4!a2!n2!n16!n3!a",
+    "SD": "2!n12!n",
+    "SE": "3!n16!n1!n",
+    "SI": "5!n8!n2!n",
+    "SK": "4!n6!n10!n",
+    "SM": "1!a5!n5!n12!c",
+    "SO": "4!n3!n12!n",
+    "ST": "4!n4!n11!n2!n",
+    "SV": "4!a20!n",
+    "TL": "3!n14!n2!n",
+    "TN": "2!n3!n13!n2!n",
+    "TR": "5!n1!n16!c",
+    "UA": "6!n19!c",
+    "VA": "3!n15!n",
+    "VG": "4!a16!n",
+    "XK": "4!n10!n2!n",
+    "YE": "4!a4!n18!c",
+}
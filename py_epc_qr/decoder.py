@@ -0,0 +1,159 @@
+"""
+Decoder of the qr codes written by this package, which reads the module matrix back from images.
+
+It targets clean, axis-aligned codes as produced by `render` and `transaction.epc_qr.to_qr`, not camera images,
+and rejects damaged codes instead of correcting them, since a generated code must decode without errors.
+"""
+
+import numpy as np
+
+from py_epc_qr.encoder import (
+    ALPHA_NUM,
+    MODE_8BIT_BYTE,
+    MODE_ALPHA_NUM,
+    MODE_NUMBER,
+    RS_BLOCKS,
+    _format_positions,
+    _mode_sizes,
+    codewords,
+    data_capacity,
+    format_bits,
+    matrix_version,
+    placement,
+)
+
+# format information of all combinations of error correction level and mask pattern
+FORMAT_INFORMATION = {
+    format_bits(error_correction, mask_pattern): (error_correction, mask_pattern)
+    for error_correction in RS_BLOCKS
+    for mask_pattern in range(8)
+}
+
+
+def modules_from_pixels(pixels: np.ndarray) -> np.ndarray:
+    """
+    Return the module matrix of the qr code shown by the boolean `pixels`, where `True` is dark.
+
+    The module size is derived from the width of the top left finder pattern, and each module is sampled at its center.
+    """
+    rows, cols = np.nonzero(pixels.any(axis=1))[0], np.nonzero(pixels.any(axis=0))[0]
+    if not len(rows):
+        raise ValueError("image does not contain a qr code")
+    top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+    finder = np.nonzero(~pixels[top, left:right])[0]
+    box_size = (finder[0] if len(finder) else right - left) / 7
+    size = round((right - left) / box_size)
+    if size < 21 or (size - 17) % 4 or round((bottom - top) / box_size) != size:
+        raise ValueError("image does not contain a qr code")
+    centers = ((np.arange(size) + 0.5) * box_size).astype(int)
+    return pixels[top + centers[:, None], left + centers[None, :]]
+
+
+def modules_from_bytes(data: bytes) -> np.ndarray:
+    """
+    Return the module matrix of the raw 1-bit data written by `render.to_matrix`.
+    """
+    for size in range(21, 178, 4):
+        if size * -(-size // 8) == len(data):
+            packed = np.frombuffer(data, dtype=np.uint8).reshape(size, -1)
+            return np.unpackbits(packed, axis=1, count=size).astype(bool)
+    raise ValueError(f"{len(data)} bytes are no raw qr code matrix")
+
+
+def read_modules(file_name: str) -> np.ndarray:
+    """
+    Return the module matrix of the qr code in the file `file_name`,
+    which is either raw data (`.bin`) or any image that Pillow reads, such as png or pbm.
+    """
+    if file_name.endswith(".bin"):
+        with open(file_name, "rb") as file:
+            return modules_from_bytes(file.read())
+    from PIL import Image
+
+    with Image.open(file_name) as img:
+        return modules_from_pixels(np.asarray(img.convert("L")) < 128)
+
+
+def read_format(modules: np.ndarray) -> tuple:
+    """
+    Return `(error_correction, mask_pattern)` from the format information, which may differ from a valid one
+    in at most three bits.
+    """
+    for positions in _format_positions(len(modules)):
+        bits = modules[tuple(zip(*positions))]
+        value = int(np.dot(bits, 1 << np.arange(15)))
+        distance, info = min(
+            (bin(value ^ info).count("1"), info) for info in FORMAT_INFORMATION
+        )
+        if distance <= 3:
+            return FORMAT_INFORMATION[info]
+    raise ValueError("format information is damaged")
+
+
+def data_codewords(modules: np.ndarray) -> bytes:
+    """
+    Return the data codewords of the qr code `modules` in block order.
+
+    Raises a ValueError if the error correction codewords do not match the data.
+    """
+    version = matrix_version(modules)
+    error_correction, mask_pattern = read_format(modules)
+    _, index, masks = placement(version)
+    bits = modules.ravel()[index] ^ masks[mask_pattern]
+
+    ec_count, *groups = RS_BLOCKS[error_correction][version - 1]
+    sizes = np.repeat(groups[1::2], groups[::2])
+    total = int(sizes.sum()) + ec_count * len(sizes)
+    words = np.packbits(bits[: 8 * total])
+
+    columns = np.arange(max(sizes))
+    valid = columns < sizes[:, None]
+    blocks = np.zeros(valid.shape, dtype=np.uint8)
+    blocks.T[valid.T] = words[: data_capacity(version, error_correction)]
+    data = blocks[valid]
+    if not np.array_equal(codewords(data, version, error_correction), words):
+        raise ValueError("error correction codewords do not match the data")
+    return data.tobytes()
+
+
+def _read_segments(data: bytes, version: int) -> bytes:
+    """
+    Return the content of the segments in the data codewords `data`.
+    """
+    stream = int.from_bytes(data, "big")
+    remaining = 8 * len(data)
+
+    def read(bits: int) -> int:
+        nonlocal remaining
+        if bits > remaining:
+            raise ValueError("data codewords end within a segment")
+        remaining -= bits
+        return stream >> remaining & ((1 << bits) - 1)
+
+    sizes = _mode_sizes(version)
+    res = bytearray()
+    while remaining >= 4 and (mode := read(4)):
+        if mode not in sizes:
+            raise ValueError(f"unsupported mode {mode}")
+        count = read(sizes[mode])
+        if mode == MODE_8BIT_BYTE:
+            res += read(8 * count).to_bytes(count, "big")
+        elif mode == MODE_NUMBER:
+            for i in range(0, count, 3):
+                digits = min(3, count - i)
+                res += b"%0*d" % (digits, read(3 * digits + 1))
+        elif mode == MODE_ALPHA_NUM:
+            for i in range(0, count, 2):
+                if count - i > 1:
+                    pair = read(11)
+                    res += bytes((ALPHA_NUM[pair // 45], ALPHA_NUM[pair % 45]))
+                else:
+                    res.append(ALPHA_NUM[read(6)])
+    return bytes(res)
+
+
+def decode(modules: np.ndarray) -> bytes:
+    """
+    Return the data encoded in the qr code `modules`.
+    """
+    return _read_segments(data_codewords(modules), matrix_version(modules))
@@ -0,0 +1,686 @@
+"""
+Vectorized qr code encoder specialised for epc payloads.
+
+The encoder produces the same module matrices as `qrcode.QRCode(version=6, error_correction=ERROR_CORRECT_M)`,
+but places, masks and scores the modules with numpy arrays,
+and computes the Reed-Solomon error correction with precomputed GF(256) tables.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+ERROR_CORRECT_L = 1
+ERROR_CORRECT_M = 0
+ERROR_CORRECT_Q = 3
+ERROR_CORRECT_H = 2
+
+# (error correction codewords per block, number of blocks, data codewords per block, ...) per version
+RS_BLOCKS = {
+    ERROR_CORRECT_L: (
+        (7, 1, 19),
+        (10, 1, 34),
+        (15, 1, 55),
+        (20, 1, 80),
+        (26, 1, 108),
+        (18, 2, 68),
+        (20, 2, 78),
+        (24, 2, 97),
+        (30, 2, 116),
+        (18, 2, 68, 2, 69),
+        (20, 4, 81),
+        (24, 2, 92, 2, 93),
+        (26, 4, 107),
+        (30, 3, 115, 1, 116),
+        (22, 5, 87, 1, 88),
+        (24, 5, 98, 1, 99),
+        (28, 1, 107, 5, 108),
+        (30, 5, 120, 1, 121),
+        (28, 3, 113, 4, 114),
+        (28, 3, 107, 5, 108),
+        (28, 4, 116, 4, 117),
+        (28, 2, 111, 7, 112),
+        (30, 4, 121, 5, 122),
+        (30, 6, 117, 4, 118),
+        (26, 8, 106, 4, 107),
+        (28, 10, 114, 2, 115),
+        (30, 8, 122, 4, 123),
+        (30, 3, 117, 10, 118),
+        (30, 7, 116, 7, 117),
+        (30, 5, 115, 10, 116),
+        (30, 13, 115, 3, 116),
+        (30, 17, 115),
+        (30, 17, 115, 1, 116),
+        (30, 13, 115, 6, 116),
+        (30, 12, 121, 7, 122),
+        (30, 6, 121, 14, 122),
+        (30, 17, 122, 4, 123),
+        (30, 4, 122, 18, 123),
+        (30, 20, 117, 4, 118),
+        (30, 19, 118, 6, 119),
+    ),
+    ERROR_CORRECT_M: (
+        (10, 1, 16),
+        (16, 1, 28),
+        (26, 1, 44),
+        (18, 2, 32),
+        (24, 2, 43),
+        (16, 4, 27),
+        (18, 4, 31),
+        (22, 2, 38, 2, 39),
+        (22, 3, 36, 2, 37),
+        (26, 4, 43, 1, 44),
+        (30, 1, 50, 4, 51),
+        (22, 6, 36, 2, 37),
+        (22, 8, 37, 1, 38),
+        (24, 4, 40, 5, 41),
+        (24, 5, 41, 5, 42),
+        (28, 7, 45, 3, 46),
+        (28, 10, 46, 1, 47),
+        (26, 9, 43, 4, 44),
+        (26, 3, 44, 11, 45),
+        (26, 3, 41, 13, 42),
+        (26, 17, 42),
+        (28, 17, 46),
+        (28, 4, 47, 14, 48),
+        (28, 6, 45, 14, 46),
+        (28, 8, 47, 13, 48),
+        (28, 19, 46, 4, 47),
+        (28, 22, 45, 3, 46),
+        (28, 3, 45, 23, 46),
+        (28, 21, 45, 7, 46),
+        (28, 19, 47, 10, 48),
+        (28, 2, 46, 29, 47),
+        (28, 10, 46, 23, 47),
+        (28, 14, 46, 21, 47),
+        (28, 14, 46, 23, 47),
+        (28, 12, 47, 26, 48),
+        (28, 6, 47, 34, 48),
+        (28, 29, 46, 14, 47),
+        (28, 13, 46, 32, 47),
+        (28, 40, 47, 7, 48),
+        (28, 18, 47, 31, 48),
+    ),
+    ERROR_CORRECT_Q: (
+        (13, 1, 13),
+        (22, 1, 22),
+        (18, 2, 17),
+        (26, 2, 24),
+        (18, 2, 15, 2, 16),
+        (24, 4, 19),
+        (18, 2, 14, 4, 15),
+        (22, 4, 18, 2, 19),
+        (20, 4, 16, 4, 17),
+        (24, 6, 19, 2, 20),
+        (28, 4, 22, 4, 23),
+        (26, 4, 20, 6, 21),
+        (24, 8, 20, 4, 21),
+        (20, 11, 16, 5, 17),
+        (30, 5, 24, 7, 25),
+        (24, 15, 19, 2, 20),
+        (28, 1, 22, 15, 23),
+        (28, 17, 22, 1, 23),
+        (26, 17, 21, 4, 22),
+        (30, 15, 24, 5, 25),
+        (28, 17, 22, 6, 23),
+        (30, 7, 24, 16, 25),
+        (30, 11, 24, 14, 25),
+        (30, 11, 24, 16, 25),
+        (30, 7, 24, 22, 25),
+        (28, 28, 22, 6, 23),
+        (30, 8, 23, 26, 24),
+        (30, 4, 24, 31, 25),
+        (30, 1, 23, 37, 24),
+        (30, 15, 24, 25, 25),
+        (30, 42, 24, 1, 25),
+        (30, 10, 24, 35, 25),
+        (30, 29, 24, 19, 25),
+        (30, 44, 24, 7, 25),
+        (30, 39, 24, 14, 25),
+        (30, 46, 24, 10, 25),
+        (30, 49, 24, 10, 25),
+        (30, 48, 24, 14, 25),
+        (30, 43, 24, 22, 25),
+        (30, 34, 24, 34, 25),
+    ),
+    ERROR_CORRECT_H: (
+        (17, 1, 9),
+        (28, 1, 16),
+        (22, 2, 13),
+        (16, 4, 9),
+        (22, 2, 11, 2, 12),
+        (28, 4, 15),
+        (26, 4, 13, 1, 14),
+        (26, 4, 14, 2, 15),
+        (24, 4, 12, 4, 13),
+        (28, 6, 15, 2, 16),
+        (24, 3, 12, 8, 13),
+        (28, 7, 14, 4, 15),
+        (22, 12, 11, 4, 12),
+        (24, 11, 12, 5, 13),
+        (24, 11, 12, 7, 13),
+        (30, 3, 15, 13, 16),
+        (28, 2, 14, 17, 15),
+        (28, 2, 14, 19, 15),
+        (26, 9, 13, 16, 14),
+        (28, 15, 15, 10, 16),
+        (30, 19, 16, 6, 17),
+        (24, 34, 13),
+        (30, 16, 15, 14, 16),
+        (30, 30, 16, 2, 17),
+        (30, 22, 15, 13, 16),
+        (30, 33, 16, 4, 17),
+        (30, 12, 15, 28, 16),
+        (30, 11, 15, 31, 16),
+        (30, 19, 15, 26, 16),
+        (30, 23, 15, 25, 16),
+        (30, 23, 15, 28, 16),
+        (30, 19, 15, 35, 16),
+        (30, 11, 15, 46, 16),
+        (30, 59, 16, 1, 17),
+        (30, 22, 15, 41, 16),
+        (30, 2, 15, 64, 16),
+        (30, 24, 15, 46, 16),
+        (30, 42, 15, 32, 16),
+        (30, 10, 15, 67, 16),
+        (30, 20, 15, 61, 16),
+    ),
+}
+ALIGNMENT_POSITIONS = (
+    (),
+    (6, 18),
+    (6, 22),
+    (6, 26),
+    (6, 30),
+    (6, 34),
+    (6, 22, 38),
+    (6, 24, 42),
+    (6, 26, 46),
+    (6, 28, 50),
+    (6, 30, 54),
+    (6, 32, 58),
+    (6, 34, 62),
+    (6, 26, 46, 66),
+    (6, 26, 48, 70),
+    (6, 26, 50, 74),
+    (6, 30, 54, 78),
+    (6, 30, 56, 82),
+    (6, 30, 58, 86),
+    (6, 34, 62, 90),
+    (6, 28, 50, 72, 94),
+    (6, 26, 50, 74, 98),
+    (6, 30, 54, 78, 102),
+    (6, 28, 54, 80, 106),
+    (6, 32, 58, 84, 110),
+    (6, 30, 58, 86, 114),
+    (6, 34, 62, 90, 118),
+    (6, 26, 50, 74, 98, 122),
+    (6, 30, 54, 78, 102, 126),
+    (6, 26, 52, 78, 104, 130),
+    (6, 30, 56, 82, 108, 134),
+    (6, 34, 60, 86, 112, 138),
+    (6, 30, 58, 86, 114, 142),
+    (6, 34, 62, 90, 118, 146),
+    (6, 30, 54, 78, 102, 126, 150),
+    (6, 24, 50, 76, 102, 128, 154),
+    (6, 28, 54, 80, 106, 132, 158),
+    (6, 32, 58, 84, 110, 136, 162),
+    (6, 26, 54, 82, 110, 138, 166),
+    (6, 30, 58, 86, 114, 142, 170),
+)
+MODE_NUMBER = 1
+MODE_ALPHA_NUM = 2
+MODE_8BIT_BYTE = 4
+
+ALPHA_NUM = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+
+# bits of the character count indicator for versions 1-9, 10-26 and 27-40
+MODE_SIZES = (
+    {MODE_NUMBER: 10, MODE_ALPHA_NUM: 9, MODE_8BIT_BYTE: 8},
+    {MODE_NUMBER: 12, MODE_ALPHA_NUM: 11, MODE_8BIT_BYTE: 16},
+    {MODE_NUMBER: 14, MODE_ALPHA_NUM: 13, MODE_8BIT_BYTE: 16},
+)
+
+PAD_CODEWORDS = (0xEC, 0x11)
+
+# antilog and log tables of GF(256) with primitive polynomial x^8 + x^4 + x^3 + x^2 + 1
+GF_EXP = np.zeros(510, dtype=np.intp)
+GF_EXP[0] = 1
+for _i in range(1, 255):
+    GF_EXP[_i] = GF_EXP[_i - 1] << 1 ^ (0x11D if GF_EXP[_i - 1] & 0x80 else 0)
+GF_EXP[255:] = GF_EXP[:255]
+GF_LOG = np.zeros(256, dtype=np.intp)
+GF_LOG[GF_EXP[:255]] = np.arange(255)
+GF_MUL = GF_EXP[GF_LOG[:, None] + GF_LOG[None, :]].astype(np.uint8)
+GF_MUL[0, :] = GF_MUL[:, 0] = 0
+
+
+def _bch(data: int, generator: int) -> int:
+    """
+    Return the remainder of the polynomial division of `data` by `generator` over GF(2).
+    """
+    while data.bit_length() >= generator.bit_length():
+        data ^= generator << (data.bit_length() - generator.bit_length())
+    return data
+
+
+def format_bits(error_correction: int, mask_pattern: int) -> int:
+    """
+    Return the 15 bits of format information for an error correction level and mask pattern.
+    """
+    data = (error_correction << 3) | mask_pattern
+    return ((data << 10) | _bch(data << 10, 0b10100110111)) ^ 0b101010000010010
+
+
+def version_bits(version: int) -> int:
+    """
+    Return the 18 bits of version information, which versions 7 and above carry.
+    """
+    return (version << 12) | _bch(version << 12, 0b1111100100101)
+
+
+def data_capacity(version: int, error_correction: int = ERROR_CORRECT_M) -> int:
+    """
+    Return the number of data codewords of a qr code.
+    """
+    blocks = RS_BLOCKS[error_correction][version - 1]
+    return sum(count * size for count, size in zip(blocks[1::2], blocks[2::2]))
+
+
+def _split(data: bytes, pattern: re.Pattern):
+    """
+    Split `data` into `(matches, chunk)` pairs, alternating between chunks that do and do not match `pattern`.
+    """
+    while data and (match := pattern.search(data)):
+        if match.start():
+            yield False, data[: match.start()]
+        yield True, data[match.start() : match.end()]
+        data = data[match.end() :]
+    if data:
+        yield False, data
+
+
+def segments(data: bytes, minimum: int = 20) -> list:
+    """
+    Split `data` into `(mode, chunk)` segments.
+
+    Runs of at least `minimum` digits or alphanumeric characters are encoded in the more compact modes,
+    exactly like `qrcode.QRCode.add_data` does.
+    """
+    digit, alpha = rb"\d", b"[" + re.escape(ALPHA_NUM) + b"]"
+    if len(data) <= minimum:
+        digit, alpha = b"^" + digit + b"+$", b"^" + alpha + b"+$"
+    else:
+        digit, alpha = digit + b"{%d,}" % minimum, alpha + b"{%d,}" % minimum
+    digit, alpha = re.compile(digit), re.compile(alpha)
+    res = []
+    for is_digit, chunk in _split(data, digit):
+        if is_digit:
+            res.append((MODE_NUMBER, chunk))
+            continue
+        for is_alpha, sub_chunk in _split(chunk, alpha):
+            res.append((MODE_ALPHA_NUM if is_alpha else MODE_8BIT_BYTE, sub_chunk))
+    return res
+
+
+def _mode_sizes(version: int) -> dict:
+    """
+    Return the bits of the character count indicators of `version`.
+    """
+    return MODE_SIZES[(version >= 10) + (version >= 27)]
+
+
+def _bit_stream(segments: list, version: int) -> tuple:
+    """
+    Return the encoded `segments` as `(value, number of bits)`.
+    """
+    sizes = _mode_sizes(version)
+    value = length = 0
+    for mode, chunk in segments:
+        value = (value << 4 | mode) << sizes[mode] | len(chunk)
+        length += 4 + sizes[mode]
+        if mode == MODE_8BIT_BYTE:
+            value = value << 8 * len(chunk) | int.from_bytes(chunk, "big")
+            length += 8 * len(chunk)
+        elif mode == MODE_NUMBER:
+            for i in range(0, len(chunk), 3):
+                bits = 3 * len(digits := chunk[i : i + 3]) + 1
+                value = value << bits | int(digits)
+                length += bits
+        else:
+            for i in range(0, len(chunk), 2):
+                pair = [ALPHA_NUM.index(c) for c in chunk[i : i + 2]]
+                bits = 11 if len(pair) == 2 else 6
+                value = value << bits | (
+                    pair[0] * 45 + pair[1] if bits == 11 else pair[0]
+                )
+                length += bits
+    return value, length
+
+
+def fit_version(
+    segments: list, error_correction: int = ERROR_CORRECT_M, start: int = 1
+) -> int:
+    """
+    Return the smallest version of at least `start` that holds `segments`.
+    """
+    for version in range(start, 41):
+        if _bit_stream(segments, version)[1] <= 8 * data_capacity(
+            version, error_correction
+        ):
+            return version
+    raise ValueError("data is too long to fit into any qr code version")
+
+
+def data_codewords(segments: list, version: int, error_correction: int) -> np.ndarray:
+    """
+    Return the terminated and padded data codewords of `segments`.
+    """
+    value, length = _bit_stream(segments, version)
+    capacity = data_capacity(version, error_correction)
+    if length > 8 * capacity:
+        raise ValueError(
+            f"data size ({length} bits) exceeds capacity of version {version} ({8 * capacity} bits)"
+        )
+    # terminate with up to four zero bits, then fill up the last codeword
+    pad = min(8 * capacity - length, 4)
+    pad += -(length + pad) % 8
+    words = (value << pad).to_bytes((length + pad) // 8, "big")
+    res = np.empty(capacity, dtype=np.uint8)
+    res[: len(words)] = np.frombuffer(words, dtype=np.uint8)
+    res[len(words) :] = np.resize(PAD_CODEWORDS, capacity - len(words))
+    return res
+
+
+@lru_cache(maxsize=None)
+def _rs_table(data_count: int, ec_count: int) -> np.ndarray:
+    """
+    Return the error correction codewords contributed by each byte value at each distance from the end of a block.
+
+    Entry `[k, b]` is the remainder of `b * x^(k + ec_count)` modulo the generator polynomial,
+    so the error correction codewords of a block are the xor of the entries of its bytes.
+    """
+    generator = np.array([1], dtype=np.uint8)
+    for i in range(ec_count):
+        # multiply by (x + a^i)
+        generator = np.append(generator, 0) ^ np.append(0, GF_MUL[generator, GF_EXP[i]])
+    remainders = np.zeros((data_count, ec_count), dtype=np.uint8)
+    remainders[0] = generator[1:]
+    for k in range(1, data_count):
+        lead, remainders[k, :-1] = remainders[k - 1, 0], remainders[k - 1, 1:]
+        remainders[k] ^= GF_MUL[lead, generator[1:]]
+    return GF_MUL[np.arange(256)[None, :, None], remainders[:, None, :]]
+
+
+def codewords(data: np.ndarray, version: int, error_correction: int) -> np.ndarray:
+    """
+    Return the interleaved data and error correction codewords.
+    """
+    ec_count, *groups = RS_BLOCKS[error_correction][version - 1]
+    sizes = np.repeat(groups[1::2], groups[::2])
+    columns = np.arange(max(sizes))
+    valid = columns < sizes[:, None]
+    blocks = np.zeros(valid.shape, dtype=np.uint8)
+    blocks[valid] = data
+    distance = np.where(valid, sizes[:, None] - 1 - columns, 0)
+    ec = np.bitwise_xor.reduce(
+        _rs_table(len(columns), ec_count)[distance, blocks], axis=1
+    )
+    return np.concatenate((blocks.T[valid.T], ec.T.ravel()))
+
+
+def _format_positions(size: int) -> tuple:
+    """
+    Return the module coordinates of bits 0 to 14 of both copies of the format information.
+    """
+    vertical = [(i + (i >= 6), 8) if i < 8 else (size - 15 + i, 8) for i in range(15)]
+    horizontal = [
+        (8, size - i - 1) if i < 8 else (8, 15 - i - (i >= 9)) for i in range(15)
+    ]
+    return vertical, horizontal
+
+
+def _version_positions(size: int) -> tuple:
+    """
+    Return the module coordinates of bits 0 to 17 of both copies of the version information.
+    """
+    upper = [(i // 3, i % 3 + size - 11) for i in range(18)]
+    lower = [(i % 3 + size - 11, i // 3) for i in range(18)]
+    return upper, lower
+
+
+def function_patterns(version: int) -> tuple:
+    """
+    Return `(modules, rows, cols)`, i.e. the function patterns of `version` with light format and version information,
+    and the coordinates of the data modules in placement order.
+    """
+    size = version * 4 + 17
+    modules = np.full((size, size), -1, dtype=np.int8)
+
+    ring = np.maximum(abs(np.arange(-1, 8)[:, None] - 3), abs(np.arange(-1, 8) - 3))
+    finder = ((ring != 2) & (ring != 4)).astype(np.int8)
+    for row, col in ((0, 0), (size - 7, 0), (0, size - 7)):
+        rows = slice(max(row - 1, 0), min(row + 8, size))
+        cols = slice(max(col - 1, 0), min(col + 8, size))
+        modules[rows, cols] = finder[
+            rows.start - row + 1 : rows.stop - row + 1,
+            cols.start - col + 1 : cols.stop - col + 1,
+        ]
+
+    ring = np.maximum(abs(np.arange(-2, 3)[:, None]), abs(np.arange(-2, 3)))
+    alignment = (ring != 1).astype(np.int8)
+    for row in ALIGNMENT_POSITIONS[version - 1]:
+        for col in ALIGNMENT_POSITIONS[version - 1]:
+            if modules[row, col] == -1:
+                modules[row - 2 : row + 3, col - 2 : col + 3] = alignment
+
+    timing = (np.arange(8, size - 8) % 2 == 0).astype(np.int8)
+    vertical, horizontal = modules[8 : size - 8, 6], modules[6, 8 : size - 8]
+    vertical[vertical == -1] = timing[vertical == -1]
+    horizontal[horizontal == -1] = timing[horizontal == -1]
+
+    reserved = [*sum(_format_positions(size), []), (size - 8, 8)]
+    if version >= 7:
+        reserved += sum(_version_positions(size), [])
+    modules[tuple(zip(*reserved))] = 0
+
+    # zig-zag through column pairs from the bottom right, skipping the vertical timing pattern
+    order = []
+    for col in range(size - 1, 0, -2):
+        col -= col <= 6
+        rows = (
+            range(size - 1, -1, -1) if (size - 1 - col) // 2 % 2 == 0 else range(size)
+        )
+        order += [(row, c) for row in rows for c in (col, col - 1)]
+    rows, cols = np.array(order).T
+    free = modules[rows, cols] == -1
+    return modules == 1, rows[free], cols[free]
+
+
+def mask_patterns(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Return whether each of the eight mask patterns inverts the modules at `rows` and `cols`.
+    """
+    product = rows * cols
+    return np.array(
+        [
+            (rows + cols) % 2 == 0,
+            rows % 2 == 0,
+            cols % 3 == 0,
+            (rows + cols) % 3 == 0,
+            (rows // 2 + cols // 3) % 2 == 0,
+            product % 2 + product % 3 == 0,
+            (product % 2 + product % 3) % 2 == 0,
+            (product % 3 + (rows + cols) % 2) % 2 == 0,
+        ]
+    )
+
+
+template = namedtuple("Template", ["modules", "index", "mask"])
+
+
+def _read_only(*arrays: np.ndarray) -> None:
+    """
+    Protect cached arrays against accidental modification.
+    """
+    for array in arrays:
+        array.flags.writeable = False
+
+
+@lru_cache(maxsize=None)
+def placement(version: int) -> tuple:
+    """
+    Return `(modules, index, masks)` of `version`, i.e. the function patterns with light format and version information,
+    the flat indices of the data modules in placement order, and the eight mask patterns at these indices.
+
+    The result is cached and shared by all codes of `version`, so its arrays are read-only.
+    """
+    modules, rows, cols = function_patterns(version)
+    index = rows * len(modules) + cols
+    masks = mask_patterns(rows, cols)
+    _read_only(modules, index, masks)
+    return modules, index, masks
+
+
+@lru_cache(maxsize=None)
+def get_template(version: int, error_correction: int, mask_pattern: int) -> template:
+    """
+    Return a namedtuple of kind `template`, holding the function patterns including format and version information,
+    the flat indices of the data modules in placement order, and the mask pattern at these indices.
+
+    Encoding a code then reduces to copying `modules` and filling in the masked data bits at `index`.
+    The result is cached, so its arrays are read-only.
+    """
+    modules, index, masks = placement(version)
+    modules = modules.copy()
+    size = len(modules)
+    info = format_bits(error_correction, mask_pattern)
+    for positions in _format_positions(size):
+        modules[tuple(zip(*positions))] = [info >> i & 1 for i in range(15)]
+    if version >= 7:
+        info = version_bits(version)
+        for positions in _version_positions(size):
+            modules[tuple(zip(*positions))] = [info >> i & 1 for i in range(18)]
+    modules[size - 8, 8] = True
+    _read_only(modules)
+    return template(modules, index, masks[mask_pattern])
+
+
+def penalty(modules: np.ndarray) -> list:
+    """
+    Return the penalty score of each of a stack of module matrices.
+
+    The score follows the four rules of `qrcode.util.lost_point`.
+    """
+    count, size, _ = modules.shape
+    lines = np.concatenate((modules, modules.transpose(0, 2, 1)), axis=1)
+
+    # runs of five or more equal modules in a row or column
+    edges = np.ones((count, 2 * size, size + 1), dtype=bool)
+    edges[..., 1:size] = lines[..., 1:] != lines[..., :-1]
+    starts = np.flatnonzero(edges)
+    lengths = np.diff(starts)
+    runs = np.bincount(
+        starts[:-1] // edges[0].size,
+        weights=np.where(lengths >= 5, lengths - 2, 0),
+        minlength=count,
+    )
+
+    # blocks of 2x2 equal modules
+    corner = modules[:, :-1, :-1]
+    blocks = (
+        (corner == modules[:, :-1, 1:])
+        & (corner == modules[:, 1:, :-1])
+        & (corner == modules[:, 1:, 1:])
+    ).sum(axis=(1, 2))
+
+    # 1:1:3:1:1 finder-like patterns preceded or followed by four light modules
+    windows = np.zeros((count, 2 * size, size - 10), dtype=np.uint16)
+    for offset in range(11):
+        windows = windows << 1 | lines[..., offset : offset + size - 10]
+    finders = ((windows == 0b10111010000) | (windows == 0b00001011101)).sum(axis=(1, 2))
+
+    # deviation of the share of dark modules from one half
+    darks = modules.sum(axis=(1, 2))
+    return [
+        int(runs[i])
+        + 3 * int(blocks[i])
+        + 40 * int(finders[i])
+        + int(abs(float(darks[i]) / size**2 * 100 - 50) / 5) * 10
+        for i in range(count)
+    ]
+
+
+def _choose_version(
+    parts: list, version: int, error_correction: int, max_version: int
+) -> int:
+    """
+    Return the version of the qr code of the segments `parts`, see `choose_version`.
+    """
+    chosen = fit_version(parts, error_correction, version or 1)
+    if chosen > max_version:
+        raise ValueError(
+            f"data does not fit into qr code version {max_version} (needs version {chosen})"
+        )
+    return chosen
+
+
+def choose_version(
+    data,
+    version: int = 6,
+    error_correction: int = ERROR_CORRECT_M,
+    max_version: int = 40,
+) -> int:
+    """
+    Return the version `encode` builds the qr code of `data` with.
+
+    This is the smallest version that holds the data, but at least `version`; pass `None` to start from version 1.
+    Raises a ValueError if the data does not fit into `max_version`.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return _choose_version(segments(data), version, error_correction, max_version)
+
+
+def matrix_version(modules: np.ndarray) -> int:
+    """
+    Return the version of the module matrix `modules`.
+    """
+    return (len(modules) - 17) // 4
+
+
+def encode(
+    data,
+    version: int = 6,
+    error_correction: int = ERROR_CORRECT_M,
+    mask_pattern: int = None,
+    max_version: int = 40,
+) -> np.ndarray:
+    """
+    Return the module matrix of the qr code of `data` as boolean numpy array, where `True` is dark.
+
+    The version grows beyond `version` if the data does not fit, see `choose_version`, and the mask pattern
+    with the lowest penalty is chosen unless `mask_pattern` is given. Strings are encoded as utf-8.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    parts = segments(data)
+    version = _choose_version(parts, version, error_correction, max_version)
+    words = codewords(
+        data_codewords(parts, version, error_correction), version, error_correction
+    )
+    modules, index, masks = placement(version)
+    bits = np.zeros(len(index), dtype=bool)
+    bits[: 8 * len(words)] = np.unpackbits(words)
+
+    if mask_pattern is None:
+        candidates = np.repeat(modules[None], 8, axis=0).reshape(8, -1)
+        candidates[:, index] = bits ^ masks
+        mask_pattern = int(np.argmin(penalty(candidates.reshape(8, *modules.shape))))
+
+    base = get_template(version, error_correction, mask_pattern)
+    modules = base.modules.copy()
+    modules.ravel()[base.index] = bits ^ base.mask
+    return modules
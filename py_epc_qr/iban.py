@@ -0,0 +1,134 @@
+"""
+Validation of international bank account numbers (IBAN) according to ISO 13616.
+"""
+
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable
+
+from py_epc_qr.constants import IBAN_FORMATS
+
+if TYPE_CHECKING:
+    import numpy
+
+# ibans are validated in their electronic format, where all letters are upper case
+CHARACTERS = {"n": "[0-9]", "a": "[A-Z]", "c": "[0-9A-Z]"}
+
+# letters are replaced by two digits for the checksum, A = 10, ..., Z = 35
+DIGITS = str.maketrans({chr(i): str(i - 55) for i in range(65, 91)})
+
+
+def compile_format(bban: str) -> tuple:
+    """
+    Return `(length, pattern)` of the iban with bban format `bban` as given in `IBAN_FORMATS`,
+    where the regular expression `pattern` is compiled on first use by `_pattern`.
+    """
+    pattern, length = "[A-Z]{2}[0-9]{2}", 4
+    for count, kind in re.findall(r"(\d+)!([nac])", bban):
+        pattern += f"{CHARACTERS[kind]}{{{count}}}"
+        length += int(count)
+    return length, pattern
+
+
+REGISTRY = {country: compile_format(bban) for country, bban in IBAN_FORMATS.items()}
+
+
+@lru_cache(maxsize=None)
+def _pattern(country: str) -> re.Pattern:
+    """
+    Return the compiled pattern of the ibans of `country`.
+    """
+    return re.compile(REGISTRY[country][1])
+
+
+def mod97(value: str) -> int:
+    """
+    Return the ISO 7064 mod 97-10 checksum of the iban `value`, which is 1 for valid ones.
+    The number is reduced in chunks of seven digits, so that no large integers are built.
+    """
+    digits = (value[4:] + value[:4]).translate(DIGITS)
+    res = 0
+    for i in range(0, len(digits), 7):
+        res = int(f"{res}{digits[i : i + 7]}") % 97
+    return res
+
+
+@lru_cache(maxsize=None)
+def _tables() -> tuple:
+    """
+    Return the value and number of digits of each ascii character, and the powers of ten modulo 97,
+    for the vectorized checksum. Built on first use, so that validating single values does not import numpy.
+    """
+    import numpy as np
+
+    values = np.zeros(256, dtype=np.int64)
+    values[48:58], values[65:91] = np.arange(10), np.arange(10, 36)
+    widths = np.zeros(256, dtype=np.int64)
+    widths[48:58], widths[65:91] = 1, 2
+    powers = np.array([pow(10, i, 97) for i in range(2 * 34 + 1)], dtype=np.int64)
+    return values, widths, powers
+
+
+def mod97_many(values: list) -> "numpy.ndarray":
+    """
+    Return the checksums of the ibans `values` like `mod97`, computed at once with numpy.
+
+    Each character contributes its value times the power of ten of the number of digits following it,
+    so the checksum is a weighted sum that is reduced modulo 97 without ever building large integers.
+    """
+    import numpy as np
+
+    table, widths, powers = _tables()
+    rearranged = np.array([value[4:] + value[:4] for value in values], dtype="S34")
+    chars = rearranged.view(np.uint8).reshape(len(values), -1)
+    width = widths[chars]
+    following = np.cumsum(width[:, ::-1], axis=1)[:, ::-1] - width
+    return (table[chars] * powers[following]).sum(axis=1) % 97
+
+
+def _structure_error(value: str) -> str:
+    """
+    Return the error code of the iban `value` apart from its checksum.
+    """
+    if not value.isalnum():
+        return "iban.not_alphanumeric"
+    if (entry := REGISTRY.get(value[:2])) is None:
+        return "iban.country_code"
+    if not value[2:4].isdecimal():
+        return "iban.check_digits"
+    if len(value) != entry[0]:
+        return "iban.length"
+    if not _pattern(value[:2]).fullmatch(value):
+        return "iban.format"
+    return None
+
+
+def iban_error(value: str) -> str:
+    """
+    Return the error code of the iban `value`, or `None` if it is valid, see `validation.MESSAGES`.
+    """
+    if (code := _structure_error(value)) is not None:
+        return code
+    if mod97(value) != 1:
+        return "iban.checksum"
+    return None
+
+
+def validate_ibans(values: Iterable[str]) -> list:
+    """
+    Return `(index, code)` for each of the iban `values` that is invalid.
+
+    Each distinct iban is only validated once, as columns of recurring payments repeat many of them,
+    and the checksums of all well-formed ones are computed at once by `mod97_many`.
+    """
+    values = list(values)
+    codes = {value: _structure_error(value) for value in set(values)}
+    if well_formed := [value for value, code in codes.items() if code is None]:
+        for value, checksum in zip(well_formed, mod97_many(well_formed).tolist()):
+            if checksum != 1:
+                codes[value] = "iban.checksum"
+    return [
+        (index, code)
+        for index, value in enumerate(values)
+        if (code := codes[value]) is not None
+    ]
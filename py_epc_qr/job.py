@@ -0,0 +1,187 @@
+"""
+Resumable batch jobs that checkpoint their progress in a SQLite database.
+
+A job runs `batch.generate` and records the outcome of every row together with the input line up to which
+all rows are done. After a crash or an interrupt, running the same job again continues right after that line.
+Rows that were written after the last checkpoint are delivered again, which is harmless:
+their qr codes are found in the manifest of the output and skipped, see `output.Manifest`,
+and their outcomes replace the recorded ones. Rows that failed before the last checkpoint are reported again.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from functools import partial
+from typing import Callable, Iterator
+
+from py_epc_qr.batch import generate, resolve_format, row_result
+from py_epc_qr.constants import QR_VERSION
+from py_epc_qr.output import open_writer
+
+job_progress = namedtuple(
+    "JobProgress", ["line", "lines", "done", "failed", "rate", "eta"]
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rows (line INTEGER PRIMARY KEY, name TEXT NOT NULL, error TEXT);
+"""
+
+
+class Checkpoint:
+    """
+    Progress of a batch job in a SQLite database: the options of the job, the input line up to which
+    all rows are done, and the name or error of every row done.
+    """
+
+    def __init__(self, path: str, job: dict):
+        """
+        Initialize from the database at `path`, which must belong to the same `job` if it exists.
+        """
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        state = dict(self.db.execute("SELECT key, value FROM state"))
+        options = json.dumps(job, sort_keys=True)
+        if state.get("job", options) != options:
+            self.db.close()
+            raise ValueError(f"the checkpoint {path} belongs to a different job")
+        self.resumed = "job" in state
+        self.line = int(state.get("line", 0))
+        self.rows = []
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO state VALUES ('job', ?)", (options,)
+            )
+
+    def add(self, res: row_result) -> None:
+        """
+        Record the outcome of a row, which is stored with the next `commit`.
+        """
+        error = None if res.error is None else str(res.error)
+        self.rows.append((res.line, res.name, error))
+
+    def commit(self, line: int) -> None:
+        """
+        Store the added rows and that all rows up to `line` are done, at once.
+        """
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO rows VALUES (?, ?, ?)", self.rows
+            )
+            self.db.execute("INSERT OR REPLACE INTO state VALUES ('line', ?)", (line,))
+        self.rows, self.line = [], line
+
+    def counts(self) -> tuple:
+        """
+        Return the numbers of stored rows that are done and that failed.
+        """
+        return self.db.execute("SELECT COUNT(*), COUNT(error) FROM rows").fetchone()
+
+    def failures(self, line: int) -> list:
+        """
+        Return the stored rows up to `line` that failed as skipped namedtuples of kind `row_result`,
+        whose `error` is the message of the recorded error.
+        """
+        rows = self.db.execute(
+            "SELECT line, name, error FROM rows WHERE error IS NOT NULL AND line <= ? ORDER BY line",
+            (line,),
+        )
+        return [row_result(*row, True) for row in rows]
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        self.db.close()
+
+
+def count_lines(file_name: str) -> int:
+    """
+    Return the number of lines of `file_name`, read in blocks without decoding.
+    """
+    with open(file_name, "rb") as file:
+        blocks = iter(partial(file.read, 1 << 20), b"")
+        return sum(block.count(b"\n") for block in blocks)
+
+
+def run(
+    file_name: str,
+    out: str,
+    state: str = "",
+    fmt: str = "",
+    name_field: str = "",
+    workers: int = 1,
+    chunksize: int = 16,
+    out_format: str = "png",
+    qr_version: int = QR_VERSION,
+    max_qr_version: int = None,
+    shard: bool = False,
+    progress: Callable = None,
+    interval: float = 1,
+) -> Iterator[row_result]:
+    """
+    Create the qr codes of `file_name` in `out` like `batch.generate`, checkpointed in the database `state`
+    (default: `<out>.job.sqlite`), and resume after the last checkpoint if the job was run before.
+
+    The output is a directory, sharded if `shard`, or a tar archive; a zip archive is rewritten
+    as a whole on closing and thus cannot keep the rows of a crashed job.
+    Every `interval` seconds, the output is flushed, a checkpoint is committed, and `progress`, if given,
+    is called with a namedtuple of kind `job_progress` holding the rows per second of this run and
+    the estimated seconds left, based on the input lines still to go.
+    Yields a namedtuple of kind `row_result` per row of this run, preceded by the rows that failed
+    in the runs before, see `Checkpoint.failures`.
+    """
+    if out.lower().endswith(".zip"):
+        raise ValueError(
+            "jobs cannot resume zip archives, use a directory or tar archive"
+        )
+    fmt = resolve_format(file_name, fmt)
+    job = {
+        "source": os.path.abspath(file_name),
+        "out": os.path.abspath(out),
+        "options": [fmt, name_field, out_format, qr_version, max_qr_version, shard],
+    }
+    checkpoint = Checkpoint(state or f"{out}.job.sqlite", job)
+    lines = count_lines(file_name)
+    begin = last = time.monotonic()
+    first = line = checkpoint.line
+    count = 0
+
+    def commit(writer) -> None:
+        writer.flush()
+        checkpoint.commit(line)
+        if progress is not None:
+            elapsed = max(time.monotonic() - begin, 1e-9)
+            speed = (line - first) / elapsed
+            eta = max(lines - line, 0) / speed if speed else None
+            done, failed = checkpoint.counts()
+            progress(job_progress(line, lines, done, failed, count / elapsed, eta))
+
+    try:
+        yield from checkpoint.failures(first)
+        with open_writer(out, shard, True, checkpoint.resumed) as writer:
+            try:
+                for res in generate(
+                    file_name,
+                    writer,
+                    fmt,
+                    name_field,
+                    workers,
+                    chunksize,
+                    out_format,
+                    qr_version,
+                    max_qr_version,
+                    first,
+                ):
+                    checkpoint.add(res)
+                    line, count = res.line, count + 1
+                    yield res
+                    if time.monotonic() - last >= interval:
+                        commit(writer)
+                        last = time.monotonic()
+            finally:
+                commit(writer)
+    finally:
+        checkpoint.close()
@@ -0,0 +1,166 @@
+"""
+Opt-in instrumentation of the stages of creating epc qr codes.
+
+The package reports timers (e.g. `encode`, `render`) and counters (e.g. `codes_rendered`, `bytes_written`)
+to the `registry`, which aggregates them and passes each one on to the subscribed callbacks,
+e.g. to feed a Prometheus exporter. Unless enabled, every report returns right away.
+Metrics are kept per process, so codes rendered by the workers of `parallel.imap` are not included.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from typing import Callable
+
+timer_stats = namedtuple("TimerStats", ["count", "total", "max"])
+
+
+class _Timer:
+    """
+    Context manager that reports the time spent within it to a registry.
+    """
+
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry, name: str, labels: dict):
+        """Initialize"""
+        self.registry, self.name, self.labels = registry, name, labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.registry.observe(
+            self.name, time.perf_counter() - self.start, **self.labels
+        )
+
+
+class _NullTimer:
+    """
+    Context manager that does nothing, used while the registry is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    Aggregate counters and timers, keyed by name and labels.
+
+    Callbacks are called with `(kind, name, value, labels)` for every report, where `kind` is either
+    `counter` or `timer`, and `value` the increment or the duration in seconds.
+    The registry may be shared between threads.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """Initialize"""
+        self.enabled = enabled
+        self.callbacks = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Discard all values reported so far.
+        """
+        with self._lock:
+            self._counters, self._timers = {}, {}
+
+    def subscribe(self, callback: Callable) -> None:
+        """
+        Call `callback` for every report from now on.
+        """
+        self.callbacks.append(callback)
+
+    def unsubscribe(self, callback: Callable) -> None:
+        """
+        Stop calling `callback`.
+        """
+        self.callbacks.remove(callback)
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Increase the counter `name` with `labels` by `value`.
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        for callback in self.callbacks:
+            callback("counter", name, value, labels)
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """
+        Add a duration of `seconds` to the timer `name` with `labels`.
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            count, total, longest = self._timers.get(key, (0, 0.0, 0.0))
+            self._timers[key] = timer_stats(
+                count + 1, total + seconds, max(longest, seconds)
+            )
+        for callback in self.callbacks:
+            callback("timer", name, seconds, labels)
+
+    def timer(self, name: str, **labels):
+        """
+        Return a context manager that adds the time spent within it to the timer `name` with `labels`.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def snapshot(self) -> dict:
+        """
+        Return the current values as `{"counters": ..., "timers": ...}`, each keyed by `(name, labels)`
+        with the labels as sorted tuple of pairs, and with timers as namedtuples of kind `timer_stats`.
+        """
+        with self._lock:
+            return {"counters": dict(self._counters), "timers": dict(self._timers)}
+
+
+registry = MetricsRegistry()
+
+
+def enable() -> None:
+    """
+    Enable the default registry.
+    """
+    registry.enabled = True
+
+
+def disable() -> None:
+    """
+    Disable the default registry; values reported so far are kept.
+    """
+    registry.enabled = False
+
+
+def timer(name: str, **labels):
+    """
+    Return a context manager that times a stage in the default registry, see `MetricsRegistry.timer`.
+    """
+    if not registry.enabled:
+        return _NULL_TIMER
+    return _Timer(registry, name, labels)
+
+
+def count(name: str, value: float = 1, **labels) -> None:
+    """
+    Increase a counter of the default registry, see `MetricsRegistry.count`.
+    """
+    if registry.enabled:
+        registry.count(name, value, **labels)
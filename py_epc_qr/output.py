@@ -0,0 +1,302 @@
+"""
+Writers of qr code files into directories or archives, for batches of hundreds of thousands of codes.
+
+Every file only appears under its final name once it is complete: directories receive each file by rename,
+and archives are written as `<name>.part` and renamed when closed. Optionally, a manifest records the location
+of each qr code together with the digest of its EPC-compliant string and render settings, so that a re-run
+can skip the codes that already exist under the same name and settings, and a crashed job can resume.
+"""
+
+import hashlib
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+# file name of the manifest within directories, or suffix of the one next to archives
+MANIFEST = "manifest.tsv"
+
+# size of the blocks of tar archives
+BLOCK = tarfile.BLOCKSIZE
+
+
+class Manifest:
+    """
+    Append-only map of the locations of qr codes to the digests of their payloads and render settings,
+    see `transaction.epc_qr.render_key`, stored as `digest<TAB>location` lines.
+    The same payload may be written to several locations, e.g. under different names.
+    """
+
+    def __init__(self, path: str, resume: bool = False, keep=None):
+        """
+        Initialize the manifest at `path`, taking over its entries if `resume`,
+        but only those whose location is in `keep` unless it is `None`.
+        The kept entries are rewritten at once, dropping duplicates and partial lines.
+        """
+        self.path, self.entries = path, {}
+        if resume and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    digest, tab, location = line.rstrip("\n").partition("\t")
+                    if (
+                        tab
+                        and line.endswith("\n")
+                        and (keep is None or location in keep)
+                    ):
+                        self.entries[location] = digest
+        part = f"{path}.part"
+        with open(part, "w", encoding="utf-8") as file:
+            file.writelines(
+                f"{digest}\t{location}\n" for location, digest in self.entries.items()
+            )
+        os.replace(part, path)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def written(self) -> dict:
+        """
+        Return the locations of the recorded qr codes keyed by `(digest, name)`,
+        where `name` is the file name of the location, i.e. the name given to the writer.
+        """
+        return {
+            (digest, location.rpartition("/")[2]): location
+            for location, digest in self.entries.items()
+        }
+
+    def add(self, digest: str, location: str) -> None:
+        """
+        Record that the qr code of `digest` was written to `location`.
+        """
+        self.entries[location] = digest
+        self.file.write(f"{digest}\t{location}\n")
+
+    def flush(self) -> None:
+        """
+        Flush the recorded entries to the manifest file.
+        """
+        self.file.flush()
+
+    def close(self) -> None:
+        """
+        Close the manifest file.
+        """
+        self.file.close()
+
+
+class DirectoryWriter:
+    """
+    Write qr code images as individual files into a directory.
+    """
+
+    def __init__(self, path: str, manifest: bool = False, resume: bool = False):
+        """
+        Initialize, with a manifest inside the directory if `manifest` or `resume`, see `Manifest`.
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.manifest = None
+        if manifest or resume:
+            self.manifest = Manifest(os.path.join(path, MANIFEST), resume)
+
+    def location(self, name: str) -> str:
+        """
+        Return the path of the file `name` relative to the directory.
+        """
+        return name
+
+    def write(self, name: str, data: bytes, digest: str = "") -> None:
+        """
+        Write image `data` as `name`, which appears once it is complete,
+        and record it in the manifest as the qr code of `digest`, if given.
+        """
+        location = self.location(name)
+        target = os.path.join(self.path, location)
+        head, tail = os.path.split(target)
+        part = os.path.join(head, f".{tail}.part")
+        with open(part, "wb") as file:
+            file.write(data)
+        os.replace(part, target)
+        if digest and self.manifest is not None:
+            self.manifest.add(digest, location)
+
+    def flush(self) -> None:
+        """
+        Flush the manifest, if any, so that everything written so far survives a crash of the process.
+        """
+        if self.manifest is not None:
+            self.manifest.flush()
+
+    def close(self) -> None:
+        """
+        Close the manifest, if any; there is nothing else to finalize for plain directories.
+        """
+        if self.manifest is not None:
+            self.manifest.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ShardedWriter(DirectoryWriter):
+    """
+    Write qr code images into a tree of `levels` nested directories named by the leading hex digits of the hash
+    of their names, e.g. `3f/a2/R0001.png`, so that no directory grows beyond a few thousand entries.
+    """
+
+    def __init__(
+        self, path: str, manifest: bool = False, resume: bool = False, levels: int = 2
+    ):
+        """
+        Initialize, see `DirectoryWriter`.
+        """
+        super().__init__(path, manifest, resume)
+        self.levels, self.shards = levels, set()
+
+    def location(self, name: str) -> str:
+        """
+        Return the path of the file `name` within its shard, creating the shard if it is new.
+        """
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        shard = "/".join(
+            digest[2 * level : 2 * level + 2] for level in range(self.levels)
+        )
+        if shard not in self.shards:
+            os.makedirs(os.path.join(self.path, shard), exist_ok=True)
+            self.shards.add(shard)
+        return f"{shard}/{name}"
+
+
+class ZipWriter(DirectoryWriter):
+    """
+    Stream qr code images as entries into a single zip archive.
+
+    The archive is written as `<path>.part` and renamed to `path` when closed. Resuming appends to
+    a closed archive; an archive left behind by a crash has no central directory and is started over.
+    """
+
+    def __init__(self, path: str, manifest: bool = False, resume: bool = False):
+        """
+        Initialize, with a manifest next to the archive if `manifest` or `resume`, see `Manifest`.
+        """
+        self.path, self.part = path, f"{path}.part"
+        if resume and os.path.exists(path):
+            os.replace(path, self.part)
+            self.archive = zipfile.ZipFile(self.part, "a")
+        else:
+            # png data is already deflated, and the other formats are small
+            self.archive = zipfile.ZipFile(
+                self.part, "w", compression=zipfile.ZIP_STORED
+            )
+        self.manifest = None
+        if manifest or resume:
+            keep = set(self.archive.namelist())
+            self.manifest = Manifest(f"{path}.{MANIFEST}", resume, keep)
+
+    def write(self, name: str, data: bytes, digest: str = "") -> None:
+        """
+        Write image `data` as archive entry `name`, and record it in the manifest as the qr code of `digest`, if given.
+        """
+        self.archive.writestr(name, data)
+        if digest and self.manifest is not None:
+            self.manifest.add(digest, name)
+
+    def close(self) -> None:
+        """
+        Write the central directory of the archive and move it to its final name.
+        """
+        self.archive.close()
+        super().close()
+        os.replace(self.part, self.path)
+
+
+class TarWriter(ZipWriter):
+    """
+    Stream qr code images as members into a single uncompressed tar archive.
+
+    The archive is written as `<path>.part` and renamed to `path` when closed. Since tar archives are
+    sequences of members, resuming continues any archive, even one left behind by a crash, after its last
+    complete member, see `recover`.
+    """
+
+    def __init__(self, path: str, manifest: bool = False, resume: bool = False):
+        """
+        Initialize, with a manifest next to the archive if `manifest` or `resume`, see `Manifest`.
+        """
+        self.path, self.part, self.mtime = path, f"{path}.part", int(time.time())
+        if resume and os.path.exists(path):
+            os.replace(path, self.part)
+        names, end = set(), 0
+        if resume and os.path.exists(self.part):
+            names, end = recover(self.part)
+        self.file = open(self.part, "r+b" if end else "wb")
+        self.file.truncate(end)
+        self.file.seek(end)
+        self.archive = tarfile.open(fileobj=self.file, mode="w")
+        self.manifest = None
+        if manifest or resume:
+            self.manifest = Manifest(f"{path}.{MANIFEST}", resume, names)
+
+    def write(self, name: str, data: bytes, digest: str = "") -> None:
+        """
+        Write image `data` as archive member `name`, and record it in the manifest as the qr code of `digest`, if given.
+        """
+        info = tarfile.TarInfo(name)
+        info.size, info.mtime = len(data), self.mtime
+        self.archive.addfile(info, io.BytesIO(data))
+        if digest and self.manifest is not None:
+            self.manifest.add(digest, name)
+
+    def flush(self) -> None:
+        """
+        Flush the archive and the manifest, so that all members written so far survive a crash of the process.
+        """
+        self.file.flush()
+        super().flush()
+
+    def close(self) -> None:
+        """
+        Write the end of the archive and move it to its final name.
+        """
+        self.archive.close()
+        self.file.close()
+        DirectoryWriter.close(self)
+        os.replace(self.part, self.path)
+
+
+def recover(file_name: str) -> tuple:
+    """
+    Return the names of the complete members of the tar archive `file_name`,
+    which may be truncated, and the offset right after the last of them.
+    """
+    names, end, size = set(), 0, os.path.getsize(file_name)
+    try:
+        with tarfile.open(file_name, "r:") as archive:
+            for info in archive:
+                stop = info.offset_data + -(-info.size // BLOCK) * BLOCK
+                if stop > size:
+                    break
+                names.add(info.name)
+                end = stop
+    except tarfile.ReadError:
+        pass
+    return names, end
+
+
+def open_writer(
+    path: str, shard: bool = False, manifest: bool = False, resume: bool = False
+) -> DirectoryWriter:
+    """
+    Return a zip or tar writer if `path` ends in `.zip` or `.tar`, and a directory writer otherwise,
+    sharded if `shard`. With `manifest`, the writer records the location of each qr code,
+    and with `resume`, it takes over the manifest and the files of a previous run, see `Manifest`.
+    """
+    archives = {".zip": ZipWriter, ".tar": TarWriter}
+    writer = archives.get(os.path.splitext(path)[1].lower())
+    if writer is None:
+        writer = ShardedWriter if shard else DirectoryWriter
+    elif shard:
+        raise ValueError("only output directories can be sharded")
+    return writer(path, manifest, resume)
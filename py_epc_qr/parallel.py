@@ -0,0 +1,105 @@
+"""Multi-core rendering of many epc qr codes with a process pool."""
+
+import os
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+result = namedtuple("Result", ["index", "value", "error"])
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Yield lists of at most `size` consecutive `(index, item)` pairs.
+    """
+    numbered = enumerate(items)
+    while chunk := list(islice(numbered, size)):
+        yield chunk
+
+
+def _run_chunk(func: Callable, chunk: list) -> list:
+    """
+    Apply `func` to every item of `chunk`, catching the exception of each item separately.
+    Returns plain `(index, value, error)` tuples, which unlike `result` pickle by value.
+    """
+    results = []
+    for index, item in chunk:
+        try:
+            results.append((index, func(item), None))
+        except Exception as e:
+            results.append((index, None, e))
+    return results
+
+
+def imap(
+    func: Callable,
+    items: Iterable,
+    workers: int = None,
+    chunksize: int = 16,
+    ordered: bool = True,
+    initializer: Callable = None,
+    initargs: tuple = (),
+) -> Iterator[result]:
+    """
+    Apply `func` to each of `items` using `workers` processes (default: all cores).
+
+    Items are sent to the workers in chunks of `chunksize`, and at most two chunks per worker are in flight,
+    so `items` may be an arbitrarily long iterator.
+    Yields a namedtuple of kind `result` per item, whose `error` is `None` on success;
+    unless `ordered`, results are yielded as soon as their chunk is done.
+    `func` must be picklable, i.e. defined at module level.
+    If given, `initializer(*initargs)` is called once in every worker before any item, e.g. to hand over
+    data that all items share, which is thus sent only once per worker instead of once per chunk.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunked(items, chunksize)
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for chunk in chunks:
+            yield from map(result._make, _run_chunk(func, chunk))
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as pool:
+        pending = deque(
+            pool.submit(_run_chunk, func, chunk)
+            for chunk in islice(chunks, 2 * workers)
+        )
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                yield from map(result._make, future.result())
+                for chunk in islice(chunks, 1):
+                    pending.append(pool.submit(_run_chunk, func, chunk))
+
+
+def render(epc, fmt: str = "png") -> bytes:
+    """
+    Return the qr code of `epc` in format `fmt`.
+    """
+    return epc.to_bytes(fmt)
+
+
+def render_many(
+    epcs: Iterable,
+    workers: int = None,
+    chunksize: int = 16,
+    ordered: bool = True,
+    fmt: str = "png",
+) -> Iterator[result]:
+    """
+    Render the qr codes of `epcs` in format `fmt` in parallel.
+
+    Yields a namedtuple of kind `result` per epc qr code, whose `value` holds the data on success
+    and whose `error` holds the exception raised otherwise; see `imap` for the remaining arguments.
+    """
+    return imap(partial(render, fmt=fmt), epcs, workers, chunksize, ordered)
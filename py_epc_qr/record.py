@@ -0,0 +1,203 @@
+"""
+Compact representations of many epc qr codes held in memory, e.g. for deduplication and grouping.
+
+An `epc_record` keeps the entries of a single code in slots and is immutable, so it is hashable and
+its EPC-compliant string is built at most once. An `epc_columns` keeps the entries of many codes
+as one list per entry instead.
+Neither validates its entries; they are validated when converted to `transaction.epc_qr`.
+"""
+
+from typing import Iterable, Iterator
+
+from py_epc_qr.constants import QR_VERSION, ROW_MAPPING
+from py_epc_qr.transaction import epc_qr
+
+# entries of `ROW_MAPPING` that differ between epc qr codes, in the order of the EPC-compliant string
+FIELDS = tuple(
+    name for name in ROW_MAPPING.values() if name not in ("bcd", "identification_code")
+)
+
+
+class epc_record:
+    """
+    Immutable epc qr code, whose entries are given as they appear in the EPC-compliant string,
+    e.g. the amount as `EUR12.30` and the encoding as `1`.
+
+    Records are equal if their EPC-compliant strings are.
+    """
+
+    __slots__ = FIELDS + ("_payload",)
+
+    def __init__(
+        self,
+        version: str,
+        encoding: str,
+        bic: str,
+        beneficiary: str,
+        iban: str,
+        amount: str,
+        purpose: str,
+        remittance_structured: str,
+        remittance_unstructured: str,
+        originator_information: str,
+    ):
+        """Initialize"""
+        entries = (
+            version,
+            encoding,
+            bic,
+            beneficiary,
+            iban,
+            amount,
+            purpose,
+            remittance_structured,
+            remittance_unstructured,
+            originator_information,
+        )
+        for name, value in zip(FIELDS, entries):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_payload", None)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("epc_record is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("epc_record is immutable")
+
+    def __reduce__(self) -> tuple:
+        return epc_record, self.entries()
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, epc_record):
+            return NotImplemented
+        return self.to_str() == other.to_str()
+
+    def __hash__(self) -> int:
+        return hash(self.to_str())
+
+    def __repr__(self) -> str:
+        entries = ", ".join(
+            f"{name}={value!r}" for name, value in zip(FIELDS, self.entries())
+        )
+        return f"epc_record({entries})"
+
+    def entries(self) -> tuple:
+        """
+        Return the entries in the order of `FIELDS`.
+        """
+        return tuple(getattr(self, name) for name in FIELDS)
+
+    def to_str(self) -> str:
+        """
+        Return EPC-compliant string, which is built on first use only.
+        """
+        if self._payload is None:
+            entries = self.entries()
+            object.__setattr__(
+                self,
+                "_payload",
+                "\n".join(("BCD",) + entries[:2] + ("SCT",) + entries[2:]),
+            )
+        return self._payload
+
+    def to_epc_qr(
+        self, qr_version: int = QR_VERSION, max_qr_version: int = None
+    ) -> epc_qr:
+        """
+        Return the validated `epc_qr` with these entries.
+        """
+        entries = dict(zip(FIELDS, self.entries()))
+        entries["amount"] = self.amount[3:]
+        return epc_qr(**entries, qr_version=qr_version, max_qr_version=max_qr_version)
+
+    @classmethod
+    def from_epc_qr(cls, epc: epc_qr):
+        """
+        Create from the entries of `epc`.
+        """
+        return cls(*(getattr(epc, name) for name in FIELDS))
+
+
+class epc_columns:
+    """
+    Epc qr codes stored by entry, with one list per name in `FIELDS` whose items belong to the same code by index.
+
+    Columns are meant for bulk operations on single entries, e.g. `validation.validate_column` on the ibans.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: dict = None):
+        """Initialize"""
+        columns = columns or {}
+        self.columns = {name: list(columns.get(name, ())) for name in FIELDS}
+        if len({len(column) for column in self.columns.values()}) > 1:
+            raise ValueError("columns must have the same length")
+
+    def __len__(self) -> int:
+        return len(self.columns["iban"])
+
+    def __getitem__(self, index: int) -> epc_record:
+        return epc_record(*(self.columns[name][index] for name in FIELDS))
+
+    def __iter__(self) -> Iterator[epc_record]:
+        for entries in zip(*self.columns.values()):
+            yield epc_record(*entries)
+
+    def column(self, name: str) -> list:
+        """
+        Return the entries `name` of all epc qr codes.
+        """
+        return self.columns[name]
+
+    def append(self, record: epc_record) -> None:
+        """
+        Add the entries of `record`.
+        """
+        for name in FIELDS:
+            self.columns[name].append(getattr(record, name))
+
+    def extend(self, records: Iterable[epc_record]) -> None:
+        """
+        Add the entries of all `records`.
+        """
+        for record in records:
+            self.append(record)
+
+    def to_strs(self) -> list:
+        """
+        Return the EPC-compliant strings of all epc qr codes.
+        """
+        return [
+            f"BCD\n{version}\n{encoding}\nSCT\n" + "\n".join(entries)
+            for version, encoding, *entries in zip(*self.columns.values())
+        ]
+
+    def to_epc_qrs(
+        self, qr_version: int = QR_VERSION, max_qr_version: int = None
+    ) -> Iterator[epc_qr]:
+        """
+        Yield the validated `epc_qr` of each code, see `epc_record.to_epc_qr`.
+        """
+        for record in self:
+            yield record.to_epc_qr(qr_version, max_qr_version)
+
+    @classmethod
+    def from_records(cls, records: Iterable[epc_record]):
+        """
+        Create from `epc_record` objects.
+        """
+        res = cls()
+        res.extend(records)
+        return res
+
+    @classmethod
+    def from_epc_qrs(cls, epcs: Iterable[epc_qr]):
+        """
+        Create from `epc_qr` objects.
+        """
+        res = cls()
+        for epc in epcs:
+            for name in FIELDS:
+                res.columns[name].append(getattr(epc, name))
+        return res
@@ -0,0 +1,103 @@
+"""
+Structured creditor references, in particular ISO 11649 RF creditor references such as `RF18539007547034`.
+
+An RF reference is `RF`, two check digits and up to 21 alphanumeric characters. Its check digits are computed
+like those of an iban, with the ISO 7064 mod 97-10 checksum of the reference with `RF` and the check digits
+moved to its end, see `iban.mod97`. The batch functions compute the checksums of whole invoice runs at once
+with numpy, see `iban.mod97_many`.
+"""
+
+from typing import Iterable
+
+from py_epc_qr.iban import mod97, mod97_many
+
+# maximal length of the structured remittance entry according to the EPC guidelines
+MAX_LENGTH = 35
+
+# maximal length of the reference proper, without `RF` and the check digits
+MAX_RF_LENGTH = 21
+
+
+def _rf_error(value: str) -> str:
+    """
+    Return the error code of the format of the RF reference `value`, ignoring its checksum.
+    """
+    if not (
+        5 <= len(value) <= 4 + MAX_RF_LENGTH
+        and value[2:4].isdigit()
+        and value.isupper()
+    ):
+        return "remittance_structured.rf_format"
+    return None
+
+
+def reference_error(value: str) -> str:
+    """
+    Return the error code of the structured remittance entry `value`, or `None` if it is valid.
+
+    Any alphanumeric reference of up to 35 characters is accepted, but one starting with `RF` must be
+    a valid ISO 11649 RF creditor reference in electronic format, i.e. upper case without spaces.
+    """
+    if not value.isascii() or not value.isalnum() or len(value) > MAX_LENGTH:
+        return "remittance_structured.format"
+    if value.startswith("RF"):
+        if (code := _rf_error(value)) is not None:
+            return code
+        if mod97(value) != 1:
+            return "remittance_structured.rf_checksum"
+    return None
+
+
+def creditor_reference(value: str) -> str:
+    """
+    Return the RF creditor reference of `value`, i.e. of up to 21 upper case letters and digits such as an invoice number,
+    e.g. `RF18539007547034` of `539007547034`.
+    """
+    reference = f"RF00{value}"
+    if not value or not reference.isascii() or _rf_error(reference) is not None:
+        raise ValueError(
+            f"`{value}` must consist of 1 to {MAX_RF_LENGTH} digits or upper case letters"
+        )
+    return f"RF{98 - mod97(reference):02d}{value}"
+
+
+def creditor_references(values: Iterable[str]) -> list:
+    """
+    Return the RF creditor references of all `values` like `creditor_reference`, with their checksums computed at once.
+    """
+    values = list(values)
+    for value in values:
+        if not value or not value.isascii() or _rf_error(f"RF00{value}") is not None:
+            creditor_reference(value)
+    if not values:
+        return []
+    checksums = mod97_many([f"RF00{value}" for value in values]).tolist()
+    return [
+        f"RF{98 - checksum:02d}{value}" for checksum, value in zip(checksums, values)
+    ]
+
+
+def validate_references(values: Iterable[str]) -> list:
+    """
+    Return `(index, code)` for each of the structured remittance entries `values` that is invalid, see `reference_error`.
+    Empty entries are valid, and the checksums of all well-formed RF references are computed at once.
+    """
+    errors, rf = [], []
+    for index, value in enumerate(values):
+        if not value:
+            continue
+        if not value.isascii() or not value.isalnum() or len(value) > MAX_LENGTH:
+            errors.append((index, "remittance_structured.format"))
+        elif value.startswith("RF"):
+            if (code := _rf_error(value)) is not None:
+                errors.append((index, code))
+            else:
+                rf.append((index, value))
+    if rf:
+        checksums = mod97_many([value for _, value in rf]).tolist()
+        errors.extend(
+            (index, "remittance_structured.rf_checksum")
+            for (index, _), checksum in zip(rf, checksums)
+            if checksum != 1
+        )
+    return sorted(errors)
@@ -0,0 +1,126 @@
+"""
+Render qr code module matrices to images in memory.
+
+Apart from `to_image`, the renderers write their formats straight from the module matrix with numpy and zlib,
+so neither Pillow nor the qrcode library is imported on this path.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+
+def to_image(modules: np.ndarray, box_size: int = 10, border: int = 4):
+    """
+    Return the module matrix as Pillow image with `box_size` pixels per module and a quiet zone of `border` modules.
+    """
+    from qrcode.image.pil import PilImage
+
+    img = PilImage(
+        border=border, width=len(modules), box_size=box_size, qrcode_modules=None
+    )
+    for row, col in zip(*modules.nonzero()):
+        img.drawrect(row, col)
+    return img
+
+
+def to_pixels(modules: np.ndarray, box_size: int = 10, border: int = 4) -> np.ndarray:
+    """
+    Return the module matrix scaled to `box_size` pixels per module and surrounded by a quiet zone of `border` modules,
+    where `True` is dark.
+    """
+    return np.pad(modules, border).repeat(box_size, axis=0).repeat(box_size, axis=1)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    """
+    Return a png chunk of `kind` with length and checksum.
+    """
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+def to_png(modules: np.ndarray, box_size: int = 10, border: int = 4) -> bytes:
+    """
+    Return the module matrix as 1-bit grayscale png data.
+
+    Rows repeating the row above, which is most of them, use the `Up` filter and thus turn into zeros,
+    while all other rows are left unfiltered.
+    """
+    rows = np.packbits(~to_pixels(modules, box_size, border), axis=1)
+    repeated = np.zeros(len(rows), dtype=bool)
+    repeated[1:] = (rows[1:] == rows[:-1]).all(axis=1)
+    rows[repeated] = 0
+    scanlines = np.hstack((np.where(repeated, 2, 0).astype(np.uint8)[:, None], rows))
+    width = len(modules) + 2 * border
+    return b"".join(
+        (
+            b"\x89PNG\r\n\x1a\n",
+            _png_chunk(
+                b"IHDR",
+                struct.pack(">IIBBBBB", *2 * (width * box_size,), 1, 0, 0, 0, 0),
+            ),
+            _png_chunk(b"IDAT", zlib.compress(scanlines.tobytes())),
+            _png_chunk(b"IEND", b""),
+        )
+    )
+
+
+def to_pbm(modules: np.ndarray, box_size: int = 10, border: int = 4) -> bytes:
+    """
+    Return the module matrix as binary portable bitmap (pbm) data.
+    """
+    pixels = to_pixels(modules, box_size, border)
+    header = f"P4\n{len(pixels)} {len(pixels)}\n".encode("ascii")
+    return header + np.packbits(pixels, axis=1).tobytes()
+
+
+def to_svg(modules: np.ndarray, box_size: int = 10, border: int = 4) -> bytes:
+    """
+    Return the module matrix as svg data, drawing each horizontal run of dark modules as one rectangle of a single path.
+    """
+    edges = np.diff(modules.astype(np.int8), axis=1, prepend=0, append=0)
+    rows, starts = np.nonzero(edges == 1)
+    ends = np.nonzero(edges == -1)[1]
+    path = "".join(
+        f"M{start + border} {row + border}h{end - start}v1h{start - end}z"
+        for row, start, end in zip(rows.tolist(), starts.tolist(), ends.tolist())
+    )
+    size = len(modules) + 2 * border
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size * box_size}" height="{size * box_size}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{path}" fill="#000"/></svg>\n'
+    ).encode("utf-8")
+
+
+def to_matrix(modules: np.ndarray, box_size: int = 10, border: int = 4) -> bytes:
+    """
+    Return the module matrix as raw 1-bit data, where each row is packed into whole bytes with the first module
+    in the most significant bit, and dark modules are set.
+    Scaling and quiet zone do not apply to raw data, so `box_size` and `border` are ignored.
+    """
+    return np.packbits(modules, axis=1).tobytes()
+
+
+FORMATS = {"png": to_png, "svg": to_svg, "pbm": to_pbm, "matrix": to_matrix}
+
+EXTENSIONS = {"png": "png", "svg": "svg", "pbm": "pbm", "matrix": "bin"}
+
+
+def render(
+    modules: np.ndarray, fmt: str = "png", box_size: int = 10, border: int = 4
+) -> bytes:
+    """
+    Return the module matrix in format `fmt`, see `FORMATS`.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format `{fmt}` (choose from {list(FORMATS)})")
+    return FORMATS[fmt](modules, box_size, border)
@@ -0,0 +1,306 @@
+"""
+Print sheets of many epc qr codes, tiled onto pages and written as multi-page PDF or TIFF.
+
+The pages are composed as 1-bit pixel arrays straight from the module matrices, see `render.to_pixels`,
+and are rendered in parallel by `parallel.imap`. Both writers stream the pages one by one,
+so at most a few pages are held in memory however many qr codes there are.
+Pillow is only imported to draw the captions below the qr codes.
+"""
+
+import struct
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+from itertools import islice
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+import numpy as np
+
+from py_epc_qr.parallel import imap
+from py_epc_qr.render import to_pixels
+
+# width and height of the supported pages in millimeters
+PAGE_SIZES = {"a4": (210, 297), "a5": (148, 210), "letter": (215.9, 279.4)}
+
+# quiet zone around each qr code in modules
+BORDER = 4
+
+sheet_layout = namedtuple(
+    "SheetLayout", ["width", "height", "columns", "rows", "margin", "dpi", "font_size"]
+)
+
+
+def page_layout(
+    page_size: str = "a4",
+    columns: int = 3,
+    rows: int = 7,
+    margin: float = 10,
+    dpi: int = 300,
+    font_size: float = 8,
+) -> sheet_layout:
+    """
+    Return a namedtuple of kind `sheet_layout` with `columns` times `rows` qr codes per page of `page_size`,
+    see `PAGE_SIZES`, where page size and `margin` in millimeters and `font_size` in points
+    are converted to pixels at `dpi`.
+    """
+    if page_size not in PAGE_SIZES:
+        raise ValueError(f"The page size {page_size} is not supported.")
+    if columns < 1 or rows < 1 or dpi < 1:
+        raise ValueError("columns, rows and dpi must be positive")
+    width, height = (round(mm / 25.4 * dpi) for mm in PAGE_SIZES[page_size])
+    margin = round(margin / 25.4 * dpi)
+    if not 0 <= 2 * margin < min(width, height):
+        raise ValueError(f"the margin does not fit on a page of size {page_size}")
+    font_size = round(font_size / 72 * dpi)
+    return sheet_layout(width, height, columns, rows, margin, dpi, font_size)
+
+
+def caption_lines(epc) -> list:
+    """
+    Return the default caption of `epc`, its beneficiary and amount.
+    """
+    return [epc.beneficiary, f"{epc.amount[3:]} EUR"]
+
+
+@lru_cache(maxsize=None)
+def _font(size: int):
+    """
+    Return Pillow's default font in `size` pixels, or its fixed-size bitmap font in old versions of Pillow.
+    """
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def draw_caption(lines: list, width: int, font_size: int) -> np.ndarray:
+    """
+    Return the centered text `lines` as pixels of `width`, where `True` is dark.
+    """
+    from PIL import Image, ImageDraw
+
+    font, height = _font(font_size), round(font_size * 1.25)
+    img = Image.new("1", (width, height * len(lines)), 0)
+    draw = ImageDraw.Draw(img)
+    for index, line in enumerate(lines):
+        left = (width - draw.textlength(line, font=font)) // 2
+        draw.text((max(left, 0), index * height), line, fill=1, font=font)
+    return np.asarray(img, dtype=bool)
+
+
+def compose_page(item: tuple) -> np.ndarray:
+    """
+    Return a page of `item`, i.e. `(epcs, captions, layout)`, as rows of packed bits where 1 is dark.
+    The `layout` is given as plain tuple, which unlike `sheet_layout` pickles by value.
+
+    The qr codes are tiled row by row into the cells of the `sheet_layout`, each scaled to the largest
+    whole number of pixels per module that fits its cell together with its lines of `captions`, if any.
+    """
+    epcs, captions, layout = item
+    layout = sheet_layout._make(layout)
+    page = np.zeros((layout.height, layout.width), dtype=bool)
+    cell_width = (layout.width - 2 * layout.margin) // layout.columns
+    cell_height = (layout.height - 2 * layout.margin) // layout.rows
+    for index, epc in enumerate(epcs):
+        row, col = divmod(index, layout.columns)
+        top = layout.margin + row * cell_height
+        left = layout.margin + col * cell_width
+        text = (
+            draw_caption(captions[index], cell_width, layout.font_size)
+            if captions
+            else np.zeros((0, cell_width), dtype=bool)
+        )
+        modules = epc.to_matrix()
+        box_size = min(cell_width, cell_height - len(text)) // (
+            len(modules) + 2 * BORDER
+        )
+        if box_size < 1:
+            raise ValueError("the cells of the page are too small for the qr codes")
+        pixels = to_pixels(modules, box_size, BORDER)
+        size = len(pixels)
+        y = top + (cell_height - size - len(text)) // 2
+        x = left + (cell_width - size) // 2
+        page[y : y + size, x : x + size] = pixels
+        page[y + size : y + size + len(text), left : left + cell_width] = text
+    return np.packbits(page, axis=1)
+
+
+def write_pdf(pages: Iterable[np.ndarray], file: BinaryIO, layout: sheet_layout) -> int:
+    """
+    Write the packed `pages` to `file` as PDF, each as one 1-bit image filling the page, and return their number.
+
+    Every page is written as soon as it is given; only the page tree, catalog and cross-reference table,
+    which refer to all pages, are written at the end.
+    """
+    offsets, position = {}, 0
+
+    def write(data: bytes) -> None:
+        nonlocal position
+        file.write(data)
+        position += len(data)
+
+    def write_object(number: int, body: bytes, stream: bytes = None) -> None:
+        offsets[number] = position
+        if stream is None:
+            write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        else:
+            body = b"<< %s /Length %d >>" % (body, len(stream))
+            write(
+                b"%d 0 obj\n%s\nstream\n%s\nendstream\nendobj\n"
+                % (number, body, stream)
+            )
+
+    width, height = (72 * pixels / layout.dpi for pixels in layout[:2])
+    box = b"[0 0 %.2f %.2f]" % (width, height)
+    write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    kids = []
+    for number, packed in enumerate(pages, start=1):
+        image, contents, page = 3 * number, 3 * number + 1, 3 * number + 2
+        write_object(
+            image,
+            b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+            b"/BitsPerComponent 1 /Decode [1 0] /Filter /FlateDecode"
+            % (layout.width, layout.height),
+            zlib.compress(packed.tobytes()),
+        )
+        write_object(
+            contents, b"", b"q %.2f 0 0 %.2f 0 0 cm /Im0 Do Q" % (width, height)
+        )
+        write_object(
+            page,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox %s /Resources << /XObject << /Im0 %d 0 R >> >> "
+            b"/Contents %d 0 R >>" % (box, image, contents),
+        )
+        kids.append(b"%d 0 R" % page)
+    if not kids:
+        raise ValueError("a pdf file needs at least one page")
+    write_object(
+        2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+    )
+    write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    xref, size = position, max(offsets) + 1
+    write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+    for number in range(1, size):
+        write(b"%010d 00000 n \n" % offsets[number])
+    write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+    )
+    return len(kids)
+
+
+def _ifd_entry(tag: int, kind: int, value: int) -> bytes:
+    """
+    Return a TIFF directory entry of `tag` with a single `value` of `kind`, 3 for short and 4 for long,
+    or the offset of a rational for 5.
+    """
+    if kind == 3:
+        return struct.pack("<HHIHH", tag, kind, 1, value, 0)
+    return struct.pack("<HHII", tag, kind, 1, value)
+
+
+def write_tiff(
+    pages: Iterable[np.ndarray], file: BinaryIO, layout: sheet_layout
+) -> int:
+    """
+    Write the packed `pages` to the seekable `file` as multi-page bilevel TIFF with Deflate compression,
+    and return their number.
+
+    Every page is written as soon as it is given, and the link from the directory of the previous page
+    to that of the new one is patched in place.
+    """
+    file.write(b"II*\x00\x00\x00\x00\x00")
+    link, count = 4, 0
+    for packed in pages:
+        data = zlib.compress(packed.tobytes())
+        strip = file.tell()
+        file.write(data + b"\x00" * (len(data) % 2))
+        resolution = file.tell()
+        file.write(struct.pack("<II", layout.dpi, 1))
+        directory = file.tell()
+        file.seek(link)
+        file.write(struct.pack("<I", directory))
+        file.seek(directory)
+        entries = [
+            _ifd_entry(254, 4, 2),  # page of a multi-page document
+            _ifd_entry(256, 4, layout.width),
+            _ifd_entry(257, 4, layout.height),
+            _ifd_entry(258, 3, 1),  # bits per sample
+            _ifd_entry(259, 3, 8),  # deflate
+            _ifd_entry(262, 3, 0),  # white is zero
+            _ifd_entry(273, 4, strip),
+            _ifd_entry(277, 3, 1),  # samples per pixel
+            _ifd_entry(278, 4, layout.height),  # rows per strip
+            _ifd_entry(279, 4, len(data)),
+            _ifd_entry(282, 5, resolution),
+            _ifd_entry(283, 5, resolution),
+            _ifd_entry(296, 3, 2),  # inch
+        ]
+        file.write(struct.pack("<H", len(entries)) + b"".join(entries))
+        link = file.tell()
+        file.write(b"\x00\x00\x00\x00")
+        count += 1
+    if not count:
+        raise ValueError("a tiff file needs at least one page")
+    return count
+
+
+WRITERS = {"pdf": write_pdf, "tiff": write_tiff}
+
+ALIASES = {"tif": "tiff"}
+
+
+def resolve_format(file_name: str, fmt: str = "") -> str:
+    """
+    Return the sheet format `fmt`, or the one inferred from the extension of `file_name` if `fmt` is empty.
+    """
+    if not fmt:
+        fmt = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
+        fmt = ALIASES.get(fmt, fmt)
+    if fmt not in WRITERS:
+        raise ValueError(
+            f"The sheet format of {file_name} is not supported, use one of {', '.join(WRITERS)}."
+        )
+    return fmt
+
+
+def _pages(epcs: Iterable, layout: sheet_layout, caption: Callable) -> Iterator[tuple]:
+    """
+    Yield the items of `compose_page`, one per page of `epcs`.
+    """
+    epcs = iter(epcs)
+    while chunk := list(islice(epcs, layout.columns * layout.rows)):
+        captions = [caption(epc) for epc in chunk] if caption else None
+        yield chunk, captions, tuple(layout)
+
+
+def compose(
+    epcs: Iterable,
+    file_name: str,
+    fmt: str = "",
+    layout: sheet_layout = None,
+    caption: Callable = caption_lines,
+    workers: int = 1,
+) -> int:
+    """
+    Write the qr codes of `epcs` as print sheet of `layout` (default: `page_layout()`) to `file_name`
+    and return the number of pages.
+
+    The format `fmt` is one of `WRITERS`, inferred from the extension of `file_name` if empty.
+    Each qr code is captioned with the lines returned by `caption`, unless it is `None`.
+    The pages are composed by `workers` processes (0 uses all cores), see `parallel.imap`,
+    and `epcs` may be an arbitrarily long iterator.
+    """
+    fmt = resolve_format(file_name, fmt)
+    layout = layout or page_layout()
+
+    def pages() -> Iterator[np.ndarray]:
+        for res in imap(compose_page, _pages(epcs, layout, caption), workers, 1):
+            if res.error is not None:
+                raise res.error
+            yield res.value
+
+    with open(file_name, "wb") as file:
+        return WRITERS[fmt](pages(), file, layout)
@@ -1,23 +1,42 @@
 """Core functionality that converts epc qr code format to qr code image."""
 
-import qrcode
-import yaml
+import os
 
+from py_epc_qr import metrics
+from py_epc_qr.amount import format_cents, parse_amount
+from py_epc_qr.cache import cache_key
 from py_epc_qr.checks import (
     check_amount,
     check_beneficiary,
+    check_bic,
     check_encoding,
     check_iban,
+    check_originator_information,
+    check_payload,
+    check_purpose,
+    check_qr_version,
+    check_remittance_structured,
     check_remittance_unstructured,
     check_version,
     validate,
 )
-from py_epc_qr.constants import ALLOWED_KEYS, ENCODINGS, ROW_MAPPING
+from py_epc_qr.constants import (
+    ALLOWED_KEYS,
+    ENCODINGS,
+    OPTIONAL_KEYS,
+    QR_VERSION,
+    ROW_MAPPING,
+)
+from py_epc_qr.encoder import ERROR_CORRECT_M, choose_version, encode, matrix_version
+from py_epc_qr.render import render, to_image
 
 
 class epc_qr:
     """
     Class containing epc qr code specification and its conversion to image/text.
+
+    The qr code is built with version `qr_version`, or the smallest version that fits if it is `None`,
+    and growing up to `max_qr_version` (`None` for no limit; the EPC guidelines allow up to `MAX_QR_VERSION`).
     """
 
     def __init__(
@@ -32,58 +51,207 @@ class epc_qr:
         remittance_structured: str,
         remittance_unstructured: str,
         originator_information: str,
+        qr_version: int = QR_VERSION,
+        max_qr_version: int = None,
     ):
         """Initialize"""
-        self.bcd = "BCD"
-        self.bic = bic
-        self.version = version
-        self.encoding = encoding
-        self.identification_code = "SCT"
-        self.beneficiary = beneficiary
-        self.iban = iban
-        self.amount = amount
-        self.purpose = purpose
-        self.remittance_structured = remittance_structured
-        self.remittance_unstructured = remittance_unstructured
-        self.originator_information = originator_information
+        with metrics.timer("validate"):
+            self.bcd = "BCD"
+            self.bic = bic
+            self.version = version
+            self.encoding = encoding
+            self.identification_code = "SCT"
+            self.beneficiary = beneficiary
+            self.iban = iban
+            self.amount = amount
+            self.purpose = purpose
+            self.remittance_structured = remittance_structured
+            self.remittance_unstructured = remittance_unstructured
+            self.originator_information = originator_information
+            self.qr_version = qr_version
+            self.max_qr_version = max_qr_version
+            # the entries are valid on their own, but must also fit into the payload as a whole
+            self.to_encoded()
 
     def to_txt(self, file_name: str = "qr_source.txt") -> None:
         """
         Write EPC-compliant string to text file `file_name`
         """
         with open(file_name, "w", encoding=self.resolve_encoding()) as file:
-            for key, value in ROW_MAPPING.items():
-                file.write(self.__getattribute__(value))
-                if key < 12:
-                    file.write("\n")
+            file.write(self.to_str())
 
     def to_str(self) -> str:
         """
         Write EPC-compliant string.
         """
-        res = ""
-        for key, value in ROW_MAPPING.items():
-            res += self.__getattribute__(value)
-            if key < 12:
-                res += "\n"
-        return res
+        return "\n".join([getattr(self, name) for name in ROW_MAPPING.values()])
+
+    def to_encoded(self) -> bytes:
+        """
+        Return EPC-compliant string encoded in the character set given by the encoding entry,
+        which must not exceed `MAX_PAYLOAD_BYTES` as a whole.
+        """
+        payload = self.to_str().encode(self.resolve_encoding())
+        validate(check_payload(payload))
+        return payload
+
+    def to_matrix(self):
+        """
+        Return EPC-compliant string as qr code module matrix, see `encoder.encode` and `to_encoded`.
+        """
+        with metrics.timer("encode"):
+            modules = encode(
+                self.to_encoded(),
+                version=self.qr_version,
+                error_correction=ERROR_CORRECT_M,
+                max_version=self.max_qr_version or 40,
+            )
+        metrics.count("qr_versions", version=matrix_version(modules))
+        return modules
+
+    def fit_qr_version(self) -> int:
+        """
+        Return the version of the qr code built from EPC-compliant string, without building it.
+        """
+        return choose_version(
+            self.to_encoded(),
+            version=self.qr_version,
+            error_correction=ERROR_CORRECT_M,
+            max_version=self.max_qr_version or 40,
+        )
+
+    def to_image(self):
+        """
+        Return EPC-compliant string as qr code image.
+        """
+        modules = self.to_matrix()
+        with metrics.timer("render", fmt="pillow"):
+            return to_image(modules)
+
+    def _render(self, fmt: str) -> bytes:
+        """
+        Return EPC-compliant string as qr code in format `fmt`.
+        """
+        modules = self.to_matrix()
+        with metrics.timer("render", fmt=fmt):
+            data = render(modules, fmt)
+        metrics.count("codes_rendered", fmt=fmt)
+        return data
+
+    def render_key(self, fmt: str = "png") -> str:
+        """
+        Return the key of the qr code in format `fmt` in a `cache.RenderCache`,
+        which covers everything that determines the rendered data.
+        """
+        return cache_key(
+            self.to_str(),
+            fmt=fmt,
+            qr_version=self.qr_version,
+            max_qr_version=self.max_qr_version,
+        )
+
+    def to_bytes(self, fmt: str = "png", cache=None) -> bytes:
+        """
+        Return EPC-compliant string as qr code in format `fmt` (png, svg or matrix),
+        without touching the file system.
+        If a `cache.RenderCache` is given, repeated payloads are looked up instead of rendered again.
+        """
+        if cache is None:
+            return self._render(fmt)
+        return cache.fetch(self.render_key(fmt), lambda: self._render(fmt))
+
+    def to_buffer(self, buffer, fmt: str = "png", cache=None) -> None:
+        """
+        Write EPC-compliant string as qr code in format `fmt` to the writable binary `buffer`.
+        """
+        data = self.to_bytes(fmt, cache)
+        with metrics.timer("write"):
+            buffer.write(data)
+        metrics.count("bytes_written", len(data))
 
     def to_qr(self, file_name: str = "qr.png"):
         """
         Write EPC-compliant string to png image `file_name`
         """
-        qr = qrcode.QRCode(
-            version=6,
-            error_correction=qrcode.constants.ERROR_CORRECT_M,
-        )
-        qr.add_data(self.to_str())
-        qr.make()
-        img = qr.make_image()
-        img.save(file_name)
+        img = self.to_image()
+        with metrics.timer("write"):
+            img.save(file_name)
+        metrics.count("codes_rendered", fmt="pillow")
+        if metrics.registry.enabled:
+            metrics.count("bytes_written", os.path.getsize(file_name))
         print("created image")
 
+    @classmethod
+    def from_encoded(cls, payload: bytes):
+        """
+        Create from EPC-compliant string encoded in the character set given by its encoding entry, see `ENCODINGS`.
+        """
+        lines = payload.split(b"\n", 3)
+        try:
+            encoding = ENCODINGS[int(lines[2])]
+        except (IndexError, KeyError, ValueError):
+            raise ValueError("payload has no valid encoding entry")
+        return cls.from_str(payload.decode(encoding))
+
+    @classmethod
+    def from_str(cls, payload: str):
+        """
+        Create from EPC-compliant string, whose lines are assigned to the entries by `ROW_MAPPING`.
+        Trailing empty lines may be omitted.
+        """
+        lines = payload.replace("\r\n", "\n").split("\n")
+        if len(lines) > len(ROW_MAPPING):
+            raise ValueError(f"payload has more than {len(ROW_MAPPING)} lines")
+        values = dict(zip(ROW_MAPPING.values(), lines + [""] * len(ROW_MAPPING)))
+        if values["bcd"] != "BCD" or values["identification_code"] != "SCT":
+            raise ValueError("payload is not an EPC-compliant string")
+        if not values["amount"].startswith("EUR"):
+            raise ValueError(f"invalid amount `{values['amount']}`")
+        return epc_qr(
+            version=values["version"],
+            encoding=values["encoding"],
+            bic=values["bic"],
+            beneficiary=values["beneficiary"],
+            iban=values["iban"],
+            amount=values["amount"][3:],
+            purpose=values["purpose"],
+            remittance_structured=values["remittance_structured"],
+            remittance_unstructured=values["remittance_unstructured"],
+            originator_information=values["originator_information"],
+        )
+
     # Properties of class
 
+    @property
+    def qr_version(self) -> int:
+        """
+        Return qr code version.
+        """
+        return self.__qr_version
+
+    @qr_version.setter
+    def qr_version(self, value: int):
+        """
+        Set and validate qr code version.
+        """
+        validate(check_qr_version(value))
+        self.__qr_version = value
+
+    @property
+    def max_qr_version(self) -> int:
+        """
+        Return largest qr code version.
+        """
+        return self.__max_qr_version
+
+    @max_qr_version.setter
+    def max_qr_version(self, value: int):
+        """
+        Set and validate largest qr code version.
+        """
+        validate(check_qr_version(value))
+        self.__max_qr_version = value
+
     @property
     def version(self) -> str:
         """
@@ -99,6 +267,23 @@ class epc_qr:
         validate(check_version(value, self.bic))
         self.__version = value
 
+    @property
+    def bic(self) -> str:
+        """
+        Return EPC bic entry.
+        """
+        return self.__bic
+
+    @bic.setter
+    def bic(self, value: str) -> None:
+        """
+        Set and validate EPC bic entry, which version 001 requires.
+        """
+        validate(check_bic(value))
+        if hasattr(self, "version"):
+            validate(check_version(self.version, value))
+        self.__bic = value
+
     @property
     def amount(self) -> str:
         """
@@ -111,8 +296,10 @@ class epc_qr:
         """
         Set and validate EPC amount entry.
         """
-        validate(check_amount(value))
-        self.__amount = "EUR{:.2f}".format(float(value))
+        number, code = parse_amount(value)
+        if code is not None:
+            validate(check_amount(value))
+        self.__amount = format_cents(number)
 
     @property
     def encoding(self) -> str:
@@ -165,6 +352,23 @@ class epc_qr:
         validate(check_iban(value))
         self.__iban = value
 
+    @property
+    def remittance_structured(self) -> str:
+        """
+        Return EPC structured remittance entry.
+        """
+        return self.__remittance_structured
+
+    @remittance_structured.setter
+    def remittance_structured(self, value) -> None:
+        """
+        Set and validate EPC structured remittance entry, e.g. an RF creditor reference.
+        """
+        validate(check_remittance_structured(value))
+        if value and getattr(self, "remittance_unstructured", ""):
+            validate(check_remittance_unstructured(self.remittance_unstructured, value))
+        self.__remittance_structured = value
+
     @property
     def remittance_unstructured(self) -> str:
         """
@@ -177,37 +381,103 @@ class epc_qr:
         """
         Set and validate EPC unstructured remittance entry.
         """
-        validate(check_remittance_unstructured(value))
+        structured = getattr(self, "remittance_structured", "")
+        validate(check_remittance_unstructured(value, structured))
         self.__remittance_unstructured = value
 
+    @property
+    def purpose(self) -> str:
+        """
+        Return EPC purpose entry.
+        """
+        return self.__purpose
+
+    @purpose.setter
+    def purpose(self, value: str) -> None:
+        """
+        Set and validate EPC purpose entry, an ISO 20022 purpose code such as `CHAR`.
+        """
+        validate(check_purpose(value))
+        self.__purpose = value
+
+    @property
+    def originator_information(self) -> str:
+        """
+        Return EPC beneficiary to originator information entry.
+        """
+        return self.__originator_information
+
+    @originator_information.setter
+    def originator_information(self, value: str) -> None:
+        """
+        Set and validate EPC beneficiary to originator information entry.
+        """
+        validate(check_originator_information(value))
+        self.__originator_information = value
+
 
 class consumer_epc_qr(epc_qr):
     """
     Standard consumer EPC QR code for IBAN-based wire transfer within European economic area.
+
+    The transfer carries either the unstructured `remittance` or the structured `reference`,
+    e.g. an RF creditor reference, see `reference.creditor_reference`. Optionally, it names the `bic`
+    of the beneficiary's bank, which `version` 001 requires, the ISO 20022 `purpose` code and
+    the `originator_information` shown to the originator.
     """
 
-    def __init__(self, beneficiary: str, iban: str, amount: float, remittance: str):
+    def __init__(
+        self,
+        beneficiary: str,
+        iban: str,
+        amount: float,
+        remittance: str = "",
+        qr_version: int = QR_VERSION,
+        max_qr_version: int = None,
+        reference: str = "",
+        bic: str = "",
+        purpose: str = "",
+        originator_information: str = "",
+        version: str = "002",
+    ):
         """Initialize"""
         super().__init__(
-            version="002",
+            version=version,
             encoding=1,
-            bic="",
+            bic=bic,
             beneficiary=beneficiary,
             iban=iban,
             amount=amount,
-            purpose="",
-            remittance_structured="",
+            purpose=purpose,
+            remittance_structured=reference,
             remittance_unstructured=remittance,
-            originator_information="",
+            originator_information=originator_information,
+            qr_version=qr_version,
+            max_qr_version=max_qr_version,
         )
 
     @classmethod
     def from_yaml(cls, file_name: str):
         """Create from yaml file"""
+        import yaml
+
         with open(file_name, "r") as file:
             data = yaml.safe_load(file)
-        if not sorted(list(data.keys())) == sorted(ALLOWED_KEYS):
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Create from dictionary with entries `ALLOWED_KEYS` and optionally `OPTIONAL_KEYS`,
+        where `reference` may be given in addition to or instead of `remittance`
+        """
+        keys, required = set(data), set(ALLOWED_KEYS) - {"remittance"}
+        if not (
+            required <= keys <= set(ALLOWED_KEYS + OPTIONAL_KEYS)
+            and keys & {"remittance", "reference"}
+        ):
             raise AssertionError(
-                f"yaml template has incorrect entries (allowed are {ALLOWED_KEYS})"
+                f"template has incorrect entries (allowed are {ALLOWED_KEYS}, "
+                f"optionally {OPTIONAL_KEYS}, where `reference` may replace `remittance`)"
             )
         return cls(**data)
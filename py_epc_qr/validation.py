@@ -0,0 +1,378 @@
+"""
+Single-pass validation of whole epc qr code records.
+
+Every entry is checked by a rule that returns `None` if the value is valid, or an error code otherwise.
+Rules never build exceptions; these are only created on demand by `to_error`,
+which keeps validating many records cheap and reports all violations instead of only the first one.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from py_epc_qr import metrics
+from py_epc_qr.amount import amount_error, format_cents, parse_amount, validate_amounts
+from py_epc_qr.constants import (
+    BIC_PATTERN,
+    ENCODINGS,
+    IBAN_FORMATS,
+    MAX_PAYLOAD_BYTES,
+    PURPOSE_CODES,
+)
+from py_epc_qr.iban import REGISTRY, iban_error, validate_ibans
+from py_epc_qr.reference import MAX_LENGTH, reference_error, validate_references
+
+violation = namedtuple("Violation", ["field", "code", "value"])
+
+VERSIONS = ("001", "002")
+
+BIC = re.compile(BIC_PATTERN)
+
+# keys of consumer records that differ from the entry they fill, see `transaction.consumer_epc_qr`
+ALIASES = {
+    "remittance": "remittance_unstructured",
+    "reference": "remittance_structured",
+}
+
+
+def _float_error(value) -> Exception:
+    """
+    Return the exception raised when converting `value` to float, if any.
+    """
+    try:
+        float(value)
+    except Exception as e:
+        return e
+
+
+MESSAGES = {
+    "version.invalid": (
+        ValueError,
+        lambda value: f"invalid version `{value}` (choose from {list(VERSIONS)}",
+    ),
+    "version.bic_required": (AssertionError, lambda _: "version 001 requires a BIC"),
+    "bic.format": (
+        ValueError,
+        lambda value: f"`{value}` is no BIC of 8 or 11 upper case letters and digits",
+    ),
+    "purpose.unknown": (
+        ValueError,
+        lambda value: f"`{value}` is no ISO 20022 purpose code",
+    ),
+    "originator_information.length": (
+        ValueError,
+        lambda _: "originator information exceeds 70 characters",
+    ),
+    "originator_information.line_break": (
+        ValueError,
+        lambda _: "originator information must not contain line breaks",
+    ),
+    "payload.length": (
+        ValueError,
+        lambda value: f"the payload has {len(value)} bytes, but must not exceed {MAX_PAYLOAD_BYTES}",
+    ),
+    "amount.not_a_number": (
+        ValueError,
+        lambda value: f"amount must be convertible to float; exception raised: {_float_error(value)}",
+    ),
+    "amount.out_of_bounds": (
+        ValueError,
+        lambda value: f"the amount {float(value)} is out of bounds",
+    ),
+    "amount.precision": (
+        ValueError,
+        lambda _: "the amount is not a two-digit decimal number",
+    ),
+    "encoding.invalid": (ValueError, lambda _: "encoding must be between 1 and 8"),
+    "beneficiary.not_alphanumeric": (
+        ValueError,
+        lambda _: "beneficiary is not alphanumeric",
+    ),
+    "beneficiary.length": (
+        ValueError,
+        lambda _: "beneficiary is mandatory, and must not exceed 70 characters",
+    ),
+    "iban.not_alphanumeric": (ValueError, lambda _: "iban is not alphanumeric"),
+    "iban.country_code": (ValueError, lambda _: "invalid iban country code"),
+    "iban.check_digits": (ValueError, lambda _: "invalid check digits"),
+    "iban.length": (
+        ValueError,
+        lambda value: f"iban of country {value[:2]} must have {REGISTRY[value[:2]][0]} characters",
+    ),
+    "iban.format": (
+        ValueError,
+        lambda value: f"bban does not match format {IBAN_FORMATS[value[:2]]} of country {value[:2]}",
+    ),
+    "iban.checksum": (ValueError, lambda _: "invalid iban checksum"),
+    "remittance_structured.format": (
+        ValueError,
+        lambda _: f"structured remittance must be alphanumeric and must not exceed {MAX_LENGTH} characters",
+    ),
+    "remittance_structured.rf_format": (
+        ValueError,
+        lambda value: f"`{value}` is no RF creditor reference (RF, two check digits and up to 21 characters)",
+    ),
+    "remittance_structured.rf_checksum": (
+        ValueError,
+        lambda _: "invalid RF creditor reference checksum",
+    ),
+    "remittance_unstructured.exclusive": (
+        ValueError,
+        lambda _: "structured and unstructured remittance must not both be given",
+    ),
+    "remittance_unstructured.not_alphanumeric": (
+        ValueError,
+        lambda _: "unstructered remittance is non alphanumeric",
+    ),
+    "remittance_unstructured.length": (
+        ValueError,
+        lambda _: "unstructured remittance exceeds 140 characters",
+    ),
+}
+
+
+def rule_version(value: str, record: dict) -> str:
+    """
+    Return the error code of the version entry, which depends on the bic entry of `record`.
+    """
+    if value not in VERSIONS:
+        return "version.invalid"
+    if value == "001" and not record.get("bic"):
+        return "version.bic_required"
+    return None
+
+
+def rule_bic(value: str, record: dict) -> str:
+    """
+    Return the error code of the bic entry, which may be empty unless the version is 001, see `rule_version`.
+    """
+    if value and not BIC.fullmatch(value):
+        return "bic.format"
+    return None
+
+
+def rule_purpose(value: str, record: dict) -> str:
+    """
+    Return the error code of the purpose entry, which is empty or one of `PURPOSE_CODES`.
+    """
+    if value and value not in PURPOSE_CODES:
+        return "purpose.unknown"
+    return None
+
+
+def rule_originator_information(value: str, record: dict) -> str:
+    """
+    Return the error code of the originator information entry, i.e. the beneficiary to originator information.
+    """
+    if len(value) > 70:
+        return "originator_information.length"
+    if "\n" in value or "\r" in value:
+        return "originator_information.line_break"
+    return None
+
+
+def exceeds_payload(length):
+    """
+    Return whether an encoded EPC-compliant string of `length` bytes exceeds `MAX_PAYLOAD_BYTES`.
+    Works element-wise on arrays of lengths as well, see `columnar.oversized_payloads`.
+    """
+    return length > MAX_PAYLOAD_BYTES
+
+
+def payload_error(payload: bytes) -> str:
+    """
+    Return the error code of the encoded EPC-compliant string `payload`, whose length is limited as a whole.
+    """
+    if exceeds_payload(len(payload)):
+        return "payload.length"
+    return None
+
+
+def encode_record(record: dict) -> bytes:
+    """
+    Return the encoded EPC-compliant string of `record`, whose entries must be valid on their own.
+    Missing entries are empty or take the defaults of `transaction.consumer_epc_qr`,
+    and characters outside the character set are replaced, since only the length matters.
+    """
+    entries = {ALIASES.get(key, key): value for key, value in record.items()}
+    amount = entries.get("amount")
+    encoding = int(entries.get("encoding", 1))
+    payload = "\n".join(
+        [
+            "BCD",
+            entries.get("version", "002"),
+            str(encoding),
+            "SCT",
+            entries.get("bic", ""),
+            entries.get("beneficiary", ""),
+            entries.get("iban", ""),
+            "" if amount is None else format_cents(parse_amount(amount)[0]),
+            entries.get("purpose", ""),
+            entries.get("remittance_structured", ""),
+            entries.get("remittance_unstructured", ""),
+            entries.get("originator_information", ""),
+        ]
+    )
+    return payload.encode(ENCODINGS[encoding], errors="replace")
+
+
+def rule_amount(value, record: dict) -> str:
+    """
+    Return the error code of the amount entry, see `amount.amount_error`.
+    """
+    return amount_error(value)
+
+
+def rule_encoding(value, record: dict) -> str:
+    """
+    Return the error code of the encoding entry.
+    """
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return "encoding.invalid"
+    if not 1 <= value <= 8:
+        return "encoding.invalid"
+    return None
+
+
+def rule_beneficiary(value: str, record: dict) -> str:
+    """
+    Return the error code of the beneficiary entry.
+    """
+    if not value.replace(" ", "").isalnum():
+        return "beneficiary.not_alphanumeric"
+    if not 1 <= len(value) <= 70:
+        return "beneficiary.length"
+    return None
+
+
+def rule_iban(value: str, record: dict) -> str:
+    """
+    Return the error code of the iban entry, see `iban.iban_error`.
+    """
+    return iban_error(value)
+
+
+def rule_remittance_structured(value: str, record: dict) -> str:
+    """
+    Return the error code of the structured remittance entry, which may be empty, see `reference.reference_error`.
+    """
+    if not value:
+        return None
+    return reference_error(value)
+
+
+def rule_remittance_unstructured(value: str, record: dict) -> str:
+    """
+    Return the error code of the unstructured remittance entry, which must be empty
+    if the structured remittance entry of `record` is given.
+    """
+    if record.get("remittance_structured") or record.get("reference"):
+        return "remittance_unstructured.exclusive" if value else None
+    if not value.replace(" ", "").isalnum():
+        return "remittance_unstructured.not_alphanumeric"
+    if len(value) > 140:
+        return "remittance_unstructured.length"
+    return None
+
+
+RULES = {
+    "version": rule_version,
+    "bic": rule_bic,
+    "encoding": rule_encoding,
+    "beneficiary": rule_beneficiary,
+    "iban": rule_iban,
+    "amount": rule_amount,
+    "purpose": rule_purpose,
+    "remittance_structured": rule_remittance_structured,
+    "remittance_unstructured": rule_remittance_unstructured,
+    "originator_information": rule_originator_information,
+}
+
+
+@lru_cache(maxsize=128)
+def compile_rules(keys: tuple) -> tuple:
+    """
+    Return the `(key, field, rule)` triples that apply to records with `keys`, in the order of `RULES`.
+    Records of a batch share their keys, so the lookup happens once per batch rather than per record.
+    """
+    fields = {ALIASES.get(key, key): key for key in keys}
+    return tuple(
+        (fields[field], field, rule) for field, rule in RULES.items() if field in fields
+    )
+
+
+def check_field(field: str, value, record: dict = None) -> str:
+    """
+    Return the error code of entry `field` with `value`, or `None` if it is valid.
+    Entries like the version depend on others, which are looked up in `record`.
+    """
+    return RULES[ALIASES.get(field, field)](value, record or {})
+
+
+def validate_record(record: dict) -> list:
+    """
+    Return all violations of `record`, a dictionary of entries, as namedtuples of kind `violation`.
+    Keys without rule are ignored. If all entries are valid, the length of the payload is checked as a whole,
+    see `payload_error`, and reported as a violation of field `payload`.
+    """
+    res = []
+    for key, field, rule in compile_rules(tuple(record)):
+        if (code := rule(value := record[key], record)) is not None:
+            res.append(violation(field, code, value))
+            metrics.count("validation_failures", code=code)
+    if not res and (code := payload_error(value := encode_record(record))) is not None:
+        res.append(violation("payload", code, value))
+        metrics.count("validation_failures", code=code)
+    return res
+
+
+def validate_records(records: Iterable[dict]) -> Iterator[tuple]:
+    """
+    Yield `(index, violations)` for each of `records` that has at least one violation.
+    """
+    for index, record in enumerate(records):
+        if violations := validate_record(record):
+            yield index, violations
+
+
+def validate_column(field: str, values: Iterable, bic: str = "") -> list:
+    """
+    Return `(index, code)` for each of `values` of entry `field` that is invalid.
+    The `bic` is only considered for the version entry, and iban, amount and structured remittance columns
+    are handled by `iban.validate_ibans`, `amount.validate_amounts` and `reference.validate_references`.
+    """
+    if ALIASES.get(field, field) == "iban":
+        return validate_ibans(values)
+    if ALIASES.get(field, field) == "remittance_structured":
+        return validate_references(values)
+    if field == "amount":
+        return validate_amounts(values)
+    rule, record = RULES[ALIASES.get(field, field)], {"bic": bic}
+    return [
+        (index, code)
+        for index, value in enumerate(values)
+        if (code := rule(value, record)) is not None
+    ]
+
+
+def to_error(code: str, value=None) -> Exception:
+    """
+    Return the exception that error `code` of `value` stands for.
+    """
+    kind, message = MESSAGES[code]
+    return kind(message(value))
+
+
+def raise_violations(violations: list) -> None:
+    """
+    Raise the exception of a single violation, or a ValueError listing several ones.
+    """
+    if len(violations) == 1:
+        raise to_error(violations[0].code, violations[0].value)
+    if violations:
+        raise ValueError(
+            "; ".join(str(to_error(item.code, item.value)) for item in violations)
+        )
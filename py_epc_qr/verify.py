@@ -0,0 +1,87 @@
+"""Round-trip verification of generated epc qr codes."""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from py_epc_qr.constants import ROW_MAPPING
+from py_epc_qr.decoder import decode, read_modules
+from py_epc_qr.encoder import matrix_version
+from py_epc_qr.parallel import imap
+from py_epc_qr.transaction import epc_qr
+
+verification = namedtuple("Verification", ["name", "mismatches", "error"])
+
+report = namedtuple("Report", ["total", "passed", "failed", "failures"])
+
+# files read by `verify_directory`, see `decoder.read_modules`
+SUFFIXES = (".png", ".pbm", ".bin")
+
+
+def compare(expected: epc_qr, actual: epc_qr) -> list:
+    """
+    Return the entries of `ROW_MAPPING` in which both epc qr codes differ.
+    """
+    return [
+        name
+        for name in ROW_MAPPING.values()
+        if getattr(expected, name) != getattr(actual, name)
+    ]
+
+
+def verify_modules(modules: np.ndarray, expected: epc_qr = None) -> list:
+    """
+    Decode the qr code `modules`, parse it as epc qr code and return the entries that differ from `expected`.
+
+    Besides, `payload` is reported if the decoded text does not survive parsing unchanged,
+    and `modules` if encoding the decoded text does not yield `modules` again.
+    Undecodable codes and invalid entries raise exceptions.
+    """
+    payload = decode(modules)
+    epc = epc_qr.from_encoded(payload)
+    mismatches = [] if expected is None else compare(expected, epc)
+    if epc.to_encoded() != payload:
+        mismatches.append("payload")
+    epc.qr_version = matrix_version(modules)
+    if not np.array_equal(epc.to_matrix(), modules):
+        mismatches.append("modules")
+    return mismatches
+
+
+def verify_file(item: tuple) -> list:
+    """
+    Return the mismatches of the qr code given by a `(file_name, expected)` tuple, see `verify_modules`.
+    """
+    file_name, expected = item
+    return verify_modules(read_modules(file_name), expected)
+
+
+def verify_directory(
+    directory: str, expected: dict = None, workers: int = None, chunksize: int = 16
+) -> report:
+    """
+    Verify every qr code file in `directory` and its subdirectories, e.g. the shards of `output.ShardedWriter`,
+    optionally against the epc qr codes in `expected` that are keyed by file name.
+
+    The files are verified in parallel, see `parallel.imap`.
+    Returns a namedtuple of kind `report` whose `failures` hold a namedtuple of kind `verification`
+    per file that has mismatches or raised an error, named by its path relative to `directory`.
+    """
+    expected = expected or {}
+    names = sorted(
+        os.path.relpath(os.path.join(root, name), directory)
+        for root, _, files in os.walk(directory)
+        for name in files
+        if name.endswith(SUFFIXES)
+    )
+    items = (
+        (os.path.join(directory, name), expected.get(os.path.basename(name)))
+        for name in names
+    )
+    failures = [
+        verification(names[res.index], res.value or [], res.error)
+        for res in imap(verify_file, items, workers, chunksize)
+        if res.error is not None or res.value
+    ]
+    return report(len(names), len(names) - len(failures), len(failures), failures)
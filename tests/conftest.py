@@ -0,0 +1,20 @@
+"""
+Fixtures shared by the tests.
+"""
+
+import pytest
+
+from py_epc_qr.transaction import consumer_epc_qr
+
+
+@pytest.fixture
+def epc() -> consumer_epc_qr:
+    """
+    Generate the QR example from wikipedia.
+    """
+    return consumer_epc_qr(
+        beneficiary="Wikimedia Foerdergesellschaft",
+        iban="DE33100205000001194700",
+        amount=123.45,
+        remittance="Spende fuer Wikipedia",
+    )
@@ -0,0 +1,161 @@
+"""
+Tests for the asyncio facade.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+
+import pytest
+
+from py_epc_qr.aio import AsyncRenderer, render_async
+from py_epc_qr.cache import RenderCache
+
+
+class SlowEpcQr:
+    """
+    Stand-in for an epc qr code that takes a while to render and tracks concurrent renders.
+    """
+
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def __init__(self, value: int):
+        """Initialize"""
+        self.value = value
+
+    def to_str(self) -> str:
+        return str(self.value)
+
+    def to_bytes(self, fmt: str) -> bytes:
+        with self.lock:
+            SlowEpcQr.running += 1
+            SlowEpcQr.peak = max(SlowEpcQr.peak, SlowEpcQr.running)
+        time.sleep(0.01)
+        with self.lock:
+            SlowEpcQr.running -= 1
+        if self.value < 0:
+            raise ValueError("negative")
+        return str(self.value).encode()
+
+
+def test_render_async(epc):
+    """
+    Given an epc qr code
+    When rendering it from a coroutine
+    Then the data equals the one rendered synchronously
+    """
+    assert asyncio.run(render_async(epc, "svg")) == epc.to_bytes("svg")
+
+
+def test_as_completed_bounds_concurrency():
+    """
+    Given many slow codes, one of which fails
+    When rendering them with bounded concurrency
+    Then never more than the bound run at once, and every code yields a result
+    """
+
+    async def run():
+        async with AsyncRenderer(max_concurrency=3) as renderer:
+            return [
+                res
+                async for res in renderer.as_completed(
+                    SlowEpcQr(value) for value in range(-1, 20)
+                )
+            ]
+
+    SlowEpcQr.peak = 0
+    results = sorted(asyncio.run(run()))
+    assert SlowEpcQr.peak <= 3
+    assert [res.index for res in results] == list(range(21))
+    assert isinstance(results[0].error, ValueError)
+    assert [res.value for res in results[1:]] == [str(v).encode() for v in range(20)]
+
+
+def test_render_cancelled():
+    """
+    Given a render call waiting for a free slot
+    When cancelling it
+    Then the cancellation propagates and the renderer stays usable
+    """
+
+    async def run():
+        async with AsyncRenderer(max_concurrency=1) as renderer:
+            first = asyncio.ensure_future(renderer.render(SlowEpcQr(1)))
+            second = asyncio.ensure_future(renderer.render(SlowEpcQr(2)))
+            await asyncio.sleep(0)
+            second.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await second
+            return await first, await renderer.render(SlowEpcQr(3))
+
+    assert asyncio.run(run()) == (b"1", b"3")
+
+
+def test_render_with_cache(epc):
+    """
+    Given a renderer with a cache
+    When rendering the same code twice
+    Then the second call is answered from the cache
+    """
+
+    async def run():
+        async with AsyncRenderer(cache=(cache := RenderCache())) as renderer:
+            await renderer.render(epc)
+            await renderer.render(epc)
+        return cache.stats
+
+    stats = asyncio.run(run())
+    assert (stats.hits, stats.misses) == (1, 1)
+
+
+def test_render_with_disk_cache_off_the_loop(tmp_path, epc):
+    """
+    Given a renderer with a cache that stores its entries on disk
+    When rendering the same code twice
+    Then the cache is only accessed outside of the event loop thread, and the second call is a hit
+    """
+    threads = []
+
+    class RecordingCache(RenderCache):
+        def get(self, key):
+            threads.append(threading.current_thread())
+            return super().get(key)
+
+        def put(self, key, data):
+            threads.append(threading.current_thread())
+            super().put(key, data)
+
+    cache = RecordingCache(directory=str(tmp_path))
+
+    async def run():
+        async with AsyncRenderer(cache=cache) as renderer:
+            return [await renderer.render(epc) for _ in range(2)]
+
+    first, second = asyncio.run(run())
+    assert first == second == epc.to_bytes()
+    assert len(threads) == 3 and threading.main_thread() not in threads
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_render_with_cache_keyed_like_to_bytes(epc):
+    """
+    Given a cache filled synchronously and a copy of a short code that selects its qr code version automatically
+    When rendering both codes with a renderer sharing the cache
+    Then the first is a hit, and the copy is rendered at its own, smaller version
+    """
+    epc.remittance_unstructured = "Danke"
+    auto = copy.copy(epc)
+    auto.qr_version = None
+    cache = RenderCache()
+    expected = epc.to_bytes(cache=cache)
+
+    async def run():
+        async with AsyncRenderer(cache=cache) as renderer:
+            return await renderer.render(epc), await renderer.render(auto)
+
+    assert asyncio.run(run()) == (expected, auto.to_bytes())
+    assert auto.fit_qr_version() < epc.fit_qr_version()
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
@@ -0,0 +1,146 @@
+"""
+Tests for the exact handling of amounts.
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from py_epc_qr.amount import (
+    cents,
+    format_amount,
+    format_amounts,
+    parse_amount,
+    parse_amounts,
+    validate_amounts,
+)
+from py_epc_qr.transaction import consumer_epc_qr
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (12, 1200),
+        (12.3, 1230),
+        ("12.3", 1230),
+        ("12.300", 1230),
+        (" 12.30 ", 1230),
+        (Decimal("12.30"), 1230),
+        (cents(1230), 1230),
+        (0.01, 1),
+        ("999999999.99", 99999999999),
+        (999999999.99, 99999999999),
+        (0.1 + 0.2 - 0.00000000000000004, 30),
+    ],
+)
+def test_parse_amount(value, expected):
+    """
+    Given a valid amount of any supported type
+    When parsing it
+    Then the exact number of cents is returned
+    """
+    assert parse_amount(value) == (expected, None)
+
+
+@pytest.mark.parametrize(
+    "value, code",
+    [
+        (0, "amount.out_of_bounds"),
+        (-1, "amount.out_of_bounds"),
+        (cents(0), "amount.out_of_bounds"),
+        ("999999999.991", "amount.out_of_bounds"),
+        (Decimal("1000000000"), "amount.out_of_bounds"),
+        (float("nan"), "amount.out_of_bounds"),
+        ("inf", "amount.out_of_bounds"),
+        (0.1 + 0.2, "amount.precision"),
+        ("12.300000000000000001", "amount.precision"),
+        (Decimal("0.011"), "amount.precision"),
+        ("abc", "amount.not_a_number"),
+        (None, "amount.not_a_number"),
+    ],
+)
+def test_parse_amount_invalid(value, code):
+    """
+    Given an invalid amount
+    When parsing it
+    Then its error code is returned
+    """
+    assert parse_amount(value) == (None, code)
+
+
+def test_parse_amount_agrees_with_floats():
+    """
+    Given random amounts as floats and their strings
+    When parsing them
+    Then they are valid if they are two-digit decimal numbers within the bounds, as before
+    """
+
+    def float_error(value) -> str:
+        value = float(value)
+        if not 0.01 <= value <= 999999999.99:
+            return "amount.out_of_bounds"
+        if value != round(value, 2):
+            return "amount.precision"
+        return None
+
+    rng = random.Random(0)
+    for _ in range(10000):
+        number = rng.randint(-5, 10**11 + 5)
+        for value in (number / 100, number / 1000, str(number / 100), number):
+            assert parse_amount(value)[1] == float_error(value)
+
+
+def test_format_amount():
+    """
+    Given amounts
+    When formatting them
+    Then the amount entries have two decimals, and invalid amounts raise the usual error
+    """
+    assert format_amount(Decimal("0.1")) == "EUR0.10"
+    assert format_amount(cents(99999999999)) == "EUR999999999.99"
+    with pytest.raises(ValueError, match="the amount -10.0 is out of bounds"):
+        format_amount(-10)
+
+
+def test_parse_amounts():
+    """
+    Given columns of numbers and of mixed types
+    When parsing them at once
+    Then they agree with parsing them one by one
+    """
+    rng = random.Random(0)
+    numbers = [
+        rng.randint(-5, 10**11 + 5) / rng.choice([1, 100, 1000]) for _ in range(1000)
+    ]
+    mixed = numbers[:100] + ["1.5", Decimal("2"), cents(3), None, float("nan"), 10**400]
+    for values in (numbers, mixed, [10**400, 1.5]):
+        expected = [parse_amount(value) for value in values]
+        numbers_, errors = parse_amounts(values)
+        assert numbers_ == [number for number, _ in expected]
+        assert errors == [
+            (index, code) for index, (_, code) in enumerate(expected) if code
+        ]
+        assert validate_amounts(values) == errors
+
+
+def test_format_amounts():
+    """
+    Given a column of amounts
+    When formatting them
+    Then invalid ones are None
+    """
+    assert format_amounts([1, "0.5", 0.001]) == ["EUR1.00", "EUR0.50", None]
+
+
+def test_epc_qr_amount_exact():
+    """
+    Given amounts as decimal, string and cents
+    When creating an epc qr code
+    Then the amount entry is exact
+    """
+    iban = "DE89370400440532013000"
+    for value in (Decimal("999999999.99"), "999999999.99", cents(99999999999)):
+        assert consumer_epc_qr("me", iban, value, "x").amount == "EUR999999999.99"
+    with pytest.raises(ValueError):
+        consumer_epc_qr("me", iban, "0.100000000000000001", "x")
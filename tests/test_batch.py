@@ -0,0 +1,197 @@
+"""
+Tests for the batch generation.
+"""
+
+import io
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from py_epc_qr.batch import generate, read_epc_qrs, resolve_format, stream
+from py_epc_qr.output import DirectoryWriter, ZipWriter
+
+
+def assert_same_pixels(png, expected="tests/data/qr_version_002.png"):
+    """
+    Assert that the png file or file-like object `png` shows the same image as the file `expected`.
+    """
+    np.testing.assert_array_equal(
+        np.array(Image.open(png).convert("1")),
+        np.array(Image.open(expected).convert("1")),
+    )
+
+
+def test_generate_from_csv_reports_invalid_rows(tmp_path):
+    """
+    Given a csv file with one invalid row
+    When generating qr codes
+    Then the valid rows are written and the invalid one is reported
+    """
+    with DirectoryWriter(tmp_path) as writer:
+        results = list(generate("tests/data/batch.csv", writer, name_field="invoice"))
+    assert [res.name for res in results] == ["R0001.png", "", "R0003.png"]
+    assert [res.error is None for res in results] == [True, False, True]
+    assert isinstance(results[1].error, ValueError)
+    assert results[1].line == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["R0001.png", "R0003.png"]
+    assert_same_pixels(tmp_path / "R0003.png")
+
+
+def test_generate_from_jsonl_into_zip(tmp_path):
+    """
+    Given a jsonl file with a blank, an invalid and a malformed line
+    When generating qr codes into a zip archive with two processes
+    Then the archive holds the valid rows named by line number
+    """
+    with ZipWriter(archive := str(tmp_path / "qr.zip")) as writer:
+        results = list(generate("tests/data/batch.jsonl", writer, workers=2))
+    assert [(res.line, res.error is None) for res in results] == [
+        (1, True),
+        (3, True),
+        (4, False),
+        (5, False),
+    ]
+    with zipfile.ZipFile(archive) as file:
+        assert file.namelist() == ["000001.png", "000003.png"]
+        assert_same_pixels(io.BytesIO(file.read("000003.png")))
+
+
+def test_generate_continues_after_malformed_line(tmp_path):
+    """
+    Given a jsonl file whose first line is malformed
+    When generating qr codes
+    Then the line is reported as error, and the following rows are still written
+    """
+    source = tmp_path / "batch.jsonl"
+    with open("tests/data/batch.jsonl", encoding="utf-8") as file:
+        rows = file.read().splitlines()
+    source.write_text("\n".join([rows[-1], *rows[:-1]]) + "\n", encoding="utf-8")
+    with DirectoryWriter(str(tmp_path / "out")) as writer:
+        results = list(generate(str(source), writer))
+    assert [(res.line, res.error is None) for res in results] == [
+        (1, False),
+        (2, True),
+        (4, True),
+        (5, False),
+    ]
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == [
+        "000002.png",
+        "000004.png",
+    ]
+
+
+@pytest.mark.parametrize(
+    "file_name, fmt, expected",
+    [
+        ("a.csv", "", "csv"),
+        ("a.JSONL", "", "jsonl"),
+        ("a.txt", "json", "jsonl"),
+        ("a.txt", "", "epc"),
+    ],
+)
+def test_resolve_format(file_name, fmt, expected):
+    """
+    Given a file name and an optional format
+    When resolving the input format
+    Then the expected format is returned
+    """
+    assert resolve_format(file_name, fmt) == expected
+
+
+def test_resolve_format_raises_exception():
+    """
+    Given an unknown file extension
+    When resolving the input format
+    Then an exception is raised
+    """
+    with pytest.raises(ValueError):
+        resolve_format("a.xlsx")
+
+
+def test_generate_svg(tmp_path):
+    """
+    Given a csv file
+    When generating qr codes as svg
+    Then the files carry the svg extension and content
+    """
+    with DirectoryWriter(tmp_path) as writer:
+        results = list(
+            generate(
+                "tests/data/batch.csv", writer, name_field="invoice", out_format="svg"
+            )
+        )
+    assert [res.name for res in results] == ["R0001.svg", "", "R0003.svg"]
+    assert (tmp_path / "R0003.svg").read_bytes().startswith(b"<?xml")
+
+
+def test_generate_unknown_output_format(tmp_path):
+    """
+    Given an unknown output format
+    When generating qr codes
+    Then a ValueError is raised
+    """
+    with pytest.raises(ValueError):
+        with DirectoryWriter(tmp_path) as writer:
+            list(generate("tests/data/batch.csv", writer, out_format="gif"))
+
+
+def test_read_epc_qrs():
+    """
+    Given a file of concatenated payloads in different character sets, one of them invalid
+    When reading it
+    Then the payloads are parsed lazily and the invalid one is reported
+    """
+    results = list(read_epc_qrs("tests/data/payloads.txt"))
+    assert [(res.line, res.error is None) for res in results] == [
+        (1, True),
+        (13, True),
+        (24, False),
+        (35, True),
+    ]
+    assert results[0].epc.remittance_unstructured == "Spende fuer Wikipedia"
+    assert results[1].epc.version == "001"
+    assert results[1].epc.beneficiary == "Müller GmbH"
+    assert results[1].epc.remittance_unstructured == "Rechnung für März"
+    assert results[3].epc.beneficiary == "BCD"
+
+
+def test_generate_from_payloads(tmp_path):
+    """
+    Given a file of concatenated payloads
+    When generating qr codes
+    Then the valid payloads are written named by line number
+    """
+    with DirectoryWriter(tmp_path) as writer:
+        results = list(generate("tests/data/payloads.txt", writer, workers=2))
+    assert [res.name for res in results] == [
+        "000001.png",
+        "000013.png",
+        "",
+        "000035.png",
+    ]
+    assert_same_pixels(tmp_path / "000001.png")
+
+
+def test_stream(tmp_path):
+    """
+    Given a stream of json records with a blank, an invalid and a malformed line
+    When streaming qr codes with and without writer
+    Then a result per record is yielded in order, with the data unless it was written
+    """
+    with open("tests/data/batch.jsonl") as file:
+        results = list(stream(file))
+    assert [(res.line, res.error is None) for res in results] == [
+        (1, True),
+        (3, True),
+        (4, False),
+        (5, False),
+    ]
+    assert results[0].name == "000001.png"
+    assert_same_pixels(io.BytesIO(results[1].data))
+
+    with open("tests/data/batch.jsonl") as file:
+        results = list(stream(file, DirectoryWriter(tmp_path), out_format="svg"))
+    assert [res.data for res in results] == [b""] * 4
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["000001.svg", "000003.svg"]
@@ -0,0 +1,79 @@
+"""
+Tests for the render cache.
+"""
+
+from py_epc_qr.cache import RenderCache, cache_key
+
+
+def test_cache_key():
+    """
+    Given payloads and render options
+    When computing cache keys
+    Then they differ exactly if payload or options differ
+    """
+    assert cache_key("a", fmt="png") == cache_key("a", fmt="png")
+    assert cache_key("a", fmt="png") != cache_key("a", fmt="svg")
+    assert cache_key("a", fmt="png") != cache_key("b", fmt="png")
+    assert cache_key("a", fmt="png", border=4) == cache_key("a", border=4, fmt="png")
+
+
+def test_to_bytes_with_cache(epc):
+    """
+    Given a render cache
+    When rendering the same epc qr code twice
+    Then the second call is a hit returning the same data
+    """
+    cache = RenderCache()
+    first = epc.to_bytes(cache=cache)
+    second = epc.to_bytes(cache=cache)
+    assert first == second == epc.to_bytes()
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.items == 1
+    assert cache.stats.size == len(first)
+
+
+def test_cache_evicts_least_recently_used():
+    """
+    Given a cache limited to two items
+    When storing three items after using the first one again
+    Then the second one is evicted
+    """
+    cache = RenderCache(max_items=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.stats.evictions == 1
+
+
+def test_cache_evicts_by_size():
+    """
+    Given a cache limited to four bytes
+    When storing entries exceeding it
+    Then old entries are evicted and oversized ones are not kept in memory
+    """
+    cache = RenderCache(max_bytes=4)
+    cache.put("a", b"12")
+    cache.put("b", b"345")
+    cache.put("c", b"67890")
+    assert cache.stats.items == 1
+    assert cache.stats.size == 3
+    assert cache.get("c") is None
+
+
+def test_cache_on_disk_survives_restart(tmp_path, epc):
+    """
+    Given a cache with a directory
+    When creating a new cache on the same directory
+    Then the entries are found on disk
+    """
+    epc.to_bytes("svg", cache=RenderCache(directory=str(tmp_path)))
+    cache = RenderCache(directory=str(tmp_path))
+    assert epc.to_bytes("svg", cache=cache) == epc.to_bytes("svg")
+    assert epc.to_bytes("svg", cache=cache)
+    assert cache.stats.disk_hits == 1
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 0
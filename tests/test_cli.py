@@ -2,33 +2,100 @@
 Tests for the cli.
 """
 
+import base64
+import json
+import subprocess
+import sys
+import threading
+
 import pytest
 from typer.testing import CliRunner
 
 from py_epc_qr import __version__
 from py_epc_qr.cli import app
+from py_epc_qr.constants import OUTPUT_FORMATS
+from py_epc_qr.render import FORMATS
 
 runner = CliRunner()
 
+# seconds that importing the cli may take in a fresh interpreter, about twice the time it takes with typer alone
+STARTUP_BUDGET = 0.25
+
+# dependencies that only the commands which need them import
+HEAVY_MODULES = ("numpy", "yaml", "PIL", "qrcode", "concurrent.futures")
+
 
-def test_app_from_yaml():
+def test_app_from_yaml(tmp_path):
     """
     Given a yaml template
     When creating the QR code
     Then everything works as intended
     """
-    result = runner.invoke(app, ["create", "--from-yaml", "tests/data/template.yaml"])
+    result = runner.invoke(
+        app,
+        [
+            "create",
+            "--from-yaml",
+            "tests/data/template.yaml",
+            "--out",
+            str(tmp_path / "qr.png"),
+        ],
+    )
     assert result.exit_code == 0
 
 
-def test_app_from_prompt():
+@pytest.mark.parametrize(
+    "source", [["--from-yaml", "tests/data/template.yaml"], ["--stdin"]]
+)
+def test_app_create_rejects_entry_options(tmp_path, source):
+    """
+    Given a yaml template or records on stdin together with options for entries of the qr code
+    When creating the QR code
+    Then the combination is rejected instead of dropping the options
+    """
+    result = runner.invoke(
+        app,
+        ["create", *source, "--out", str(tmp_path / "qr.png"), "--bic", "BFSWDE33BER"],
+        input=RECORD + "\n",
+    )
+    assert result.exit_code == 2
+    assert "--bic cannot be combined with" in result.output
+    assert not (tmp_path / "qr.png").exists()
+
+
+def test_app_create_rejects_reference_from_yaml(tmp_path):
+    """
+    Given a yaml template together with a creditor reference
+    When creating the QR code
+    Then the combination is rejected instead of dropping the reference
+    """
+    result = runner.invoke(
+        app,
+        [
+            "create",
+            "--from-yaml",
+            "tests/data/template.yaml",
+            "--out",
+            str(tmp_path / "qr.png"),
+            "--reference",
+            "RF18539007547034",
+        ],
+    )
+    assert result.exit_code == 2
+    assert "--reference cannot be combined with --from-yaml" in result.output
+    assert not (tmp_path / "qr.png").exists()
+
+
+def test_app_from_prompt(tmp_path):
     """
     Given a valid prompt input
     When creating the QR code
     Then everything works as intended
     """
     result = runner.invoke(
-        app, ["create"], input="test\nDE33100205000001194700\n10\nDanke"
+        app,
+        ["create", "--out", str(tmp_path / "qr.png")],
+        input="test\nDE33100205000001194700\n10\nDanke",
     )
     assert result.exit_code == 0
 
@@ -61,3 +128,362 @@ def test_app_version():
     result = runner.invoke(app, ["version"])
     assert result.stdout == f"py-epc-qr v{__version__}\n"
     assert result.exit_code == 0
+
+
+def test_app_batch(tmp_path):
+    """
+    Given a csv file with one invalid row
+    When creating QR codes in batch
+    Then the valid rows are written and the invalid row is reported
+    """
+    result = runner.invoke(
+        app,
+        [
+            "batch",
+            "tests/data/batch.csv",
+            "--out",
+            str(tmp_path / "out.zip"),
+            "--name-field",
+            "invoice",
+        ],
+    )
+    assert result.exit_code == 1
+    assert "line 3: the amount -10.0 is out of bounds" in result.stdout
+    assert "created 2 qr codes" in result.stdout
+
+
+def test_app_sheet(tmp_path):
+    """
+    Given a csv file with one invalid row
+    When printing its QR codes onto a sheet
+    Then the valid rows are composed onto one page and the invalid row is reported
+    """
+    out = tmp_path / "sheet.pdf"
+    result = runner.invoke(
+        app,
+        ["sheet", "tests/data/batch.csv", "--out", str(out), "--name-field", "invoice"],
+    )
+    assert result.exit_code == 1
+    assert "line 3: the amount -10.0 is out of bounds" in result.stdout
+    assert "created 1 pages with 2 qr codes" in result.stdout
+    assert out.read_bytes().count(b"/Type /Page ") == 1
+
+
+def test_app_batch_resume(tmp_path):
+    """
+    Given a sharded output directory with a manifest of a previous run
+    When creating the QR codes in batch again with resume
+    Then the existing QR codes are skipped
+    """
+    options = ["batch", "tests/data/batch.csv", "--out", str(tmp_path), "--shard"]
+    options += ["--name-field", "invoice"]
+    runner.invoke(app, options + ["--manifest"])
+    result = runner.invoke(app, options + ["--resume"])
+    assert "skipped 2 existing qr codes" in result.stdout
+    assert "created 0 qr codes" in result.stdout
+
+
+def test_app_job(tmp_path):
+    """
+    Given a csv file with one invalid row
+    When running a job on it twice
+    Then the first run reports progress and the invalid row, and the second one only reports the invalid row again
+    """
+    options = ["job", "tests/data/batch.csv", "--out", str(tmp_path / "qr")]
+    result = runner.invoke(app, options + ["--name-field", "invoice"])
+    assert result.exit_code == 1
+    assert "line 3: the amount -10.0 is out of bounds" in result.stdout
+    assert "line 4 of 4, 3 rows done, 1 failed" in result.stderr
+    result = runner.invoke(app, options + ["--name-field", "invoice"])
+    assert result.exit_code == 1
+    assert "line 3: the amount -10.0 is out of bounds" in result.stdout
+    assert "created 0 qr codes in" in result.stdout
+    assert "skipped 0, 1 rows failed" in result.stdout
+
+
+def test_app_reference():
+    """
+    Given invoice numbers and references
+    When creating or checking references
+    Then the references are printed, and invalid ones are reported
+    """
+    result = runner.invoke(app, ["reference", "539007547034"])
+    assert result.exit_code == 0
+    assert result.stdout == "RF18539007547034\n"
+    result = runner.invoke(app, ["reference", "--check", "RF19539007547034"])
+    assert result.exit_code == 1
+    assert "invalid RF creditor reference checksum" in result.stdout
+
+
+def test_app_batch_unknown_format():
+    """
+    Given a source file with an unknown extension
+    When creating QR codes in batch
+    Then an expected return code is thrown
+    """
+    result = runner.invoke(app, ["batch", "tests/data/template.yaml"])
+    assert result.exit_code == 1
+
+
+def test_app_create_svg(tmp_path):
+    """
+    Given a yaml template and the svg format
+    When creating the QR code
+    Then an svg file is written
+    """
+    out = tmp_path / "qr.svg"
+    result = runner.invoke(
+        app,
+        [
+            "create",
+            "--from-yaml",
+            "tests/data/template.yaml",
+            "--out",
+            str(out),
+            "--format",
+            "svg",
+        ],
+    )
+    assert result.exit_code == 0
+    assert out.read_bytes().startswith(b"<?xml")
+
+
+def test_app_create_invalid_purpose():
+    """
+    Given an unknown purpose code
+    When creating the QR code
+    Then the purpose code is reported and an expected return code is thrown
+    """
+    result = runner.invoke(
+        app,
+        ["create", "--purpose", "GOOD"],
+        input="test\nDE33100205000001194700\n10\nDanke",
+    )
+    assert result.exit_code == 1
+    assert "purpose code appears incorrect" in result.stdout
+
+
+def test_app_create_unknown_format():
+    """
+    Given an unknown output format
+    When creating the QR code
+    Then an expected return code is thrown
+    """
+    result = runner.invoke(
+        app, ["create", "--from-yaml", "tests/data/template.yaml", "--format", "gif"]
+    )
+    assert result.exit_code == 1
+
+
+def test_app_create_auto_qr_version(tmp_path):
+    """
+    Given a yaml template and the automatic qr code version
+    When creating the QR code
+    Then the chosen version is reported
+    """
+    result = runner.invoke(
+        app,
+        [
+            "create",
+            "--from-yaml",
+            "tests/data/template.yaml",
+            "--out",
+            str(tmp_path / "qr.png"),
+            "--qr-version",
+            "auto",
+            "--max-qr-version",
+            "13",
+        ],
+    )
+    assert result.exit_code == 0
+    assert "creating qr code of version 5" in result.stdout
+
+
+@pytest.mark.parametrize(
+    "options", [["--qr-version", "small"], ["--max-qr-version", "2"]]
+)
+def test_app_create_qr_version_throws_error(tmp_path, options):
+    """
+    Given an invalid qr code version or one that is too small
+    When creating the QR code
+    Then an expected return code is thrown
+    """
+    result = runner.invoke(
+        app,
+        [
+            "create",
+            "--from-yaml",
+            "tests/data/template.yaml",
+            "--out",
+            str(tmp_path / "qr.png"),
+        ]
+        + options,
+    )
+    assert result.exit_code == 1
+
+
+def test_app_verify(tmp_path):
+    """
+    Given a directory with a valid and a broken QR code
+    When verifying the directory
+    Then the broken file is reported
+    """
+    runner.invoke(
+        app,
+        [
+            "create",
+            "--from-yaml",
+            "tests/data/template.yaml",
+            "--out",
+            str(tmp_path / "qr.png"),
+        ],
+    )
+    (tmp_path / "broken.png").write_bytes(b"")
+    result = runner.invoke(app, ["verify", str(tmp_path)])
+    assert result.exit_code == 1
+    assert "broken.png: " in result.stdout
+    assert "verified 2 qr codes, 1 failed" in result.stdout
+
+
+def test_app_batch_metrics(tmp_path):
+    """
+    Given a csv file and the metrics option
+    When creating QR codes in batch
+    Then the time per stage and the counters are printed
+    """
+    result = runner.invoke(
+        app,
+        [
+            "batch",
+            "tests/data/batch.csv",
+            "--out",
+            str(tmp_path),
+            "--name-field",
+            "invoice",
+            "--metrics",
+        ],
+    )
+    assert "encode: 2 calls" in result.stdout
+    assert "validation_failures code=amount.out_of_bounds: 1" in result.stdout
+
+
+def run_python(code: str) -> str:
+    """
+    Return the output of `code` run in a fresh interpreter.
+    """
+    return subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def test_startup_skips_heavy_modules():
+    """
+    Given a fresh interpreter
+    When importing the cli
+    Then none of the heavy dependencies are imported
+    """
+    loaded = run_python(
+        "import sys, py_epc_qr.cli; print(' '.join(sorted(sys.modules)))"
+    ).split()
+    assert [module for module in HEAVY_MODULES if module in loaded] == []
+
+
+def test_startup_budget():
+    """
+    Given a fresh interpreter
+    When importing the cli
+    Then the best of three runs stays within the startup budget
+    """
+    code = (
+        "import time; start = time.perf_counter(); import py_epc_qr.cli;"
+        " print(time.perf_counter() - start)"
+    )
+    assert min(float(run_python(code)) for _ in range(3)) < STARTUP_BUDGET
+
+
+def test_output_formats():
+    """
+    Given the output formats shown by the cli
+    When comparing them with the renderers
+    Then they agree
+    """
+    assert OUTPUT_FORMATS == tuple(FORMATS)
+
+
+RECORD = json.dumps(
+    {
+        "beneficiary": "Max Mustermann",
+        "iban": "DE89370400440532013000",
+        "amount": 12.3,
+        "remittance": "Invoice 1",
+        "invoice": "R0001",
+    }
+)
+
+
+def test_app_create_from_stdin():
+    """
+    Given json records on stdin, one of them invalid
+    When creating the QR codes in streaming mode
+    Then a json line per record is printed in order, with the base64-encoded code or the error
+    """
+    result = runner.invoke(
+        app,
+        ["create", "--stdin", "--format", "svg", "--name-field", "invoice"],
+        input=f'{RECORD}\n{{"beneficiary": "$", "invoice": "R0002"}}\n',
+    )
+    assert result.exit_code == 1
+    first, second = map(json.loads, result.stdout.splitlines())
+    assert (first["line"], first["name"]) == (1, "R0001.svg")
+    assert base64.b64decode(first["data"]).startswith(b"<?xml")
+    assert second == {"line": 2, "error": "beneficiary is not alphanumeric"}
+
+
+def test_app_create_from_stdin_into_directory(tmp_path):
+    """
+    Given a json record on stdin
+    When creating the QR code in streaming mode with an output directory and a name field
+    Then the code is written and its path is printed
+    """
+    result = runner.invoke(
+        app,
+        ["create", "--stdin", "--out-dir", str(tmp_path), "--name-field", "invoice"],
+        input=RECORD,
+    )
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)["path"] == str(tmp_path / "R0001.png")
+    assert (tmp_path / "R0001.png").exists()
+
+
+def test_app_create_from_stdin_answers_each_line():
+    """
+    Given a long-running process in streaming mode
+    When writing a record to its stdin without closing it
+    Then the answer arrives right away
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "py_epc_qr",
+            "create",
+            "--stdin",
+            "--name-field",
+            "invoice",
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    timer = threading.Timer(30, process.kill)
+    timer.start()
+    try:
+        for line in (1, 2):
+            process.stdin.write(RECORD + "\n")
+            process.stdin.flush()
+            assert json.loads(process.stdout.readline())["line"] == line
+        process.stdin.close()
+        assert process.wait() == 0
+    finally:
+        timer.cancel()
+        process.kill()
@@ -0,0 +1,200 @@
+"""
+Tests for the vectorized validation of columns.
+"""
+
+import random
+import string
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from py_epc_qr.columnar import (
+    consumer_payloads,
+    format_amounts,
+    from_arrow,
+    from_frame,
+    invalid_ibans,
+    to_cents,
+    validate_columns,
+)
+from py_epc_qr.constants import ALLOWED_KEYS, IBAN_FORMATS
+from py_epc_qr.iban import REGISTRY, mod97, validate_ibans
+from py_epc_qr.transaction import consumer_epc_qr
+from py_epc_qr.validation import validate_record
+
+COLUMNS = {
+    "beneficiary": ["Max Mustermann", "Erika", "", "Max$", "x" * 71, "Jörg"],
+    "iban": ["DE89370400440532013000"] * 5 + ["DE89370400440532013001"],
+    "amount": [12.3, "5", 0.001, 1e10, 1.234, None],
+    "remittance": ["Invoice 1", "x", "y", "z", "", "x" * 141],
+}
+
+
+def test_consumer_payloads():
+    """
+    Given columns of valid and invalid consumer transfers
+    When building the payloads
+    Then only the valid rows have payloads, which match those of consumer epc qr codes
+    """
+    res = consumer_payloads(*COLUMNS.values())
+    assert res.invalid.tolist() == [False, False, True, True, True, True]
+    for index in range(2):
+        row = {key: COLUMNS[key][index] for key in ALLOWED_KEYS}
+        assert res.payloads[index] == consumer_epc_qr(**row).to_str()
+    assert set(res.payloads[2:]) == {""}
+
+
+def test_consumer_payloads_too_long():
+    """
+    Given columns whose entries are valid on their own, but one row exceeds 331 bytes in utf-8
+    When building the payloads
+    Then that row is invalid like with record validation and consumer epc qr codes
+    """
+    res = consumer_payloads(
+        ["Ä" * 70, "Ä" * 70],
+        ["DE89370400440532013000"] * 2,
+        [1, 1],
+        ["ü" * 140, "ü" * 50],
+    )
+    assert res.invalid.tolist() == [True, False]
+    assert [
+        item.code
+        for remittance in ["ü" * 140, "ü" * 50]
+        for item in validate_record(
+            {
+                "beneficiary": "Ä" * 70,
+                "iban": "DE89370400440532013000",
+                "amount": 1,
+                "remittance": remittance,
+            }
+        )
+    ] == ["payload.length"]
+    assert (
+        res.payloads[1].encode("utf-8")
+        == consumer_epc_qr("Ä" * 70, "DE89370400440532013000", 1, "ü" * 50).to_encoded()
+    )
+
+
+def test_validate_columns():
+    """
+    Given columns of consumer transfers
+    When validating them
+    Then the masks of each column agree with the rules of the validation
+    """
+    masks = validate_columns(*COLUMNS.values())
+    assert list(masks) == ALLOWED_KEYS
+    assert masks["beneficiary"].tolist() == [False, False, True, True, True, False]
+    assert masks["iban"].tolist() == [False] * 5 + [True]
+    assert masks["amount"].tolist() == [False, False, True, True, True, True]
+    assert masks["remittance"].tolist() == [False, False, False, False, True, True]
+
+
+def test_validate_columns_like_records():
+    """
+    Given random records
+    When validating them as columns
+    Then exactly the records with violations are invalid
+    """
+    rng = random.Random(0)
+    records = [
+        {
+            "beneficiary": rng.choice(["Max", "", "A b", "é", "a$", "y" * 70]),
+            "iban": rng.choice(["DE89370400440532013000", "DE8937040044053201300"]),
+            "amount": rng.choice([round(rng.uniform(0, 100), 2), rng.uniform(0, 1)]),
+            "remittance": rng.choice(["r", "", "r r", "ü" * 141]),
+        }
+        for _ in range(500)
+    ]
+    masks = validate_columns(*([row[key] for row in records] for key in ALLOWED_KEYS))
+    invalid = np.logical_or.reduce(list(masks.values()))
+    assert invalid.tolist() == [bool(validate_record(row)) for row in records]
+
+
+def test_invalid_ibans():
+    """
+    Given random ibans of all countries, valid and invalid ones
+    When validating them as column
+    Then they agree with `validate_ibans`
+    """
+    rng = random.Random(0)
+    values = []
+    for _ in range(2000):
+        country = rng.choice(list(IBAN_FORMATS))
+        bban = "".join(rng.choices(string.digits, k=REGISTRY[country][0] - 4))
+        value = f"{country}{98 - mod97(f'{country}00{bban}'):02d}{bban}"
+        values.append(
+            rng.choice(
+                [value, value[:-1], value[:-1] + rng.choice("0123456789ab é"), "XX"]
+            )
+        )
+    expected = np.zeros(len(values), dtype=bool)
+    expected[[index for index, _ in validate_ibans(values)]] = True
+    assert invalid_ibans(np.asarray(values, dtype=str)).tolist() == expected.tolist()
+
+
+def test_empty_columns():
+    """
+    Given empty columns
+    When building the payloads
+    Then the result is empty
+    """
+    res = consumer_payloads([], [], [], [])
+    assert len(res.payloads) == len(res.invalid) == 0
+
+
+def test_to_cents_and_format_amounts():
+    """
+    Given amounts of mixed types
+    When converting and formatting them
+    Then strings and decimals are taken exactly, and the cents are formatted with two decimals
+    """
+    cents, invalid = to_cents(
+        ["1.5", "abc", None, Decimal("0.010"), "12.300000000000000001"]
+    )
+    assert cents.tolist() == [150, 0, 0, 1, 0]
+    assert invalid.tolist() == [False, True, True, False, True]
+    assert to_cents(np.array([1, 2.5, 0.001]))[1].tolist() == [False, False, True]
+    assert format_amounts(np.array([1, 10, 1230, 99999999999])).tolist() == [
+        "EUR0.01",
+        "EUR0.10",
+        "EUR12.30",
+        "EUR999999999.99",
+    ]
+
+
+def test_from_frame():
+    """
+    Given a pandas DataFrame with missing values
+    When building the payloads
+    Then rows with missing values are invalid
+    """
+    pd = pytest.importorskip("pandas")
+    frame = pd.DataFrame(COLUMNS)
+    frame.loc[1, "beneficiary"] = None
+    res = from_frame(frame)
+    assert res.invalid.tolist() == [False, True, True, True, True, True]
+    assert res.payloads[0] == consumer_payloads(*COLUMNS.values()).payloads[0]
+
+
+def test_from_arrow():
+    """
+    Given an Arrow table with missing values
+    When building the payloads
+    Then rows with missing values are invalid
+    """
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table(
+        {
+            "beneficiary": ["Max", None, "Erika"],
+            "iban": ["DE89370400440532013000", "DE89370400440532013000", None],
+            "amount": [1.5, 2.0, 3.0],
+            "remittance": ["x", "y", "z"],
+        }
+    )
+    res = from_arrow(table)
+    assert res.invalid.tolist() == [False, True, True]
+    assert (
+        res.payloads[0]
+        == consumer_epc_qr("Max", "DE89370400440532013000", 1.5, "x").to_str()
+    )
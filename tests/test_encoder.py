@@ -0,0 +1,142 @@
+"""
+Tests for the vectorized encoder.
+"""
+
+import random
+
+import numpy as np
+import pytest
+import qrcode
+
+from py_epc_qr.encoder import (
+    ERROR_CORRECT_H,
+    ERROR_CORRECT_L,
+    ERROR_CORRECT_M,
+    ERROR_CORRECT_Q,
+    choose_version,
+    encode,
+    get_template,
+    matrix_version,
+)
+
+
+def get_reference_modules(data, version, error_correction) -> np.ndarray:
+    """
+    Generate the module matrix with the generic qrcode library.
+    """
+    qr = qrcode.QRCode(version=version, error_correction=error_correction)
+    qr.add_data(data)
+    qr.make()
+    return np.array(qr.modules, dtype=bool)
+
+
+def get_random_payload(seed: int, length: int) -> str:
+    """
+    Generate a reproducible payload mixing digits, alphanumeric and other characters.
+    """
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ äöüß$%*+-./:\n"
+    return "".join(
+        rng.choice("0123456789" if rng.random() < 0.5 else letters)
+        for _ in range(length)
+    )
+
+
+@pytest.mark.parametrize(
+    "error_correction",
+    [ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q, ERROR_CORRECT_H],
+)
+@pytest.mark.parametrize("version", [1, 6, 7, 13])
+@pytest.mark.parametrize("length", [1, 20, 21, 120, 331])
+def test_encode_matches_qrcode(length, version, error_correction):
+    """
+    Given a payload of some length
+    When encoding it with a start version and error correction level
+    Then the module matrix equals the one of the qrcode library
+    """
+    data = get_random_payload(length * version + error_correction, length)
+    expected = get_reference_modules(data, version, error_correction)
+    np.testing.assert_array_equal(encode(data, version, error_correction), expected)
+
+
+def test_encode_epc_qr_matches_qrcode(epc):
+    """
+    Given the QR example from wikipedia
+    When encoding it
+    Then the module matrix equals the one of the qrcode library
+    """
+    data = epc.to_str()
+    expected = get_reference_modules(data, 6, ERROR_CORRECT_M)
+    np.testing.assert_array_equal(encode(data), expected)
+
+
+@pytest.mark.parametrize("mask_pattern", range(8))
+def test_encode_with_mask_pattern(mask_pattern):
+    """
+    Given a fixed mask pattern
+    When encoding a payload
+    Then the module matrix equals the one of the qrcode library
+    """
+    data = get_random_payload(mask_pattern, 100)
+    qr = qrcode.QRCode(version=6, mask_pattern=mask_pattern)
+    qr.add_data(data)
+    qr.make()
+    np.testing.assert_array_equal(
+        encode(data, mask_pattern=mask_pattern), np.array(qr.modules, dtype=bool)
+    )
+
+
+@pytest.mark.parametrize("length", [1, 50, 100, 200, 331])
+def test_encode_smallest_version_matches_qrcode(length):
+    """
+    Given a payload of some length
+    When encoding it without start version
+    Then the smallest version that fits is chosen like by the qrcode library
+    """
+    data = get_random_payload(length, length)
+    expected = get_reference_modules(data, None, ERROR_CORRECT_M)
+    modules = encode(data, version=None)
+    np.testing.assert_array_equal(modules, expected)
+    assert matrix_version(modules) == choose_version(data, None)
+
+
+def test_encode_max_version_raises_exception():
+    """
+    Given a payload exceeding the capacity of the largest allowed version
+    When encoding it
+    Then an exception is raised
+    """
+    data = get_random_payload(0, 200)
+    assert choose_version(data, None, max_version=13) <= 13
+    with pytest.raises(ValueError):
+        encode(data, version=None, max_version=6)
+
+
+def test_encode_raises_exception():
+    """
+    Given a payload exceeding the capacity of version 40
+    When encoding it
+    Then an exception is raised
+    """
+    with pytest.raises(ValueError):
+        encode("a" * 3000, error_correction=ERROR_CORRECT_H)
+
+
+def test_get_template_is_cached_and_read_only():
+    """
+    Given a version, error correction level and mask pattern
+    When encoding a payload with its template
+    Then the template is shared between calls and left untouched
+    """
+    base = get_template(6, ERROR_CORRECT_M, 3)
+    assert get_template(6, ERROR_CORRECT_M, 3) is base
+    assert not base.modules.flags.writeable
+    snapshot = base.modules.copy()
+    modules = encode(get_random_payload(0, 100), mask_pattern=3)
+    assert modules.flags.writeable
+    np.testing.assert_array_equal(base.modules, snapshot)
+    function = np.ones(modules.size, dtype=bool)
+    function[base.index] = False
+    np.testing.assert_array_equal(
+        modules.ravel()[function], base.modules.ravel()[function]
+    )
@@ -0,0 +1,113 @@
+"""
+Tests for the iban validation.
+"""
+
+import numpy as np
+import pytest
+
+from py_epc_qr.columnar import invalid_ibans
+from py_epc_qr.constants import IBAN_FORMATS
+from py_epc_qr.iban import REGISTRY, iban_error, mod97, mod97_many, validate_ibans
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "DE33100205000001194700",
+        "DE89370400440532013000",
+        "AT611904300234573201",
+        "FR1420041010050500013M02606",
+        "GB82WEST12345698765432",
+        "NL91ABNA0417164300",
+        "IT60X0542811101000000123456",
+    ],
+)
+def test_iban_error_accepts_valid_iban(value):
+    """
+    Given a valid iban
+    When validating it
+    Then no error is found
+    """
+    assert mod97(value) == 1
+    assert iban_error(value) is None
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("DE33 100205000001194700", "iban.not_alphanumeric"),
+        ("XX33100205000001194700", "iban.country_code"),
+        ("de33100205000001194700", "iban.country_code"),
+        ("DEA3100205000001194700", "iban.check_digits"),
+        ("DE3310020500000119470", "iban.length"),
+        ("DE3310020500000119470A", "iban.format"),
+        ("CH6104835012345678a09", "iban.format"),
+        ("DE34100205000001194700", "iban.checksum"),
+        ("DE33100205000001194070", "iban.checksum"),
+    ],
+)
+def test_iban_error_rejects_invalid_iban(value, expected):
+    """
+    Given an invalid iban
+    When validating it
+    Then the expected error code is returned
+    """
+    assert iban_error(value) == expected
+
+
+def test_registry():
+    """
+    Given the iban formats of all countries
+    When compiling the registry
+    Then lengths are within the limits of ISO 13616
+    """
+    assert REGISTRY.keys() == IBAN_FORMATS.keys()
+    assert REGISTRY["DE"][0] == 22
+    assert all(15 <= length <= 34 for length, _ in REGISTRY.values())
+
+
+def test_validate_ibans():
+    """
+    Given a column of recurring ibans
+    When validating them at once
+    Then the invalid ones are reported by index
+    """
+    values = ["DE33100205000001194700", "DE34100205000001194700"] * 3
+    assert validate_ibans(values) == [
+        (1, "iban.checksum"),
+        (3, "iban.checksum"),
+        (5, "iban.checksum"),
+    ]
+
+
+def test_lowercase_iban_is_rejected_alike():
+    """
+    Given an iban whose alphanumeric bban part holds a lower case letter, which is valid in upper case
+    When validating it as single value, in bulk and as column
+    Then all three reject its format
+    """
+    valid, lower = "CH6104835012345678A09", "CH6104835012345678a09"
+    assert iban_error(valid) is None
+    assert iban_error(lower) == "iban.format"
+    assert validate_ibans([valid, lower]) == [(1, "iban.format")]
+    assert invalid_ibans(np.asarray([valid, lower])).tolist() == [False, True]
+
+
+def test_mod97_many():
+    """
+    Given ibans of different lengths and with letters
+    When computing their checksums at once
+    Then they equal the checksums of the integers
+    """
+    values = [
+        "DE33100205000001194700",
+        "FR1420041010050500013M02606",
+        "NL00ABNA0417164300",
+    ]
+    expected = [
+        int((value[4:] + value[:4]).translate({c: str(c - 55) for c in range(65, 91)}))
+        % 97
+        for value in values
+    ]
+    assert mod97_many(values).tolist() == expected
+    assert [mod97(value) for value in values] == expected
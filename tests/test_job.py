@@ -0,0 +1,121 @@
+"""
+Tests for the resumable batch jobs.
+"""
+
+import json
+import sqlite3
+from itertools import islice
+
+import pytest
+
+from py_epc_qr.job import count_lines, run
+
+
+@pytest.fixture
+def source(tmp_path) -> str:
+    """
+    Return a jsonl file of ten transfers, of which the fourth is invalid.
+    """
+    path = tmp_path / "transfers.jsonl"
+    rows = [
+        {
+            "beneficiary": "$$" if index == 3 else f"Max {index}",
+            "iban": "DE89370400440532013000",
+            "amount": 1 + index,
+            "remittance": "Spende",
+        }
+        for index in range(10)
+    ]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    return str(path)
+
+
+def test_job_resumes_after_interrupt(tmp_path, source):
+    """
+    Given a job that is interrupted after five rows
+    When running it again
+    Then it continues with the sixth row, and all rows are done once
+    """
+    out = str(tmp_path / "qr")
+    results = run(source, out, interval=0)
+    assert [res.line for res in islice(results, 5)] == [1, 2, 3, 4, 5]
+    results.close()
+
+    progress = []
+    results = list(run(source, out, progress=progress.append))
+    assert [res.line for res in results] == [4, 6, 7, 8, 9, 10]
+    assert progress[-1][:4] == (10, 10, 10, 1)
+    assert [(res.line, res.skipped) for res in run(source, out)] == [(4, True)]
+
+    db = sqlite3.connect(f"{out}.job.sqlite")
+    assert db.execute("SELECT line FROM rows WHERE error IS NOT NULL").fetchall() == [
+        (4,)
+    ]
+    db.close()
+
+
+def test_job_delivers_rows_again_idempotently(tmp_path, source):
+    """
+    Given a job that crashed after writing rows but before its checkpoint was committed
+    When running it again
+    Then the rows already written are skipped instead of rendered twice
+    """
+    out = str(tmp_path / "qr.tar")
+    list(run(source, out))
+    db = sqlite3.connect(f"{out}.job.sqlite")
+    with db:
+        db.execute("UPDATE state SET value = '0' WHERE key = 'line'")
+    db.close()
+
+    results = list(run(source, out))
+    assert [res.skipped for res in results] == [True] * 3 + [False] + [True] * 6
+    assert results[0].name == "000001.png"
+
+
+def test_job_reports_earlier_failures(tmp_path, source):
+    """
+    Given a job that is interrupted after the invalid fourth row
+    When running it again, and once more after it is done
+    Then the failure of the fourth row is reported again by both runs
+    """
+    out = str(tmp_path / "qr")
+    results = run(source, out, interval=0)
+    assert [res.line for res in islice(results, 5)] == [1, 2, 3, 4, 5]
+    results.close()
+
+    for lines in [[4, 6, 7, 8, 9, 10], [4]]:
+        results = list(run(source, out))
+        assert [res.line for res in results] == lines
+        assert results[0].skipped
+        assert "not alphanumeric" in results[0].error
+
+
+def test_job_of_different_options(tmp_path, source):
+    """
+    Given a checkpoint of a job
+    When running a job with other options on it
+    Then a ValueError is raised
+    """
+    out = str(tmp_path / "qr")
+    list(run(source, out))
+    with pytest.raises(ValueError, match="different job"):
+        list(run(source, out, out_format="svg"))
+
+
+def test_job_rejects_zip(tmp_path, source):
+    """
+    Given a zip archive as output
+    When running a job
+    Then a ValueError is raised
+    """
+    with pytest.raises(ValueError):
+        list(run(source, str(tmp_path / "qr.zip")))
+
+
+def test_count_lines(source):
+    """
+    Given a file of ten lines
+    When counting its lines
+    Then ten is returned
+    """
+    assert count_lines(source) == 10
@@ -0,0 +1,87 @@
+"""
+Tests for the instrumentation.
+"""
+
+import io
+
+import pytest
+
+from py_epc_qr import metrics
+from py_epc_qr.transaction import consumer_epc_qr
+
+
+@pytest.fixture
+def registry():
+    """
+    Enable the default registry for a test, and disable and empty it afterwards.
+    """
+    metrics.registry.reset()
+    metrics.enable()
+    yield metrics.registry
+    metrics.disable()
+    metrics.registry.reset()
+
+
+def test_disabled_registry_records_nothing(epc):
+    """
+    Given the disabled default registry
+    When rendering a qr code
+    Then nothing is recorded
+    """
+    metrics.registry.reset()
+    epc.to_bytes()
+    assert metrics.registry.snapshot() == {"counters": {}, "timers": {}}
+
+
+def test_registry_records_stages(registry, epc):
+    """
+    Given the enabled default registry
+    When writing a qr code to a buffer
+    Then every stage is timed and counted
+    """
+    with io.BytesIO() as buffer:
+        epc.to_buffer(buffer, "svg")
+        size = len(buffer.getvalue())
+    snapshot = registry.snapshot()
+    assert snapshot["counters"] == {
+        ("qr_versions", (("version", 6),)): 1,
+        ("codes_rendered", (("fmt", "svg"),)): 1,
+        ("bytes_written", ()): size,
+    }
+    assert {name for name, _ in snapshot["timers"]} == {
+        "validate",
+        "encode",
+        "render",
+        "write",
+    }
+    assert all(stats.count == 1 for stats in snapshot["timers"].values())
+
+
+def test_registry_counts_validation_failures(registry):
+    """
+    Given the enabled default registry
+    When creating an invalid epc qr code
+    Then the validation failure is counted by error code
+    """
+    with pytest.raises(ValueError):
+        consumer_epc_qr("ben", "DE33100205000001194700", -1, "Danke")
+    assert registry.snapshot()["counters"] == {
+        ("validation_failures", (("code", "amount.out_of_bounds"),)): 1
+    }
+
+
+def test_callbacks():
+    """
+    Given a separate registry with a subscribed callback
+    When reporting a counter and a timer
+    Then the callback receives both
+    """
+    reports = []
+    registry = metrics.MetricsRegistry(enabled=True)
+    registry.subscribe(lambda *args: reports.append(args))
+    registry.count("codes_rendered", 2, fmt="png")
+    with registry.timer("encode"):
+        pass
+    assert reports[0] == ("counter", "codes_rendered", 2, {"fmt": "png"})
+    assert reports[1][:2] == ("timer", "encode")
+    assert registry.snapshot()["timers"][("encode", ())].count == 1
@@ -0,0 +1,176 @@
+"""
+Tests for the writers of qr code files.
+"""
+
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from py_epc_qr.batch import generate
+from py_epc_qr.output import (
+    MANIFEST,
+    DirectoryWriter,
+    Manifest,
+    ShardedWriter,
+    TarWriter,
+    ZipWriter,
+    open_writer,
+    recover,
+)
+
+
+def test_sharded_writer(tmp_path):
+    """
+    Given a sharded writer with a manifest
+    When writing files
+    Then they are placed in nested shards, and the manifest records their locations
+    """
+    with ShardedWriter(str(tmp_path), manifest=True) as writer:
+        writer.write("a.png", b"a", "digest-a")
+        writer.write("b.png", b"b")
+    files = sorted(
+        os.path.relpath(os.path.join(root, name), tmp_path)
+        for root, _, names in os.walk(tmp_path)
+        for name in names
+    )
+    assert files == sorted([MANIFEST, "69/ab/a.png", "59/34/b.png"])
+    assert (tmp_path / "69/ab/a.png").read_bytes() == b"a"
+    assert (tmp_path / MANIFEST).read_text() == "digest-a\t69/ab/a.png\n"
+
+
+def test_manifest_resume(tmp_path):
+    """
+    Given a manifest with a partial last line and an entry of a missing file
+    When resuming it
+    Then only the complete entries of existing files are kept
+    """
+    path = tmp_path / MANIFEST
+    path.write_text("x\ta.png\ny\tb.png\nz\tc.p")
+    manifest = Manifest(str(path), resume=True, keep={"a.png", "c.png"})
+    manifest.close()
+    assert manifest.entries == {"a.png": "x"}
+    assert path.read_text() == "x\ta.png\n"
+    Manifest(str(path)).close()
+    assert path.read_text() == ""
+
+
+@pytest.mark.parametrize("suffix", [".zip", ".tar"])
+def test_archive_appears_when_closed(tmp_path, suffix):
+    """
+    Given an archive writer
+    When writing entries
+    Then the archive is only moved to its final name when closed
+    """
+    path = str(tmp_path / f"qr{suffix}")
+    writer = open_writer(path)
+    writer.write("a.png", b"a")
+    assert not os.path.exists(path) and os.path.exists(f"{path}.part")
+    writer.close()
+    assert os.listdir(tmp_path) == [f"qr{suffix}"]
+
+
+def test_tar_writer_resumes_after_crash(tmp_path):
+    """
+    Given a tar archive left behind by a crash in the middle of a member
+    When resuming it
+    Then the complete members and their manifest entries are kept, and new members are appended
+    """
+    path = str(tmp_path / "qr.tar")
+    writer = TarWriter(path, manifest=True)
+    for index in range(3):
+        writer.write(f"{index}.png", bytes(1000), f"digest-{index}")
+    writer.file.flush()
+    writer.manifest.file.flush()
+    size = os.path.getsize(writer.part)
+    with open(writer.part, "r+b") as file:
+        file.truncate(size - 100)
+
+    assert recover(writer.part)[0] == {"0.png", "1.png"}
+    with TarWriter(path, resume=True) as writer:
+        assert writer.manifest.entries == {"0.png": "digest-0", "1.png": "digest-1"}
+        writer.write("3.png", b"3", "digest-3")
+    with tarfile.open(path) as archive:
+        assert archive.getnames() == ["0.png", "1.png", "3.png"]
+        assert archive.extractfile("3.png").read() == b"3"
+
+
+def test_open_writer_throws_error(tmp_path):
+    """
+    Given an archive
+    When asking for a sharded writer
+    Then a ValueError is raised
+    """
+    with pytest.raises(ValueError):
+        open_writer(str(tmp_path / "qr.zip"), shard=True)
+
+
+def test_generate_resumes(tmp_path):
+    """
+    Given a zip archive created with a manifest from part of a csv file
+    When generating the qr codes of the whole file again with resume
+    Then the existing codes are skipped and only the missing one is added
+    """
+    path = str(tmp_path / "qr.zip")
+    source = tmp_path / "part.csv"
+    lines = open("tests/data/batch.csv").read().splitlines(keepends=True)
+    source.write_text("".join(lines[:2]))
+    with ZipWriter(path, manifest=True) as writer:
+        assert [
+            res.name for res in generate(str(source), writer, name_field="invoice")
+        ] == ["R0001.png"]
+
+    with ZipWriter(path, resume=True) as writer:
+        results = list(generate("tests/data/batch.csv", writer, name_field="invoice"))
+    assert [(res.name, res.skipped) for res in results] == [
+        ("R0001.png", True),
+        ("", False),
+        ("R0003.png", False),
+    ]
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ["R0001.png", "R0003.png"]
+    assert len(open(f"{path}.{MANIFEST}").readlines()) == 2
+
+
+def test_generate_resumes_by_payload_and_name(tmp_path):
+    """
+    Given a sharded directory created with a manifest, and a csv file that repeats a payload under another name
+    When generating the qr codes again with resume and two processes
+    Then only the code of the same payload under the same name is skipped
+    """
+    source = tmp_path / "batch.csv"
+    lines = open("tests/data/batch.csv").read().splitlines(keepends=True)
+    source.write_text("".join(lines[:2]))
+    with ShardedWriter(str(tmp_path / "qr"), manifest=True) as writer:
+        list(generate(str(source), writer, name_field="invoice"))
+
+    source.write_text("".join(lines + [lines[1].replace("R0001", "R0004")]))
+    with ShardedWriter(str(tmp_path / "qr"), resume=True) as writer:
+        results = list(generate(str(source), writer, name_field="invoice", workers=2))
+    assert [(res.name, res.skipped) for res in results] == [
+        (writer.location("R0001.png"), True),
+        ("", False),
+        ("R0003.png", False),
+        ("R0004.png", False),
+    ]
+    assert len(writer.manifest.entries) == 3
+
+
+def test_generate_resumes_by_render_settings(tmp_path):
+    """
+    Given a directory created with a manifest
+    When generating the qr codes again with resume, but another qr code version
+    Then no code is skipped, since the existing ones were rendered with the old version
+    """
+    with DirectoryWriter(str(tmp_path), manifest=True) as writer:
+        list(generate("tests/data/batch.csv", writer, name_field="invoice"))
+    with DirectoryWriter(str(tmp_path), resume=True) as writer:
+        results = list(
+            generate("tests/data/batch.csv", writer, name_field="invoice", qr_version=7)
+        )
+    assert [(res.name, res.skipped) for res in results] == [
+        ("R0001.png", False),
+        ("", False),
+        ("R0003.png", False),
+    ]
@@ -0,0 +1,43 @@
+"""
+Tests for the parallel rendering.
+"""
+
+import pytest
+
+from py_epc_qr.parallel import imap, render_many
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_many_isolates_failures(workers, epc):
+    """
+    Given a sequence of epc qr codes containing an invalid item
+    When rendering them in parallel
+    Then the invalid item fails and all others succeed in order
+    """
+    epcs = [epc, "not an epc qr", epc, epc]
+    results = list(render_many(epcs, workers=workers, chunksize=1))
+    assert [res.index for res in results] == [0, 1, 2, 3]
+    assert isinstance(results[1].error, AttributeError)
+    expected = epc.to_bytes("png")
+    assert [res.value for res in results] == [expected, None, expected, expected]
+
+
+def test_imap_unordered():
+    """
+    Given more items than chunks in flight
+    When mapping unordered with a process pool
+    Then every item is returned exactly once
+    """
+    results = list(imap(abs, range(-100, 0), workers=2, chunksize=3, ordered=False))
+    assert sorted(res.index for res in results) == list(range(100))
+    assert all(res.value == 100 - res.index for res in results)
+
+
+def test_render_many_svg(epc):
+    """
+    Given a sequence of epc qr codes
+    When rendering them in parallel as svg
+    Then each item holds the svg data
+    """
+    results = list(render_many([epc] * 3, workers=2, fmt="svg"))
+    assert [res.value for res in results] == [epc.to_bytes("svg")] * 3
@@ -22,7 +22,7 @@ def get_valid_dummy_iban() -> str:
     """
     Generate a valid dummy IBAN.
     """
-    return "DE" + "1" * 18
+    return "DE89370400440532013000"
 
 
 class TestEpcQr:
@@ -152,6 +152,72 @@ class TestEpcQr:
         with pytest.raises(AssertionError):
             epc_qr("001", 1, "", "", get_valid_dummy_iban(), 10.00, "", "", "", "")
 
+    def test_consumer_epc_qr_optional_entries(self):
+        """
+        Given a bic, purpose code and originator information
+        When creating a consumer epc qr of version 001
+        Then the entries are part of the EPC-compliant string, and the bic cannot be removed
+        """
+        qr = consumer_epc_qr(
+            "Wikimedia Foerdergesellschaft",
+            "DE33100205000001194700",
+            10,
+            "Spende",
+            bic="BFSWDE33BER",
+            purpose="CHAR",
+            originator_information="Danke",
+            version="001",
+        )
+        assert qr.to_str().split("\n") == [
+            "BCD",
+            "001",
+            "1",
+            "SCT",
+            "BFSWDE33BER",
+            "Wikimedia Foerdergesellschaft",
+            "DE33100205000001194700",
+            "EUR10.00",
+            "CHAR",
+            "",
+            "Spende",
+            "Danke",
+        ]
+        assert epc_qr.from_str(qr.to_str()).to_str() == qr.to_str()
+        with pytest.raises(AssertionError):
+            qr.bic = ""
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            {"bic": "BFSWDE3"},
+            {"bic": "bfswde33ber"},
+            {"purpose": "XXXX"},
+            {"originator_information": "a" * 71},
+            {"originator_information": "Danke\nDanke"},
+        ],
+    )
+    def test_consumer_epc_qr_optional_entries_raise_exception(self, options):
+        """
+        Given an invalid bic, purpose code or originator information
+        When creating a consumer epc qr
+        Then a ValueError is raised
+        """
+        with pytest.raises(ValueError):
+            consumer_epc_qr("ben benefit", get_valid_dummy_iban(), 1, "x", **options)
+
+    def test_epc_qr_payload_too_long_raises_exception(self):
+        """
+        Given entries that are valid on their own, but exceed 331 bytes once encoded in utf-8
+        When creating an epc qr, or changing an entry of a valid one
+        Then a ValueError is raised
+        """
+        with pytest.raises(ValueError, match="must not exceed 331"):
+            consumer_epc_qr("Ä" * 70, get_valid_dummy_iban(), 1, "ü" * 140)
+        qr = consumer_epc_qr("Ä" * 70, get_valid_dummy_iban(), 1, "ü")
+        qr.remittance_unstructured = "ü" * 140
+        with pytest.raises(ValueError, match="must not exceed 331"):
+            qr.to_encoded()
+
     @pytest.mark.parametrize(
         "value", ["123", "DEA1", "DE12%", "DE12" + "a" * 31, "Hallo ,:"]
     )
@@ -174,6 +240,98 @@ class TestEpcQr:
         with pytest.raises(ValueError):
             consumer_epc_qr("ben benefit", get_valid_dummy_iban(), 0.01, value)
 
+    def test_epc_qr_auto_qr_version(self):
+        """
+        Given a short payload and the automatic qr code version
+        When creating an epc qr as matrix
+        Then the smallest fitting version is chosen and reported
+        """
+        qr = consumer_epc_qr("me", "DE33100205000001194700", 10, "x", qr_version=None)
+        modules = qr.to_matrix()
+        assert qr.fit_qr_version() == 4
+        assert modules.shape == (33, 33)
+
+    def test_epc_qr_max_qr_version_raises_exception(self):
+        """
+        Given a payload longer than the largest qr code version holds
+        When creating an epc qr as matrix
+        Then an exception is raised
+        """
+        qr = consumer_epc_qr(
+            "ben benefit", get_valid_dummy_iban(), 10, "a" * 140, max_qr_version=6
+        )
+        with pytest.raises(ValueError):
+            qr.to_matrix()
+
+    @pytest.mark.parametrize("value", [0, 41, "auto", 6.0, True])
+    def test_epc_qr_qr_version_raises_exception(self, value):
+        """
+        Given an invalid qr code version
+        When creating an epc qr
+        Then an exception is raised
+        """
+        with pytest.raises(ValueError):
+            consumer_epc_qr("me", get_valid_dummy_iban(), 10, "x", qr_version=value)
+
+    @pytest.mark.parametrize(
+        "file_name", ["tests/data/qr_version_001.txt", "tests/data/qr_version_002.txt"]
+    )
+    def test_epc_qr_from_str(self, file_name):
+        """
+        Given an EPC-compliant string
+        When creating an epc qr from it
+        Then it is written back unchanged
+        """
+        with open(file_name, "r") as file:
+            payload = file.read()
+        assert epc_qr.from_str(payload).to_str() == payload
+
+    @pytest.mark.parametrize("encoding", [1, 2, 8])
+    def test_epc_qr_from_encoded(self, encoding):
+        """
+        Given an epc qr with umlauts in some character set
+        When creating an epc qr from the encoded string
+        Then it equals the original
+        """
+        qr = epc_qr(
+            "001",
+            encoding,
+            "BFSWDE33BER",
+            "Müller",
+            get_valid_dummy_iban(),
+            10,
+            "",
+            "",
+            "März",
+            "",
+        )
+        payload = qr.to_encoded()
+        assert payload.count("ü".encode(qr.resolve_encoding())) == 1
+        assert epc_qr.from_encoded(payload).to_str() == qr.to_str()
+
+    @pytest.mark.parametrize("payload", [b"BCD\n002", b"BCD\n002\n9\nSCT"])
+    def test_epc_qr_from_encoded_raises_exception(self, payload):
+        """
+        Given an encoded string without valid encoding entry
+        When creating an epc qr from it
+        Then an exception is raised
+        """
+        with pytest.raises(ValueError):
+            epc_qr.from_encoded(payload)
+
+    @pytest.mark.parametrize(
+        "payload",
+        ["", "BCD\n002\n1\nSCX", "BCD\n002\n1\nSCT\n\nme\nDE89370400440532013000\n10"],
+    )
+    def test_epc_qr_from_str_raises_exception(self, payload):
+        """
+        Given a string that is no EPC-compliant string
+        When creating an epc qr from it
+        Then an exception is raised
+        """
+        with pytest.raises(ValueError):
+            epc_qr.from_str(payload)
+
     def test_epc_qr_from_yaml(self):
         """
         Given a yaml template
@@ -189,6 +347,15 @@ class TestEpcQr:
         )
         assert epc_qr_src.to_txt() == epc_qe_tgt.to_txt()
 
+    def test_epc_qr_from_yaml_with_optional_entries(self):
+        """
+        Given a yaml template with bic, purpose code and version
+        When creating an epc qr
+        Then the optional entries are taken over
+        """
+        qr = consumer_epc_qr.from_yaml("tests/data/template_bic.yaml")
+        assert (qr.version, qr.bic, qr.purpose) == ("001", "BFSWDE33BER", "CHAR")
+
     def test_epc_qr_from_yaml_raises_exception(self):
         """
         Given an invalid yaml template
@@ -0,0 +1,108 @@
+"""
+Tests for the compact epc qr code records and columns.
+"""
+
+import pickle
+
+import pytest
+
+from py_epc_qr.record import FIELDS, epc_columns, epc_record
+from py_epc_qr.transaction import consumer_epc_qr, epc_qr
+
+
+@pytest.fixture
+def epcs() -> list:
+    """
+    Return three consumer epc qr codes, of which the first and last are equal.
+    """
+    return [
+        consumer_epc_qr("Max Mustermann", "DE89370400440532013000", 12.3, "Invoice 1"),
+        consumer_epc_qr("Erika Musterfrau", "DE89370400440532013000", 5, "Invoice 2"),
+        consumer_epc_qr("Max Mustermann", "DE89370400440532013000", 12.3, "Invoice 1"),
+    ]
+
+
+def test_record_round_trip(epcs):
+    """
+    Given an epc qr code
+    When converting it to a record and back
+    Then the EPC-compliant strings match
+    """
+    record = epc_record.from_epc_qr(epcs[0])
+    assert record.to_str() == epcs[0].to_str()
+    assert record.to_epc_qr().to_str() == epcs[0].to_str()
+    assert record.amount == "EUR12.30"
+
+
+def test_record_is_immutable(epcs):
+    """
+    Given a record
+    When setting or deleting an entry
+    Then an AttributeError is raised, and there is no instance dictionary
+    """
+    record = epc_record.from_epc_qr(epcs[0])
+    with pytest.raises(AttributeError):
+        record.iban = "DE33100205000001194700"
+    with pytest.raises(AttributeError):
+        del record.iban
+    assert not hasattr(record, "__dict__")
+
+
+def test_record_equality(epcs):
+    """
+    Given records of equal and different epc qr codes
+    When deduplicating them in a set
+    Then equal records collapse, and pickling keeps them equal
+    """
+    records = [epc_record.from_epc_qr(epc) for epc in epcs]
+    assert records[0] == records[2] != records[1]
+    assert len(set(records)) == 2
+    assert pickle.loads(pickle.dumps(records[1])) == records[1]
+
+
+def test_record_validated_on_conversion(epcs):
+    """
+    Given a record with an invalid iban
+    When converting it to an epc qr code
+    Then a ValueError is raised
+    """
+    entries = dict(zip(FIELDS, epc_record.from_epc_qr(epcs[0]).entries()))
+    entries["iban"] = "DE00370400440532013000"
+    record = epc_record(**entries)
+    with pytest.raises(ValueError):
+        record.to_epc_qr()
+
+
+def test_columns(epcs):
+    """
+    Given epc qr codes
+    When storing them in columns
+    Then the entries, records and EPC-compliant strings agree with the codes
+    """
+    columns = epc_columns.from_epc_qrs(epcs)
+    assert len(columns) == 3
+    assert columns.column("beneficiary") == [epc.beneficiary for epc in epcs]
+    assert columns.to_strs() == [epc.to_str() for epc in epcs]
+    assert columns[1] == epc_record.from_epc_qr(epcs[1])
+    assert [epc.to_str() for epc in columns.to_epc_qrs()] == columns.to_strs()
+    assert isinstance(next(columns.to_epc_qrs()), epc_qr)
+
+
+def test_columns_from_records(epcs):
+    """
+    Given records
+    When storing them in columns and iterating them again
+    Then the same records are returned
+    """
+    records = [epc_record.from_epc_qr(epc) for epc in epcs]
+    assert list(epc_columns.from_records(records)) == records
+
+
+def test_columns_of_different_lengths():
+    """
+    Given columns of different lengths
+    When creating columns
+    Then a ValueError is raised
+    """
+    with pytest.raises(ValueError):
+        epc_columns({"iban": ["DE89370400440532013000"]})
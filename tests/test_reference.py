@@ -0,0 +1,115 @@
+"""
+Tests for the structured creditor references.
+"""
+
+import random
+import string
+
+import pytest
+
+from py_epc_qr.reference import (
+    creditor_reference,
+    creditor_references,
+    reference_error,
+    validate_references,
+)
+from py_epc_qr.transaction import consumer_epc_qr, epc_qr
+
+IBAN = "DE33100205000001194700"
+
+
+@pytest.mark.parametrize(
+    "value, code",
+    [
+        ("RF18539007547034", None),
+        ("RF18000000000539007547034", None),
+        ("539007547034", None),
+        ("RF19539007547034", "remittance_structured.rf_checksum"),
+        ("RF1853900754703", "remittance_structured.rf_checksum"),
+        ("RFAB539007547034", "remittance_structured.rf_format"),
+        ("RF180000000000539007547034", "remittance_structured.rf_format"),
+        ("RF18 5390 0754 7034", "remittance_structured.format"),
+        ("R" * 36, "remittance_structured.format"),
+        ("RF18539007547034ü", "remittance_structured.format"),
+    ],
+)
+def test_reference_error(value, code):
+    """
+    Given structured references, valid and invalid ones
+    When checking them
+    Then the expected error code is returned
+    """
+    assert reference_error(value) == code
+
+
+def test_creditor_reference():
+    """
+    Given an invoice number
+    When creating its RF creditor reference
+    Then it matches the example of ISO 11649, and invalid numbers raise a ValueError
+    """
+    assert creditor_reference("539007547034") == "RF18539007547034"
+    for value in ("", "abc", "A" * 22):
+        with pytest.raises(ValueError):
+            creditor_reference(value)
+
+
+def test_batch_references_agree():
+    """
+    Given random invoice numbers
+    When creating and checking their references at once
+    Then they agree with doing so one by one, and references with other check digits are found
+    """
+    rng = random.Random(0)
+    values = [
+        "".join(
+            rng.choices(string.ascii_uppercase + string.digits, k=rng.randint(1, 21))
+        )
+        for _ in range(1000)
+    ]
+    references = creditor_references(values)
+    assert references == [creditor_reference(value) for value in values]
+    assert validate_references(references) == []
+    corrupted = [
+        f"RF{(int(reference[2:4]) + 1) % 100:02d}{reference[4:]}"
+        for reference in references
+    ]
+    assert len(validate_references(corrupted)) == len(corrupted)
+    assert validate_references(["", "RF1"]) == [(1, "remittance_structured.rf_format")]
+
+
+def test_consumer_epc_qr_with_reference():
+    """
+    Given a consumer transfer with an RF creditor reference
+    When creating its epc qr code
+    Then the reference fills the structured remittance entry and the payload round-trips
+    """
+    epc = consumer_epc_qr("Max", IBAN, 10, reference="RF18539007547034")
+    assert epc.to_str().split("\n")[9:] == ["RF18539007547034", "", ""]
+    assert epc_qr.from_str(epc.to_str()).remittance_structured == "RF18539007547034"
+
+
+def test_remittances_are_exclusive():
+    """
+    Given a transfer with both structured and unstructured remittance
+    When creating its epc qr code or setting the other remittance later
+    Then a ValueError is raised
+    """
+    with pytest.raises(ValueError, match="must not both be given"):
+        consumer_epc_qr("Max", IBAN, 10, "Invoice", reference="RF18539007547034")
+    epc = consumer_epc_qr("Max", IBAN, 10, "Invoice")
+    with pytest.raises(ValueError, match="must not both be given"):
+        epc.remittance_structured = "RF18539007547034"
+
+
+def test_from_yaml_with_reference():
+    """
+    Given a yaml template with a reference instead of a remittance
+    When creating the epc qr code
+    Then the reference is the structured remittance
+    """
+    epc = consumer_epc_qr.from_yaml("tests/data/template_reference.yaml")
+    assert (epc.remittance_structured, epc.remittance_unstructured) == (
+        "RF18539007547034",
+        "",
+    )
@@ -0,0 +1,93 @@
+"""
+Tests for the in-memory rendering.
+"""
+
+import io
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+def test_to_bytes_png(capsys, epc):
+    """
+    Given an epc qr code
+    When rendering it as png in memory
+    Then the image equals the png file and nothing is printed
+    """
+    data = epc.to_bytes("png")
+    np.testing.assert_array_equal(
+        np.array(Image.open(io.BytesIO(data)).convert("1")),
+        np.array(Image.open("tests/data/qr_version_002.png").convert("1")),
+    )
+    assert capsys.readouterr().out == ""
+
+
+def test_to_bytes_pbm(epc):
+    """
+    Given an epc qr code
+    When rendering it as pbm
+    Then the bitmap holds the scaled modules within the quiet zone
+    """
+    data = epc.to_bytes("pbm")
+    header, pixels = data[:11], data[11:]
+    assert header == b"P4\n490 490\n"
+    bits = np.unpackbits(
+        np.frombuffer(pixels, dtype=np.uint8).reshape(490, -1), axis=1, count=490
+    ).astype(bool)
+    np.testing.assert_array_equal(bits[40:-40:10, 40:-40:10], epc.to_matrix())
+    assert not bits[:40].any()
+
+
+def test_to_bytes_svg(epc):
+    """
+    Given an epc qr code
+    When rendering it as svg
+    Then the path covers exactly the dark modules
+    """
+    svg = ET.fromstring(epc.to_bytes("svg"))
+    assert svg.get("viewBox") == "0 0 49 49"
+    assert svg.get("width") == "490"
+    path = svg.find("{http://www.w3.org/2000/svg}path").get("d")
+    modules = np.zeros((49, 49), dtype=bool)
+    for col, row, length in re.findall(r"M(\d+) (\d+)h(\d+)v1h-\d+z", path):
+        modules[int(row), int(col) : int(col) + int(length)] = True
+    np.testing.assert_array_equal(modules[4:-4, 4:-4], epc.to_matrix())
+    assert not modules[:4].any() and not modules[:, :4].any()
+
+
+def test_to_bytes_matrix(epc):
+    """
+    Given an epc qr code
+    When rendering it as raw matrix
+    Then the rows are packed into whole bytes
+    """
+    data = epc.to_bytes("matrix")
+    assert len(data) == 41 * 6
+    packed = np.frombuffer(data, dtype=np.uint8).reshape(41, 6)
+    np.testing.assert_array_equal(
+        np.unpackbits(packed, axis=1, count=41).astype(bool), epc.to_matrix()
+    )
+
+
+def test_to_buffer(epc):
+    """
+    Given an epc qr code and a caller-supplied buffer
+    When rendering it into the buffer
+    Then the buffer holds the rendered data
+    """
+    with io.BytesIO() as buffer:
+        epc.to_buffer(buffer, "svg")
+        assert buffer.getvalue() == epc.to_bytes("svg")
+
+
+def test_to_bytes_raises_exception(epc):
+    """
+    Given an unknown format
+    When rendering an epc qr code
+    Then an exception is raised
+    """
+    with pytest.raises(ValueError):
+        epc.to_bytes("gif")
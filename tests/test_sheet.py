@@ -0,0 +1,144 @@
+"""
+Tests for the print sheets.
+"""
+
+import re
+import zlib
+
+import numpy as np
+import pytest
+
+from py_epc_qr.decoder import modules_from_pixels
+from py_epc_qr.sheet import (
+    compose,
+    compose_page,
+    page_layout,
+    write_pdf,
+    write_tiff,
+)
+from py_epc_qr.transaction import consumer_epc_qr
+
+
+@pytest.fixture
+def epcs() -> list:
+    """
+    Return five consumer epc qr codes.
+    """
+    return [
+        consumer_epc_qr(f"Max {index}", "DE89370400440532013000", 10 + index, "Spende")
+        for index in range(5)
+    ]
+
+
+def test_compose_tiff(tmp_path, epcs):
+    """
+    Given five epc qr codes and a layout of two by two
+    When composing a tiff sheet without captions in two processes
+    Then it has two pages, and each cell holds the module matrix of its qr code
+    """
+    features = pytest.importorskip("PIL.features")
+    if not features.check("libtiff"):
+        pytest.skip("Pillow reads deflated tiff files only with libtiff")
+    from PIL import Image
+
+    layout = page_layout("a5", 2, 2, 5, 100)
+    file_name = str(tmp_path / "sheet.tif")
+    assert compose(epcs, file_name, layout=layout, caption=None, workers=2) == 2
+
+    with Image.open(file_name) as img:
+        assert img.n_frames == 2
+        img.seek(1)
+        assert img.size == (layout.width, layout.height)
+        pixels = np.asarray(img.convert("L")) < 128
+    cell_width = (layout.width - 2 * layout.margin) // 2
+    cell_height = (layout.height - 2 * layout.margin) // 2
+    top, left = layout.margin, layout.margin
+    cell = pixels[top : top + cell_height, left : left + cell_width]
+    assert np.array_equal(modules_from_pixels(cell), epcs[4].to_matrix())
+    assert not pixels[:, layout.margin + cell_width :].any()
+
+
+def test_compose_pdf(tmp_path, epcs):
+    """
+    Given five epc qr codes and a layout of three by one
+    When composing a pdf sheet
+    Then its cross-reference table points to all objects, and the images are the composed pages
+    """
+    layout = page_layout(columns=3, rows=1, dpi=72)
+    file_name = tmp_path / "sheet.pdf"
+    assert compose(epcs, str(file_name), layout=layout) == 2
+
+    data = file_name.read_bytes()
+    assert data.startswith(b"%PDF-1.4") and data.endswith(b"%%EOF\n")
+    xref = int(re.search(rb"startxref\n(\d+)", data).group(1))
+    offsets = re.findall(rb"(\d{10}) 00000 n ", data[xref:])
+    for number, offset in enumerate(offsets, start=1):
+        assert data[int(offset) :].startswith(b"%d 0 obj" % number)
+    assert b"/Type /Pages /Kids [5 0 R 8 0 R] /Count 2" in data
+
+    image = re.search(rb"/Length (\d+) >>\nstream\n", data)
+    stream = data[image.end() : image.end() + int(image.group(1))]
+    captions = [[epc.beneficiary, f"{epc.amount[3:]} EUR"] for epc in epcs[:3]]
+    page = compose_page((epcs[:3], captions, tuple(layout)))
+    assert zlib.decompress(stream) == page.tobytes()
+
+
+def test_compose_unknown_format(tmp_path, epcs):
+    """
+    Given a file name with an unsupported extension
+    When composing a sheet
+    Then a ValueError is raised
+    """
+    with pytest.raises(ValueError, match="not supported"):
+        compose(epcs, str(tmp_path / "sheet.png"))
+
+
+def test_cells_too_small(tmp_path, epcs):
+    """
+    Given a layout whose cells are smaller than a qr code
+    When composing a sheet
+    Then a ValueError is raised
+    """
+    layout = page_layout(columns=50, rows=50, dpi=72)
+    with pytest.raises(ValueError, match="too small"):
+        compose(epcs, str(tmp_path / "sheet.pdf"), layout=layout)
+
+
+@pytest.mark.parametrize("write", [write_pdf, write_tiff])
+def test_empty_sheet(tmp_path, write):
+    """
+    Given no pages
+    When writing a pdf or tiff sheet
+    Then a ValueError is raised
+    """
+    with open(tmp_path / "sheet", "wb") as file:
+        with pytest.raises(ValueError, match="at least one page"):
+            write([], file, page_layout())
+
+
+def test_compose_empty_pdf(tmp_path):
+    """
+    Given no epc qr codes
+    When composing a pdf sheet
+    Then a ValueError is raised
+    """
+    with pytest.raises(ValueError, match="at least one page"):
+        compose([], str(tmp_path / "sheet.pdf"))
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"page_size": "a3"},
+        {"columns": 0},
+        {"margin": 200},
+    ],
+)
+def test_page_layout_throws_error(options):
+    """
+    Given an unsupported page size, no columns or too wide margins
+    When creating a layout
+    Then a ValueError is raised
+    """
+    with pytest.raises(ValueError):
+        page_layout(**options)
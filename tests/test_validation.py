@@ -0,0 +1,161 @@
+"""
+Tests for the single-pass validation.
+"""
+
+import pytest
+
+from py_epc_qr.checks import check_amount, check_version
+from py_epc_qr.validation import (
+    raise_violations,
+    to_error,
+    validate_column,
+    validate_record,
+    validate_records,
+)
+
+
+def get_valid_record() -> dict:
+    """
+    Generate the record of the QR example from wikipedia.
+    """
+    return {
+        "beneficiary": "Wikimedia Foerdergesellschaft",
+        "iban": "DE33100205000001194700",
+        "amount": 123.45,
+        "remittance": "Spende fuer Wikipedia",
+    }
+
+
+def test_validate_record_reports_all_violations():
+    """
+    Given a record with several invalid entries
+    When validating it
+    Then every violation is reported with its code
+    """
+    record = {**get_valid_record(), "amount": -10, "iban": "D%", "remittance": "$$"}
+    assert [(item.field, item.code) for item in validate_record(record)] == [
+        ("iban", "iban.not_alphanumeric"),
+        ("amount", "amount.out_of_bounds"),
+        ("remittance_unstructured", "remittance_unstructured.not_alphanumeric"),
+    ]
+    assert validate_record(get_valid_record()) == []
+
+
+def test_validate_record_with_version():
+    """
+    Given a record of version 001 without bic
+    When validating it
+    Then the version is reported with an AssertionError
+    """
+    (item,) = validate_record({"version": "001", "bic": ""})
+    assert isinstance(to_error(item.code, item.value), AssertionError)
+    assert validate_record({"version": "001", "bic": "BFSWDE33BER"}) == []
+
+
+def test_validate_record_with_optional_entries():
+    """
+    Given records with bic, purpose code and originator information
+    When validating them
+    Then malformed bics, unknown purpose codes and multi-line information are reported
+    """
+    record = {
+        **get_valid_record(),
+        "bic": "BFSWDE33",
+        "purpose": "CHAR",
+        "originator_information": "Danke",
+    }
+    assert validate_record(record) == []
+    record = {
+        **record,
+        "bic": "BFSW-DE",
+        "purpose": "char",
+        "originator_information": "a\nb",
+    }
+    assert [item.code for item in validate_record(record)] == [
+        "bic.format",
+        "purpose.unknown",
+        "originator_information.line_break",
+    ]
+
+
+def test_validate_record_with_payload_too_long():
+    """
+    Given a record whose entries are valid on their own, but exceed 331 bytes once encoded in utf-8
+    When validating it
+    Then the payload is reported as a whole
+    """
+    record = {
+        **get_valid_record(),
+        "beneficiary": "Ä" * 70,
+        "remittance": "ü" * 140,
+        "bic": "BFSWDE33BER",
+        "originator_information": "Danke",
+    }
+    (item,) = validate_record(record)
+    assert (item.field, item.code) == ("payload", "payload.length")
+    assert "must not exceed 331" in str(to_error(item.code, item.value))
+    assert validate_record({**record, "remittance": "ü"}) == []
+
+
+def test_validate_records():
+    """
+    Given many records of which some are invalid
+    When validating them
+    Then only the invalid ones are yielded by index
+    """
+    records = [get_valid_record() for _ in range(5)]
+    records[1]["amount"] = "abc"
+    records[3]["beneficiary"] = ""
+    assert [
+        (index, [item.code for item in items])
+        for index, items in validate_records(records)
+    ] == [(1, ["amount.not_a_number"]), (3, ["beneficiary.not_alphanumeric"])]
+
+
+def test_validate_column():
+    """
+    Given a column of amounts
+    When validating it
+    Then the invalid ones are reported by index
+    """
+    assert validate_column("amount", [1, 0, 10.001, "2.50"]) == [
+        (1, "amount.out_of_bounds"),
+        (2, "amount.precision"),
+    ]
+    assert validate_column("purpose", ["", "GDDS", "GOOD", "SALA"]) == [
+        (2, "purpose.unknown")
+    ]
+
+
+@pytest.mark.parametrize(
+    "res, expected",
+    [
+        (check_amount(-10), "the amount -10.0 is out of bounds"),
+        (
+            check_amount("abc"),
+            "amount must be convertible to float; exception raised: "
+            "could not convert string to float: 'abc'",
+        ),
+        (check_version("003", ""), "invalid version `003` (choose from ['001', '002']"),
+    ],
+)
+def test_checks_keep_messages(res, expected):
+    """
+    Given invalid entries
+    When checking them one at a time
+    Then the messages remain unchanged
+    """
+    assert not res.valid
+    assert str(res.error) == expected
+
+
+def test_raise_violations():
+    """
+    Given several violations of one record
+    When raising them
+    Then a single ValueError lists all of them
+    """
+    record = {**get_valid_record(), "amount": -10, "remittance": "$$"}
+    with pytest.raises(ValueError, match="out of bounds; unstructered remittance"):
+        raise_violations(validate_record(record))
+    raise_violations([])
@@ -0,0 +1,127 @@
+"""
+Tests for the decoder and the round-trip verification.
+"""
+
+import numpy as np
+import pytest
+
+from py_epc_qr.decoder import decode, modules_from_pixels, read_modules
+from py_epc_qr.encoder import (
+    ERROR_CORRECT_H,
+    ERROR_CORRECT_L,
+    ERROR_CORRECT_M,
+    ERROR_CORRECT_Q,
+    encode,
+)
+from py_epc_qr.output import ShardedWriter
+from py_epc_qr.render import to_pixels
+from py_epc_qr.transaction import consumer_epc_qr, epc_qr
+from py_epc_qr.verify import verify_directory, verify_modules
+from tests.test_encoder import get_random_payload
+
+
+@pytest.mark.parametrize(
+    "error_correction",
+    [ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q, ERROR_CORRECT_H],
+)
+@pytest.mark.parametrize("length", [1, 21, 120, 331])
+def test_decode(length, error_correction):
+    """
+    Given a payload of some length
+    When encoding and decoding it
+    Then the payload is returned
+    """
+    data = get_random_payload(length + error_correction, length)
+    assert decode(encode(data, None, error_correction)).decode("utf-8") == data
+
+
+@pytest.mark.parametrize("box_size, border", [(1, 0), (3, 4), (10, 2)])
+def test_modules_from_pixels(box_size, border, epc):
+    """
+    Given a qr code scaled to pixels
+    When reading the module matrix
+    Then the original modules are returned
+    """
+    modules = epc.to_matrix()
+    np.testing.assert_array_equal(
+        modules_from_pixels(to_pixels(modules, box_size, border)), modules
+    )
+
+
+@pytest.mark.parametrize(
+    "file_name", ["tests/data/qr_version_001.png", "tests/data/qr_version_002.png"]
+)
+def test_verify_fixtures(file_name, epc):
+    """
+    Given the images of the QR example from wikipedia
+    When verifying them against the example
+    Then no entry differs except for the version entries
+    """
+    mismatches = verify_modules(read_modules(file_name), epc)
+    assert mismatches == (["version", "bic"] if "001" in file_name else [])
+
+
+def test_verify_modules_raises_exception(epc):
+    """
+    Given a qr code with a flipped data module
+    When verifying it
+    Then an exception is raised
+    """
+    modules = epc.to_matrix()
+    modules[-1, -1] ^= True
+    with pytest.raises(ValueError):
+        verify_modules(modules)
+
+
+def test_verify_directory(tmp_path, epc):
+    """
+    Given a directory of qr codes in all readable formats, one for another transfer and one broken
+    When verifying the directory with two processes
+    Then only the two faulty files are reported
+    """
+    for fmt, suffix in [("png", "png"), ("pbm", "pbm"), ("matrix", "bin")]:
+        (tmp_path / f"ok.{suffix}").write_bytes(epc.to_bytes(fmt))
+    epc.to_qr(str(tmp_path / "ok_pillow.png"))
+    other = consumer_epc_qr("ben", "DE89370400440532013000", 10, "other")
+    (tmp_path / "other.png").write_bytes(other.to_bytes())
+    (tmp_path / "broken.png").write_bytes(b"not a png")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    expected = {name: epc for name in ["ok.png", "ok.pbm", "ok.bin", "other.png"]}
+    res = verify_directory(str(tmp_path), expected, workers=2, chunksize=1)
+    assert (res.total, res.passed, res.failed) == (6, 4, 2)
+    broken, mismatch = res.failures
+    assert broken.name == "broken.png" and broken.error is not None
+    assert mismatch == (
+        "other.png",
+        ["beneficiary", "iban", "amount", "remittance_unstructured"],
+        None,
+    )
+
+
+def test_verify_sharded_directory(tmp_path, epc):
+    """
+    Given qr codes spread over the nested directories of a sharded writer
+    When verifying the directory
+    Then the codes in all shards are verified against the transfers of their file names
+    """
+    other = consumer_epc_qr("ben", "DE89370400440532013000", 10, "other")
+    with ShardedWriter(str(tmp_path), manifest=True) as writer:
+        for name, code in [("R0001.png", epc), ("R0002.png", other)]:
+            writer.write(name, code.to_bytes())
+    res = verify_directory(str(tmp_path), {"R0001.png": epc, "R0002.png": epc})
+    assert (res.total, res.passed, res.failed) == (2, 1, 1)
+    assert res.failures[0].name == writer.location("R0002.png")
+
+
+def test_verify_modules_with_encoding():
+    """
+    Given an epc qr code in the ISO-8859-1 character set
+    When verifying its module matrix
+    Then it decodes to the encoded string
+    """
+    epc = epc_qr(
+        "002", 2, "", "Müller", "DE89370400440532013000", 10, "", "", "März", ""
+    )
+    assert decode(epc.to_matrix()) == epc.to_encoded()
+    assert verify_modules(epc.to_matrix(), epc) == []